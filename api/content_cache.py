@@ -0,0 +1,98 @@
+"""Size-capped LRU cache of parsed content pages."""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from frontmatter_parser import split_frontmatter
+
+
+def content_etag(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class CachedPage(NamedTuple):
+    frontmatter: dict
+    body: str
+    etag: str
+    size: int
+
+
+class ContentCache:
+    """Parsed pages (frontmatter, body, ETag), evicted least-recently-used.
+
+    Entries are never revalidated against the file on read; the owner calls
+    ``invalidate`` when a page changes (from the API or the file watcher).
+    The memory cap is approximate: an entry is charged the size of the
+    markdown it was parsed from.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 32 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedPage] = OrderedDict()
+        self._bytes = 0
+        # Bumped by every invalidation, so a read racing with a change never
+        # stores what it read before the change.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rel: str) -> CachedPage | None:
+        """Return the parsed page for rel, or None if it is missing."""
+        with self._lock:
+            page = self._entries.get(rel)
+            if page is not None:
+                self._entries.move_to_end(rel)
+                self.hits += 1
+                return page
+            self.misses += 1
+            generation = self._generation
+
+        try:
+            data = (self.root / rel).read_bytes()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        fm, body = split_frontmatter(data.decode("utf-8"))
+        page = CachedPage(fm, body, content_etag(data), len(data))
+
+        with self._lock:
+            if generation == self._generation and page.size <= self.max_bytes:
+                self._store(rel, page)
+        return page
+
+    def _store(self, rel: str, page: CachedPage) -> None:
+        self._drop(rel)
+        self._entries[rel] = page
+        self._bytes += page.size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, rel: str) -> None:
+        page = self._entries.pop(rel, None)
+        if page is not None:
+            self._bytes -= page.size
+
+    def invalidate(self, rel: str | None = None) -> None:
+        """Forget one page, or everything when rel is None."""
+        with self._lock:
+            self._generation += 1
+            if rel is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._drop(rel)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,15 @@
+"""gunicorn settings for the content API (values overridable via env)."""
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("API_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("API_THREADS", "4"))
+# Uploads of up to UPLOAD_MAX_SIZE on a slow uplink must not be cut off.
+timeout = int(os.environ.get("API_TIMEOUT", "120"))
+graceful_timeout = 30
+# Load the app in every worker, so each gets its own watcher thread.
+preload_app = False
+accesslog = "-"
+errorlog = "-"
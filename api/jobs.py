@@ -0,0 +1,174 @@
+"""Rebuild job history, build logs and Prometheus metrics."""
+from __future__ import annotations
+
+import json
+import secrets
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from atomicio import atomic_write, path_lock
+
+# Upper bounds (seconds) of the duration histogram buckets; +Inf is implicit.
+DURATION_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+def read_phases(report_path: Path, since: float) -> dict[str, float]:
+    """Step durations from the build report build_all.py wrote after since."""
+    try:
+        if report_path.stat().st_mtime < since:
+            return {}
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    # Cache hits (0 s) and skipped steps would drag the phase histograms down.
+    return {name: step["seconds"] for name, step in report.get("steps", {}).items()
+            if "seconds" in step and step.get("cache") != "hit" and not step.get("skipped")}
+
+
+class JobHistory:
+    """Finished rebuilds on disk, shared by all API workers.
+
+    ``jobs.jsonl`` holds one record per job (newest last) and every job's
+    full output is kept in ``<id>.log``. Only the newest ``keep`` jobs and
+    their logs are retained. Counters and histograms in ``metrics.json`` are
+    cumulative and survive rotation.
+    """
+
+    def __init__(self, directory: Path, keep: int = 100):
+        self.directory = directory
+        self.keep = keep
+        self.index_path = directory / "jobs.jsonl"
+        self.metrics_path = directory / "metrics.json"
+
+    @staticmethod
+    def new_id() -> str:
+        return time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + secrets.token_hex(3)
+
+    def log_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.log"
+
+    def record(self, job: dict, log: str) -> None:
+        """Store a finished job (see _run_build for the fields) and its log."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.log_path(job["id"]), log)
+        with path_lock(self.index_path):
+            jobs = self.jobs() + [job]
+            for old in jobs[:-self.keep]:
+                try:
+                    self.log_path(old["id"]).unlink()
+                except FileNotFoundError:
+                    pass
+            jobs = jobs[-self.keep:]
+            atomic_write(self.index_path, "".join(json.dumps(j) + "\n" for j in jobs))
+            self._count(job)
+
+    def jobs(self) -> list[dict]:
+        try:
+            lines = self.index_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        jobs = []
+        for line in lines:
+            try:
+                jobs.append(json.loads(line))
+            except ValueError:
+                continue
+        return jobs
+
+    def get(self, job_id: str) -> dict | None:
+        return next((j for j in self.jobs() if j["id"] == job_id), None)
+
+    def read_log(self, job_id: str) -> str | None:
+        try:
+            return self.log_path(job_id).read_text(encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            return None
+
+    def _count(self, job: dict) -> None:
+        metrics = self.metrics()
+        results = metrics.setdefault("results", {})
+        results[job["result"]] = results.get(job["result"], 0) + 1
+        if job["result"] == "ok":
+            metrics["last_success"] = job["finished_at_unix"]
+        histograms = metrics.setdefault("histograms", {})
+        _observe(histograms, "", job["duration"])
+        for phase, seconds in job.get("phases", {}).items():
+            _observe(histograms, phase, seconds)
+        atomic_write(self.metrics_path, json.dumps(metrics))
+
+    def metrics(self) -> dict:
+        try:
+            return json.loads(self.metrics_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+def _observe(histograms: dict, name: str, value: float) -> None:
+    h = histograms.setdefault(name, {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0})
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if value <= bound:
+            h["buckets"][i] += 1
+    h["sum"] += value
+    h["count"] += 1
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(lines: list[str], metric: str, h: dict, labels: str = "") -> None:
+    sep = "," if labels else ""
+    for bound, count in zip(DURATION_BUCKETS, h["buckets"]):
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+    lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {h["count"]}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {round(h['sum'], 3)}")
+    lines.append(f"{metric}_count{suffix} {h['count']}")
+
+
+def render_metrics(metrics: dict, status: dict) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = [
+        "# HELP mygarden_rebuilds_total Finished site rebuilds by result.",
+        "# TYPE mygarden_rebuilds_total counter",
+    ]
+    for result in sorted(set(metrics.get("results", {})) | {"ok", "failed"}):
+        lines.append(f'mygarden_rebuilds_total{{result="{_label(result)}"}} '
+                     f'{metrics.get("results", {}).get(result, 0)}')
+
+    histograms = metrics.get("histograms", {})
+    lines += [
+        "# HELP mygarden_rebuild_duration_seconds Wall time of whole rebuilds.",
+        "# TYPE mygarden_rebuild_duration_seconds histogram",
+    ]
+    if "" in histograms:
+        _histogram(lines, "mygarden_rebuild_duration_seconds", histograms[""])
+    lines += [
+        "# HELP mygarden_build_phase_duration_seconds Wall time of build phases (filter, hugo:<audience>, check:<name>).",
+        "# TYPE mygarden_build_phase_duration_seconds histogram",
+    ]
+    for phase in sorted(p for p in histograms if p):
+        _histogram(lines, "mygarden_build_phase_duration_seconds", histograms[phase],
+                   f'phase="{_label(phase)}"')
+
+    lines += [
+        "# HELP mygarden_rebuild_in_progress Whether a rebuild is running.",
+        "# TYPE mygarden_rebuild_in_progress gauge",
+        f"mygarden_rebuild_in_progress {int(bool(status.get('rebuilding')))}",
+        "# HELP mygarden_rebuild_pending Whether edits are waiting for a rebuild.",
+        "# TYPE mygarden_rebuild_pending gauge",
+        f"mygarden_rebuild_pending {int(bool(status.get('pending')))}",
+    ]
+    if "last_success" in metrics:
+        lines += [
+            "# HELP mygarden_rebuild_last_success_timestamp_seconds End of the last successful rebuild.",
+            "# TYPE mygarden_rebuild_last_success_timestamp_seconds gauge",
+            f"mygarden_rebuild_last_success_timestamp_seconds {metrics['last_success']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def utc_now() -> tuple[str, float]:
+    now = time.time()
+    return datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="seconds"), now
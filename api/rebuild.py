@@ -0,0 +1,209 @@
+"""Debounced, coalescing rebuild scheduler for the content API."""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+
+from atomicio import atomic_write, path_lock
+
+
+class RebuildScheduler:
+    """Coalesce rebuild requests into as few builds as possible.
+
+    A request arms a debounce timer; further requests inside the window push
+    it back (but never beyond ``max_delay`` after the first one). Requests
+    arriving while a build runs are not dropped: they schedule exactly one
+    follow-up build, so the last saved change is always published.
+
+    Each request names the audiences it affects (None = all); a build gets
+    the union of the audiences of all requests it coalesces.
+    """
+
+    def __init__(self, run: Callable[[set[str] | None], bool], debounce: float = 2.0,
+                 max_delay: float = 30.0):
+        self._run = run
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._pending = False
+        self._audiences: set[str] | None = set()
+        self._building: set[str] | None = set()
+        self._running = False
+        self._first_request = 0.0
+        self._deadline = 0.0
+        self._coalesced = 0
+        self._last_duration: float | None = None
+        self._last_result: str | None = None
+        self._last_finished: str | None = None
+
+    def request(self, audiences: Iterable[str] | None = None) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if self._pending:
+                self._coalesced += 1
+            else:
+                self._pending = True
+                self._first_request = now
+                self._audiences = set()
+            if audiences is None or self._audiences is None:
+                self._audiences = None
+            else:
+                self._audiences.update(audiences)
+            self._deadline = min(now + self.debounce, self._first_request + self.max_delay)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="rebuild-scheduler", daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "rebuilding": self._running,
+                "pending": self._pending,
+                "pending_audiences": self._sorted(self._audiences) if self._pending else [],
+                "building_audiences": self._sorted(self._building) if self._running else [],
+                "coalesced": self._coalesced,
+                "last_duration": self._last_duration,
+                "last_result": self._last_result,
+                "last_finished_at": self._last_finished,
+            }
+
+    @staticmethod
+    def _sorted(audiences: set[str] | None) -> list | str:
+        return "all" if audiences is None else sorted(audiences)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                while (remaining := self._deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                self._pending = False
+                self._coalesced = 0
+                self._running = True
+                self._building = self._audiences
+                audiences = None if self._audiences is None else set(self._audiences)
+
+            started = time.monotonic()
+            try:
+                result = "ok" if self._run(audiences) else "failed"
+            except Exception as e:
+                print(f"[content-api] rebuild error: {e}")
+                result = "error"
+
+            with self._cond:
+                self._running = False
+                self._last_duration = round(time.monotonic() - started, 3)
+                self._last_result = result
+                self._last_finished = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                self._cond.notify_all()
+
+
+class BuildCoordinator:
+    """Run builds for all API worker processes, one at a time.
+
+    Workers ``submit`` the audiences they need into a spool file; whoever
+    then holds the build lock (an flock, so it dies with its process) takes
+    the whole spool and builds it. Workers that waited for the lock find
+    the spool already taken and skip, so N workers never start N builds.
+    The outcome is shared through a state file for ``status``.
+
+    ``run`` gets the audiences (None = all) and what triggered the build.
+    """
+
+    MAX_TRIGGERS = 20
+
+    def __init__(self, state_dir: Path, run: Callable[[set[str] | None, list[str]], bool]):
+        self.state_dir = state_dir
+        self._run = run
+        self.spool_path = state_dir / "spool.json"
+        self.state_path = state_dir / "state.json"
+        self.lock_path = state_dir / "build.lock"
+
+    def _read(self, path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def submit(self, audiences: Iterable[str] | None = None, trigger: str | None = None) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with path_lock(self.spool_path):
+            spool = self._read(self.spool_path)
+            if spool is None:
+                merged = None if audiences is None else sorted(set(audiences))
+                spool = {"audiences": merged, "requests": 0, "triggers": []}
+            elif audiences is None or spool["audiences"] is None:
+                spool["audiences"] = None
+            else:
+                spool["audiences"] = sorted(set(spool["audiences"]) | set(audiences))
+            spool["requests"] += 1
+            if trigger and trigger not in spool["triggers"] and len(spool["triggers"]) < self.MAX_TRIGGERS:
+                spool["triggers"].append(trigger)
+            atomic_write(self.spool_path, json.dumps(spool))
+
+    def _take(self) -> dict | None:
+        with path_lock(self.spool_path):
+            spool = self._read(self.spool_path)
+            if spool is not None:
+                self.spool_path.unlink()
+            return spool
+
+    def run_pending(self) -> bool:
+        """Build whatever is spooled (waiting for a running build first)."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            spool = self._take()
+            if spool is None:
+                return True
+            audiences = None if spool["audiences"] is None else set(spool["audiences"])
+            state = self._read(self.state_path) or {}
+            state.update(pid=os.getpid(), building_audiences=RebuildScheduler._sorted(audiences))
+            atomic_write(self.state_path, json.dumps(state))
+            started = time.monotonic()
+            ok = False
+            try:
+                ok = self._run(audiences, spool.get("triggers", []))
+                return ok
+            finally:
+                state.update(
+                    last_duration=round(time.monotonic() - started, 3),
+                    last_result="ok" if ok else "failed",
+                    last_finished_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                )
+                atomic_write(self.state_path, json.dumps(state))
+
+    def building(self) -> bool:
+        """True while some process holds the build lock."""
+        try:
+            with open(self.lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except FileNotFoundError:
+            return False
+        except BlockingIOError:
+            return True
+        return False
+
+    def status(self) -> dict:
+        state = self._read(self.state_path) or {}
+        spool = self._read(self.spool_path)
+        building = self.building()
+        return {
+            "rebuilding": building,
+            "pending": spool is not None,
+            "pending_audiences": [] if spool is None else (
+                "all" if spool["audiences"] is None else spool["audiences"]),
+            "building_audiences": state.get("building_audiences", []) if building else [],
+            "last_duration": state.get("last_duration"),
+            "last_result": state.get("last_result"),
+            "last_finished_at": state.get("last_finished_at"),
+        }
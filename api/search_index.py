@@ -0,0 +1,156 @@
+"""In-memory listing and full-text index over the content tree."""
+from __future__ import annotations
+
+import bisect
+import heapq
+import os
+import re
+import threading
+from pathlib import Path
+
+from frontmatter_parser import split_frontmatter
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+EXCERPT_LENGTH = 160
+SORT_KEYS = {"date", "title", "path"}
+
+
+def tokenize(text: str) -> set[str]:
+    return {t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1}
+
+
+def _as_list(value) -> list[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+class ContentSearchIndex:
+    """Page metadata plus an inverted token index, kept current by the API.
+
+    Bodies are not kept in memory; only their tokens and a short excerpt.
+    Term lookups use a sorted vocabulary, so every query term also matches
+    as a prefix ("dock" finds "docker").
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.RLock()
+        self._entries: dict[str, dict] = {}
+        self._tokens: dict[str, set[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._vocab: list[str] | None = None
+
+    def build(self) -> "ContentSearchIndex":
+        """(Re)index every page under root from scratch."""
+        with self._lock:
+            self._entries.clear()
+            self._tokens.clear()
+            self._postings.clear()
+            self._vocab = None
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith(".md"):
+                        full = Path(dirpath) / name
+                        self.refresh(full.relative_to(self.root).as_posix())
+        return self
+
+    def refresh(self, rel: str) -> None:
+        """Re-read one page from disk (or drop it if it is gone)."""
+        full = self.root / rel
+        try:
+            text = full.read_text(encoding="utf-8")
+        except (FileNotFoundError, IsADirectoryError):
+            self.remove(rel)
+            return
+        fm, body = split_frontmatter(text)
+        self.update(rel, fm, body)
+
+    def update(self, rel: str, fm: dict, body: str) -> None:
+        entry = {
+            "path": rel,
+            "title": str(fm.get("title", "")),
+            "type": str(fm.get("type", "")),
+            "segment": str(fm.get("segment", "")),
+            "status": str(fm.get("status", "")),
+            "visibility": str(fm.get("visibility", "")),
+            "groups": _as_list(fm.get("groups")),
+            "tags": _as_list(fm.get("tags")),
+            "date": str(fm.get("date", "")),
+            "excerpt": " ".join(body.split())[:EXCERPT_LENGTH],
+        }
+        tokens = tokenize(entry["title"]) | tokenize(body)
+        with self._lock:
+            self._drop_tokens(rel)
+            self._entries[rel] = entry
+            self._tokens[rel] = tokens
+            for token in tokens:
+                if token not in self._postings:
+                    self._postings[token] = set()
+                    self._vocab = None
+                self._postings[token].add(rel)
+
+    def remove(self, rel: str) -> None:
+        with self._lock:
+            self._drop_tokens(rel)
+            self._entries.pop(rel, None)
+
+    def _drop_tokens(self, rel: str) -> None:
+        for token in self._tokens.pop(rel, ()):
+            paths = self._postings.get(token)
+            if paths is not None:
+                paths.discard(rel)
+                if not paths:
+                    del self._postings[token]
+                    self._vocab = None
+
+    def _matching(self, term: str) -> set[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        matches: set[str] = set()
+        i = bisect.bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            matches |= self._postings[self._vocab[i]]
+            i += 1
+        return matches
+
+    def query(self, filters: dict[str, str], q: str = "", sort: str = "-date",
+              offset: int = 0, limit: int = 50) -> tuple[int, list[dict]]:
+        """Return (total matches, page of entries)."""
+        with self._lock:
+            terms = sorted(tokenize(q), key=len, reverse=True)
+            if terms:
+                candidates = self._matching(terms[0])
+                for term in terms[1:]:
+                    if not candidates:
+                        break
+                    candidates = candidates & self._matching(term)
+                entries = [self._entries[p] for p in candidates]
+            else:
+                # No q, or only one-character tokens (not indexed): nothing to narrow by.
+                entries = list(self._entries.values())
+
+        def keep(e: dict) -> bool:
+            for field in ("segment", "status", "visibility", "type"):
+                if field in filters and e[field] != filters[field]:
+                    return False
+            if "tag" in filters and filters["tag"] not in e["tags"]:
+                return False
+            if "group" in filters and filters["group"] not in e["groups"]:
+                return False
+            if "date_from" in filters and e["date"] < filters["date_from"]:
+                return False
+            if "date_to" in filters and e["date"] > filters["date_to"]:
+                return False
+            return True
+
+        entries = [e for e in entries if keep(e)]
+        field = sort.lstrip("-")
+
+        def key(e: dict) -> tuple[str, str]:
+            return e[field], e["path"]
+
+        # Only the requested window needs ordering, not the whole result set.
+        select = heapq.nlargest if sort.startswith("-") else heapq.nsmallest
+        window = select(offset + limit, entries, key=key)[offset:]
+        return len(entries), [dict(e) for e in window]
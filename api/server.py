@@ -6,18 +6,41 @@ import json
 import os
 import re
 import subprocess
+import sys
 import threading
+import time
+from contextlib import ExitStack
 from pathlib import Path
+from typing import BinaryIO
 
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, Response, has_request_context, request, jsonify, send_file, render_template
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts" / "build"))
+from atomicio import atomic_write, atomic_writer, path_lock  # noqa: E402
+from audiences import DEFAULT_AUDIENCES, parse_audiences  # noqa: E402
+from content_cache import ContentCache, content_etag  # noqa: E402
+from frontmatter_parser import parse_frontmatter, split_frontmatter  # noqa: E402
+from jobs import JobHistory, read_phases, render_metrics, utc_now  # noqa: E402
+from rebuild import BuildCoordinator, RebuildScheduler  # noqa: E402
+from search_index import SORT_KEYS, ContentSearchIndex  # noqa: E402
+from watcher import start_watcher  # noqa: E402
+
 app = Flask(__name__)
 
 CONTENT_ROOT = Path("/workspace/site/content")
 BUILD_SCRIPT = "/workspace/scripts/build-all.sh"
 AVATAR_DIR = Path("/workspace/infra/avatars")
 AVATAR_MAX_SIZE = 1 * 1024 * 1024  # 1 MB
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", str(20 * 1024 * 1024)))  # 20 MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# fsync content and uploads before publishing them (set FSYNC_WRITES=0 to skip).
+FSYNC_WRITES = os.environ.get("FSYNC_WRITES", "1") != "0"
+
+# Hard cap on any request body; multipart form overhead gets 1 MB of slack.
+# Werkzeug spools larger file parts to disk, so uploads never sit in memory.
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_SIZE + 1024 * 1024
 
 VALID_TYPES = {"note", "trip", "timeline-entry", "dossier", "article"}
 VALID_SEGMENTS = {"politik", "technik", "reisen"}
@@ -25,40 +48,209 @@ VALID_STATUSES = {"seedling", "plant", "tree"}
 VALID_VISIBILITIES = {"public", "group", "private"}
 REQUIRED_FIELDS = {"title", "type", "segment", "status", "visibility", "date"}
 
-_rebuild_lock = threading.Lock()
-_rebuilding = False
+REBUILD_DEBOUNCE = float(os.environ.get("REBUILD_DEBOUNCE", "2"))
+REBUILD_MAX_DELAY = float(os.environ.get("REBUILD_MAX_DELAY", "30"))
+# Shared by all API worker processes; see BuildCoordinator.
+REBUILD_STATE_DIR = Path(os.environ.get("REBUILD_STATE_DIR", "/workspace/.cache/rebuild"))
+REBUILD_TIMEOUT = 600
+REBUILD_JOBS_KEEP = int(os.environ.get("REBUILD_JOBS_KEEP", "100"))
+BUILD_REPORT = Path("/workspace/.build/build-report.json")
+AUDIENCES = parse_audiences(os.environ.get("BUILD_AUDIENCES") or DEFAULT_AUDIENCES)
 
+CONTENT_CACHE_MAX_BYTES = int(os.environ.get("CONTENT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CONTENT_WATCH = os.environ.get("CONTENT_WATCH", "auto")  # auto | inotify | poll | off
+CONTENT_POLL_INTERVAL = float(os.environ.get("CONTENT_POLL_INTERVAL", "2"))
 
-def _trigger_rebuild():
-    """Run build-all.sh asynchronously."""
-    global _rebuilding
 
-    def _run():
-        global _rebuilding
-        try:
-            result = subprocess.run(
-                ["bash", BUILD_SCRIPT],
-                cwd="/workspace",
-                capture_output=True,
-                text=True,
-                timeout=600,
-            )
-            if result.returncode != 0:
-                print(f"[content-api] rebuild FAILED (rc={result.returncode})")
-                print(f"[content-api] stderr: {result.stderr[-500:]}")
-            else:
-                print("[content-api] rebuild OK")
-        except Exception as e:
-            print(f"[content-api] rebuild error: {e}")
-        finally:
-            with _rebuild_lock:
-                _rebuilding = False
+_jobs = JobHistory(REBUILD_STATE_DIR / "jobs", keep=REBUILD_JOBS_KEEP)
+
+
+def _run_build(audiences: set[str] | None = None, triggers: list[str] | None = None) -> bool:
+    """Run build-all.sh synchronously for the given audiences (None = all).
+
+    The run is recorded as a job with its full log and the per-phase timings
+    from the build report. Returns True on success.
+    """
+    env = dict(os.environ)
+    if audiences is not None:
+        env["BUILD_AUDIENCES"] = ",".join(a.spec for a in AUDIENCES if a.spec in audiences)
+        print(f"[content-api] rebuilding {env['BUILD_AUDIENCES']}")
+    job_id = _jobs.new_id()
+    started_at, started_unix = utc_now()
+    started = time.monotonic()
+    try:
+        result = subprocess.run(
+            ["bash", BUILD_SCRIPT],
+            cwd="/workspace",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=REBUILD_TIMEOUT,
+            env=env,
+        )
+        returncode, log = result.returncode, result.stdout
+        outcome = "ok" if returncode == 0 else "failed"
+    except subprocess.TimeoutExpired as e:
+        output = e.output or ""
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", "replace")
+        returncode, log, outcome = None, output + f"\n[content-api] timed out after {REBUILD_TIMEOUT}s\n", "timeout"
+    finished_at, finished_unix = utc_now()
+
+    job = {
+        "id": job_id,
+        "trigger": list(triggers or []),
+        "audiences": "all" if audiences is None else sorted(audiences),
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "finished_at_unix": round(finished_unix, 3),
+        "duration": round(time.monotonic() - started, 3),
+        "returncode": returncode,
+        "result": outcome,
+        "phases": read_phases(BUILD_REPORT, started_unix),
+    }
+    try:
+        _jobs.record(job, log)
+    except OSError as e:
+        print(f"[content-api] could not record job {job_id}: {e}")
+
+    if outcome != "ok":
+        print(f"[content-api] rebuild {outcome.upper()} (rc={returncode}, job {job_id})")
+        print(f"[content-api] output: {log[-500:]}")
+        return False
+    print(f"[content-api] rebuild OK in {job['duration']:.1f}s (job {job_id})")
+    return True
+
+
+_coordinator = BuildCoordinator(REBUILD_STATE_DIR, _run_build)
+# Each worker debounces its own edits; the coordinator then makes sure only
+# one process builds at a time and builds everything spooled by all of them.
+_scheduler = RebuildScheduler(lambda _audiences: _coordinator.run_pending(),
+                              debounce=REBUILD_DEBOUNCE, max_delay=REBUILD_MAX_DELAY)
+
+
+def _trigger_rebuild(audiences: set[str] | None = None):
+    """Schedule a (debounced) rebuild; bursts of edits share one build.
+
+    ``audiences`` limits the build to the outputs a change can affect.
+    """
+    trigger = f"{request.method} {request.path}" if has_request_context() else None
+    _coordinator.submit(audiences, trigger)
+    _scheduler.request(audiences)
+
+
+def _affected_audiences(rel_path: str, old_fm: dict | None, new_fm: dict | None) -> set[str] | None:
+    """Audiences whose output can change when a page goes from old_fm to new_fm.
+
+    A page shows up in an audience if its old or new frontmatter is included
+    there. Section indexes can be staged structurally for any audience, so
+    changing one rebuilds everything (None).
+    """
+    if Path(rel_path).name == "_index.md":
+        return None
+    affected = set()
+    for audience in AUDIENCES:
+        if any(fm is not None and audience.includes(fm) for fm in (old_fm, new_fm)):
+            affected.add(audience.spec)
+    # The private build contains every page.
+    affected.add("private")
+    return affected
+
+
+def _read_frontmatter(full: Path) -> dict | None:
+    return parse_frontmatter(full) if full.is_file() else None
+
+
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 500
+LIST_FILTERS = ("segment", "status", "visibility", "type", "tag", "group", "date_from", "date_to")
+
+_search_index: ContentSearchIndex | None = None
+_search_index_lock = threading.Lock()
 
-    with _rebuild_lock:
-        if _rebuilding:
-            return
-        _rebuilding = True
-    threading.Thread(target=_run, daemon=True).start()
+
+def _get_search_index() -> ContentSearchIndex:
+    """Return the listing/search index, building it on first use."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None or _search_index.root != CONTENT_ROOT:
+            _search_index = ContentSearchIndex(CONTENT_ROOT).build()
+        return _search_index
+
+
+_content_cache: ContentCache | None = None
+_content_cache_lock = threading.Lock()
+
+
+def _get_content_cache() -> ContentCache:
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is None or _content_cache.root != CONTENT_ROOT:
+            _content_cache = ContentCache(CONTENT_ROOT, CONTENT_CACHE_MAX_BYTES)
+        return _content_cache
+
+
+def _content_changed(rel_path: str | None) -> None:
+    """Drop cached state for a page (None = every page) after it changed on disk."""
+    _get_content_cache().invalidate(rel_path)
+    index = _get_search_index()
+    if rel_path is None:
+        index.build()
+    else:
+        index.refresh(rel_path)
+
+
+def _start_content_watcher():
+    """Follow edits made outside the API (git pull, sync tools)."""
+    watcher = start_watcher(CONTENT_ROOT, _content_changed, CONTENT_WATCH, CONTENT_POLL_INTERVAL)
+    if watcher is not None:
+        print(f"[content-api] watching {CONTENT_ROOT} ({watcher.mode})")
+    return watcher
+
+
+def _precondition_failed(full: Path):
+    """412 response if the request's If-Match does not match the file on disk.
+
+    Without If-Match the write is unconditional, as before. A page that
+    does not exist (any more) matches no ETag. Call with path_lock(full)
+    held, so the ETag stays valid until the write.
+    """
+    if not request.if_match:
+        return None
+    try:
+        current = content_etag(full.read_bytes())
+    except FileNotFoundError:
+        return jsonify({"error": "page does not exist"}), 412
+    if request.if_match.contains(current):
+        return None
+    response = jsonify({"error": "page was changed since it was loaded", "etag": current})
+    response.set_etag(current)
+    return response, 412
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _stream_to_file(stream: BinaryIO, target: Path, limit: int) -> int:
+    """Copy stream to target in chunks, giving up once limit is exceeded.
+
+    The target is replaced atomically, so readers never see a partial file.
+    Returns the number of bytes written; an empty stream leaves target
+    untouched and returns 0.
+    """
+    chunk = stream.read(UPLOAD_CHUNK_SIZE)
+    if not chunk:
+        return 0
+    size = 0
+    with path_lock(target), atomic_writer(target, fsync=FSYNC_WRITES, mode=0o644) as out:
+        while chunk:
+            size += len(chunk)
+            if size > limit:
+                raise UploadTooLarge(f"upload exceeds {limit} bytes")
+            out.write(chunk)
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+    return size
 
 
 def _validate_path(rel_path: str) -> Path | None:
@@ -76,40 +268,9 @@ def _validate_path(rel_path: str) -> Path | None:
     return full
 
 
-def _parse_frontmatter(text: str) -> tuple[dict, str]:
-    """Parse frontmatter and body from markdown text."""
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    if not text.startswith("---\n"):
-        return {}, text
-
-    m = re.match(r"^---\n(.*?)\n---\s*(?:\n|$)", text, re.DOTALL)
-    if not m:
-        return {}, text
-
-    data: dict = {}
-    current_list_key: str | None = None
-    for raw in m.group(1).splitlines():
-        line = raw.rstrip()
-        if not line.strip() or line.strip().startswith("#"):
-            continue
-        kv = re.match(r"^([A-Za-z0-9_-]+):\s*(.*)$", line)
-        if kv:
-            key, val = kv.group(1), kv.group(2).strip()
-            current_list_key = None
-            if val.startswith("[") and val.endswith("]"):
-                inner = val[1:-1].strip()
-                data[key] = [x.strip().strip("\"'") for x in inner.split(",") if x.strip()]
-            elif val == "":
-                data[key] = []
-                current_list_key = key
-            else:
-                data[key] = val.strip("\"'")
-            continue
-        lm = re.match(r"^\s*-\s*(.+)$", line)
-        if lm and current_list_key:
-            data.setdefault(current_list_key, []).append(lm.group(1).strip().strip("\"'"))
-    body = text[m.end():]
-    return data, body
+def _content_key(full: Path) -> str:
+    """Canonical page path used by the cache and index ("a/./b.md" -> "a/b.md")."""
+    return full.relative_to(CONTENT_ROOT.resolve()).as_posix()
 
 
 def _serialize_frontmatter(fm: dict, body: str) -> str:
@@ -167,15 +328,260 @@ def _validate_frontmatter(fm: dict) -> list[str]:
     return errors
 
 
+BATCH_MAX_OPERATIONS = 500
+BATCH_OPS = {"upsert", "delete", "move"}
+
+
+def _plan_batch(operations: list) -> tuple[list[dict], list[str]]:
+    """Validate a batch against the current tree without touching it.
+
+    Returns (steps, errors). Operations are checked in order against the
+    state the earlier ones leave behind, so e.g. a move onto a path deleted
+    earlier in the same batch is fine.
+    """
+    steps: list[dict] = []
+    errors: list[str] = []
+    exists: dict[Path, bool] = {}
+
+    def present(full: Path) -> bool:
+        if full not in exists:
+            exists[full] = full.is_file()
+        return exists[full]
+
+    for i, op in enumerate(operations):
+        where = f"operations[{i}]"
+        if not isinstance(op, dict) or op.get("op") not in BATCH_OPS:
+            errors.append(f"{where}: op must be one of {sorted(BATCH_OPS)}")
+            continue
+        full = _validate_path(op.get("path") or "")
+        if full is None:
+            errors.append(f"{where}: invalid path")
+            continue
+        step = {"op": op["op"], "path": op["path"], "full": full, "if_match": op.get("if_match")}
+
+        if op["op"] == "upsert":
+            fm = op.get("frontmatter")
+            if not isinstance(fm, dict):
+                errors.append(f"{where}: frontmatter must be an object")
+                continue
+            body = op.get("body", "")
+            if not isinstance(body, str):
+                errors.append(f"{where}: body must be a string")
+                continue
+            errors.extend(f"{where}: {e}" for e in _validate_frontmatter(fm))
+            step["content"] = _serialize_frontmatter(fm, body)
+            exists[full] = True
+        elif not present(full):
+            errors.append(f"{where}: file not found")
+            continue
+        elif op["op"] == "delete":
+            exists[full] = False
+        else:
+            target = _validate_path(op.get("to") or "")
+            if target is None:
+                errors.append(f"{where}: invalid target path")
+                continue
+            if target != full and present(target):
+                errors.append(f"{where}: target already exists")
+                continue
+            step["to"], step["target"] = op["to"], target
+            exists[full], exists[target] = False, True
+        steps.append(step)
+    return steps, errors
+
+
+def _read_bytes(full: Path) -> bytes | None:
+    try:
+        return full.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _frontmatter_of(data: bytes | None) -> dict | None:
+    return None if data is None else split_frontmatter(data.decode("utf-8"))[0]
+
+
+def _missing_dirs(paths: list[Path]) -> list[Path]:
+    """Parent directories of paths that do not exist yet, deepest first."""
+    missing: set[Path] = set()
+    for full in paths:
+        for parent in full.parents:
+            if parent.is_dir():
+                break
+            missing.add(parent)
+    return sorted(missing, key=lambda d: len(d.parts), reverse=True)
+
+
+def _restore(originals: dict[Path, bytes | None], new_dirs: list[Path]) -> None:
+    """Put every touched file back the way it was before the batch.
+
+    new_dirs (deepest first) are the directories the batch may have created;
+    they are removed again if they are empty.
+    """
+    for full, data in originals.items():
+        try:
+            if data is None:
+                full.unlink(missing_ok=True)
+            else:
+                atomic_write(full, data, fsync=FSYNC_WRITES)
+        except OSError as e:
+            print(f"[content-api] batch rollback failed for {full}: {e}")
+    for directory in new_dirs:
+        try:
+            directory.rmdir()
+        except OSError:
+            pass  # not created after all, or meanwhile used by someone else
+
+
+def _apply_batch(steps: list[dict]) -> list[dict]:
+    results = []
+    for step in steps:
+        full = step["full"]
+        if step["op"] == "upsert":
+            full.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(full, step["content"], fsync=FSYNC_WRITES)
+            results.append({"op": "upsert", "path": step["path"],
+                            "etag": content_etag(step["content"].encode("utf-8"))})
+        elif step["op"] == "delete":
+            full.unlink()
+            results.append({"op": "delete", "path": step["path"]})
+        else:
+            step["target"].parent.mkdir(parents=True, exist_ok=True)
+            os.replace(full, step["target"])
+            results.append({"op": "move", "path": step["path"], "to": step["to"]})
+    return results
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({"error": f"request body too large (max {UPLOAD_MAX_SIZE} bytes)"}), 413
+
+
 @app.route("/api/content/_status", methods=["GET"])
 def get_status():
-    with _rebuild_lock:
-        return jsonify({"rebuilding": _rebuilding})
+    return jsonify(_rebuild_status())
+
+
+def _rebuild_status() -> dict:
+    status = _coordinator.status()
+    local = _scheduler.status()
+    # Edits still inside this worker's debounce window count as pending too.
+    status["pending"] = status["pending"] or local["pending"]
+    status["coalesced"] = local["coalesced"]
+    return status
+
+
+@app.route("/api/content/_jobs", methods=["GET"])
+def list_jobs():
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    jobs = _jobs.jobs()[::-1][:max(limit, 0)]
+    return jsonify({"jobs": jobs})
+
+
+@app.route("/api/content/_jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = _jobs.get(job_id) if re.match(r"^[0-9A-Za-z-]+$", job_id) else None
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/content/_jobs/<job_id>/log", methods=["GET"])
+def get_job_log(job_id):
+    log = _jobs.read_log(job_id) if re.match(r"^[0-9A-Za-z-]+$", job_id) else None
+    if log is None:
+        return jsonify({"error": "job not found"}), 404
+    return Response(log, mimetype="text/plain")
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Not routed by the gateway; scraped inside the compose network.
+    return Response(render_metrics(_jobs.metrics(), _rebuild_status()),
+                    mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/content", methods=["GET"])
+@app.route("/api/content/", methods=["GET"])
+def list_content():
+    filters = {k: request.args[k] for k in LIST_FILTERS if request.args.get(k)}
+    q = request.args.get("q", "")
+    sort = request.args.get("sort", "-date")
+    if sort.lstrip("-") not in SORT_KEYS:
+        return jsonify({"error": f"invalid sort '{sort}'"}), 400
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", LIST_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    if offset < 0 or not 1 <= limit <= LIST_MAX_LIMIT:
+        return jsonify({"error": f"offset must be >= 0 and limit 1..{LIST_MAX_LIMIT}"}), 400
+
+    total, items = _get_search_index().query(filters, q=q, sort=sort, offset=offset, limit=limit)
+    return jsonify({"total": total, "offset": offset, "limit": limit, "items": items})
+
+
+@app.route("/api/content/_batch", methods=["POST"])
+def batch_content():
+    """Apply upserts, deletes and moves all-or-nothing, then rebuild once."""
+    data = request.get_json(silent=True)
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({"error": f"at most {BATCH_MAX_OPERATIONS} operations per batch"}), 400
+
+    steps, errors = _plan_batch(operations)
+    if errors:
+        return jsonify({"error": "validation failed", "details": errors}), 422
+
+    touched = sorted({s["full"] for s in steps} | {s["target"] for s in steps if "target" in s})
+    with ExitStack() as locks:
+        # Lock in path order so concurrent batches cannot deadlock.
+        for full in touched:
+            locks.enter_context(path_lock(full))
+
+        originals = {full: _read_bytes(full) for full in touched}
+        new_dirs = _missing_dirs(touched)
+        # if_match refers to the page as it was before the batch.
+        for i, step in enumerate(steps):
+            expected = step["if_match"]
+            current = originals[step["full"]]
+            if not expected or (expected == "*" and current is not None):
+                continue
+            if current is None or expected.strip('"') != content_etag(current):
+                return jsonify({"error": f"operations[{i}]: page was changed since it was loaded",
+                                "etag": current and content_etag(current)}), 412
+
+        try:
+            results = _apply_batch(steps)
+        except Exception as e:
+            _restore(originals, new_dirs)
+            for full in touched:
+                _content_changed(_content_key(full))
+            return jsonify({"error": f"batch failed, no changes applied: {e}"}), 500
+
+    affected: set[str] | None = set()
+    changed = False
+    for full in touched:
+        key = _content_key(full)
+        _content_changed(key)
+        if _read_bytes(full) == originals[full]:
+            continue
+        changed = True
+        audiences = _affected_audiences(key, _frontmatter_of(originals[full]), _read_frontmatter(full))
+        affected = None if audiences is None or affected is None else affected | audiences
+    if changed:
+        _trigger_rebuild(affected)
+    return jsonify({"ok": True, "applied": len(results), "results": results})
 
 
 @app.route("/api/content/_avatar", methods=["PUT"])
@@ -183,12 +589,17 @@ def upload_avatar():
     if request.content_type not in ("image/jpeg", "image/png"):
         return jsonify({"error": "only image/jpeg or image/png allowed"}), 400
     
-    data = request.get_data()
-    if not data or len(data) > AVATAR_MAX_SIZE:
-        return jsonify({"error": "body required, max 1 MB"}), 400
+    if request.content_length is not None and request.content_length > AVATAR_MAX_SIZE:
+        return jsonify({"error": "body required, max 1 MB"}), 413
 
     AVATAR_DIR.mkdir(parents=True, exist_ok=True)
-    AVATAR_DIR.joinpath("admin.jpg").write_bytes(data)
+    target = AVATAR_DIR.joinpath("admin.jpg")
+    try:
+        size = _stream_to_file(request.stream, target, AVATAR_MAX_SIZE)
+    except UploadTooLarge:
+        return jsonify({"error": "body required, max 1 MB"}), 413
+    if size == 0:
+        return jsonify({"error": "body required, max 1 MB"}), 400
     return jsonify({"ok": True})
 
 
@@ -233,9 +644,12 @@ def upload_image():
 
     try:
         target_dir.mkdir(parents=True, exist_ok=True)
-        file.save(target_path)
-        _trigger_rebuild()
+        _stream_to_file(file.stream, target_path, UPLOAD_MAX_SIZE)
+        page_fm = _read_frontmatter(full_page_path)
+        _trigger_rebuild(_affected_audiences(page_path, page_fm, page_fm))
         return jsonify({"ok": True})
+    except UploadTooLarge:
+        return jsonify({"error": f"image too large (max {UPLOAD_MAX_SIZE} bytes)"}), 413
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -245,12 +659,15 @@ def get_content(filepath):
     full = _validate_path(filepath)
     if full is None:
         return jsonify({"error": "invalid path"}), 400
-    if not full.is_file():
-        return jsonify({"error": "file not found"}), 404
 
-    text = full.read_text(encoding="utf-8")
-    fm, body = _parse_frontmatter(text)
-    return jsonify({"path": filepath, "frontmatter": fm, "body": body})
+    page = _get_content_cache().get(_content_key(full))
+    if page is None:
+        return jsonify({"error": "file not found"}), 404
+    response = jsonify({"path": filepath, "frontmatter": page.frontmatter, "body": page.body})
+    response.set_etag(page.etag)
+    # Let browsers keep the body but revalidate every time (cheap 304s).
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 @app.route("/api/content/<path:filepath>", methods=["PUT"])
@@ -279,9 +696,17 @@ def update_content(filepath):
         return jsonify({"error": "validation failed", "details": errors}), 422
 
     content = _serialize_frontmatter(fm, body)
-    full.write_text(content, encoding="utf-8")
-    _trigger_rebuild()
-    return jsonify({"ok": True, "path": filepath})
+    with path_lock(full):
+        conflict = _precondition_failed(full)
+        if conflict:
+            return conflict
+        old_fm = _read_frontmatter(full)
+        atomic_write(full, content, fsync=FSYNC_WRITES)
+    _content_changed(_content_key(full))
+    _trigger_rebuild(_affected_audiences(filepath, old_fm, fm))
+    response = jsonify({"ok": True, "path": filepath})
+    response.set_etag(content_etag(content.encode("utf-8")))
+    return response
 
 
 @app.route("/api/content/<path:filepath>", methods=["DELETE"])
@@ -292,12 +717,29 @@ def delete_content(filepath):
     if not full.is_file():
         return jsonify({"error": "file not found"}), 404
 
-    full.unlink()
-    _trigger_rebuild()
+    with path_lock(full):
+        # Deleted by another request while we waited for the lock.
+        if not full.is_file():
+            return jsonify({"error": "file not found"}), 404
+        conflict = _precondition_failed(full)
+        if conflict:
+            return conflict
+        old_fm = _read_frontmatter(full)
+        full.unlink()
+    _content_changed(_content_key(full))
+    _trigger_rebuild(_affected_audiences(filepath, old_fm, None))
     return jsonify({"ok": True, "deleted": filepath})
 
 
+def startup():
+    """Per-process warm-up: build the listing index and start watching content."""
+    _get_search_index()
+    _start_content_watcher()
+
+
 if __name__ == "__main__":
+    # Development server; production runs api/wsgi.py under gunicorn.
     port = int(os.environ.get("PORT", "8000"))
+    startup()
     print(f"[content-api] listening on :{port}")
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,432 @@
+import unittest
+import json
+import shutil
+import subprocess
+import tempfile
+import sys
+import os
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import server
+
+PAGE = """---
+title: "Notiz"
+type: note
+segment: technik
+status: {status}
+visibility: {visibility}
+date: 2026-02-06
+---
+
+Text.
+"""
+
+
+def frontmatter(**overrides):
+    fm = {"title": "Notiz", "type": "note", "segment": "technik", "status": "plant",
+          "visibility": "public", "date": "2026-02-06"}
+    fm.update(overrides)
+    return fm
+
+
+class ContentApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_root = Path(self.test_dir) / "content"
+        (self.content_root / "technik").mkdir(parents=True)
+
+        self.patcher = patch('server.CONTENT_ROOT', self.content_root)
+        self.patcher.start()
+        self.rebuild_patcher = patch('server._trigger_rebuild')
+        self.mock_rebuild = self.rebuild_patcher.start()
+
+        self.app = server.app.test_client()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.rebuild_patcher.stop()
+        server._search_index = None
+        server._content_cache = None
+        shutil.rmtree(self.test_dir)
+
+    def write_page(self, rel, status="plant", visibility="public"):
+        path = self.content_root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(PAGE.format(status=status, visibility=visibility), encoding="utf-8")
+        return path
+
+
+class TestScopedRebuilds(ContentApiTestCase):
+    def test_private_edit_rebuilds_only_private(self):
+        self.write_page("technik/geheim.md", visibility="private")
+        response = self.app.put('/api/content/technik/geheim.md',
+                                json={"frontmatter": frontmatter(visibility="private"), "body": "neu"})
+        self.assertEqual(response.status_code, 200)
+        self.mock_rebuild.assert_called_once_with({"private"})
+
+    def test_unpublishing_rebuilds_old_audiences(self):
+        self.write_page("technik/notiz.md", visibility="public")
+        self.app.put('/api/content/technik/notiz.md',
+                     json={"frontmatter": frontmatter(visibility="private"), "body": ""})
+        self.mock_rebuild.assert_called_once_with(
+            {"public", "group:friends", "group:family", "private"})
+
+    def test_group_page_rebuilds_its_group(self):
+        self.write_page("technik/gruppe.md", visibility="private")
+        self.app.put('/api/content/technik/gruppe.md',
+                     json={"frontmatter": frontmatter(visibility="group", groups=["family"]), "body": ""})
+        self.mock_rebuild.assert_called_once_with({"group:family", "private"})
+
+    def test_seedling_is_not_public(self):
+        self.write_page("technik/keim.md", status="seedling")
+        self.app.delete('/api/content/technik/keim.md')
+        self.mock_rebuild.assert_called_once_with({"group:friends", "group:family", "private"})
+
+    def test_section_index_rebuilds_everything(self):
+        self.write_page("technik/_index.md", visibility="private")
+        self.app.put('/api/content/technik/_index.md',
+                     json={"frontmatter": frontmatter(visibility="private"), "body": ""})
+        self.mock_rebuild.assert_called_once_with(None)
+
+
+class TestContentReads(ContentApiTestCase):
+    def test_reads_are_cached_until_the_page_changes(self):
+        path = self.write_page("technik/notiz.md", status="plant")
+        first = self.app.get('/api/content/technik/notiz.md')
+        self.assertEqual(first.json["frontmatter"]["status"], "plant")
+        # An edit outside the API is only seen once the watcher reports it.
+        path.write_text(PAGE.format(status="tree", visibility="public"), encoding="utf-8")
+        self.assertEqual(self.app.get('/api/content/technik/./notiz.md').json["frontmatter"]["status"], "plant")
+        self.assertEqual(server._content_cache.stats()["misses"], 1)
+        server._content_changed("technik/notiz.md")
+        self.assertEqual(self.app.get('/api/content/technik/notiz.md').json["frontmatter"]["status"], "tree")
+        self.assertEqual(self.paths_for("tree"), ["technik/notiz.md"])
+
+    def test_write_through_api_invalidates(self):
+        self.write_page("technik/notiz.md")
+        self.app.get('/api/content/technik/notiz.md')
+        self.app.put('/api/content/technik/notiz.md',
+                     json={"frontmatter": frontmatter(status="tree"), "body": "neu"})
+        response = self.app.get('/api/content/technik/notiz.md')
+        self.assertEqual(response.json["frontmatter"]["status"], "tree")
+        self.app.delete('/api/content/technik/notiz.md')
+        self.assertEqual(self.app.get('/api/content/technik/notiz.md').status_code, 404)
+
+    def paths_for(self, status):
+        return [i["path"] for i in self.app.get(f'/api/content?status={status}').json["items"]]
+
+
+class TestConditionalRequests(ContentApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_page("technik/notiz.md")
+        self.etag = self.app.get('/api/content/technik/notiz.md').headers["ETag"]
+
+    def test_if_none_match_returns_304(self):
+        response = self.app.get('/api/content/technik/notiz.md', headers={"If-None-Match": self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(self.app.get('/api/content/technik/notiz.md',
+                                      headers={"If-None-Match": '"other"'}).status_code, 200)
+
+    def test_put_with_stale_etag_is_rejected(self):
+        ok = self.app.put('/api/content/technik/notiz.md', headers={"If-Match": self.etag},
+                          json={"frontmatter": frontmatter(), "body": "Tab 1"})
+        self.assertEqual(ok.status_code, 200)
+        self.assertNotEqual(ok.headers["ETag"], self.etag)
+        self.assertEqual(ok.headers["ETag"],
+                         self.app.get('/api/content/technik/notiz.md').headers["ETag"])
+
+        stale = self.app.put('/api/content/technik/notiz.md', headers={"If-Match": self.etag},
+                             json={"frontmatter": frontmatter(), "body": "Tab 2"})
+        self.assertEqual(stale.status_code, 412)
+        self.assertIn("Tab 1", (self.content_root / "technik/notiz.md").read_text(encoding="utf-8"))
+        self.assertEqual(self.mock_rebuild.call_count, 1)
+
+    def test_delete_with_stale_etag_is_rejected(self):
+        (self.content_root / "technik/notiz.md").write_text("---\ntitle: x\n---\n", encoding="utf-8")
+        response = self.app.delete('/api/content/technik/notiz.md', headers={"If-Match": self.etag})
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue((self.content_root / "technik/notiz.md").exists())
+        response = self.app.delete('/api/content/technik/notiz.md', headers={"If-Match": "*"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_page_deleted_while_waiting_for_the_lock(self):
+        page = self.content_root / "technik/notiz.md"
+        real_lock = server.path_lock
+
+        def lock_after_concurrent_delete(path):
+            page.unlink(missing_ok=True)
+            return real_lock(path)
+
+        with patch('server.path_lock', lock_after_concurrent_delete):
+            put = self.app.put('/api/content/technik/notiz.md', headers={"If-Match": self.etag},
+                               json={"frontmatter": frontmatter(), "body": "x"})
+            self.assertEqual(put.status_code, 412)
+            self.write_page("technik/notiz.md")
+            delete = self.app.delete('/api/content/technik/notiz.md', headers={"If-Match": self.etag})
+            self.assertEqual(delete.status_code, 404)
+
+
+class TestBatch(ContentApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("a", "b", "c"):
+            self.write_page(f"technik/{name}.md", status="seedling", visibility="public")
+
+    def batch(self, *operations):
+        return self.app.post('/api/content/_batch', json={"operations": list(operations)})
+
+    def read(self, rel):
+        return (self.content_root / rel).read_text(encoding="utf-8")
+
+    def test_promotion_is_applied_with_one_rebuild(self):
+        response = self.batch(*[
+            {"op": "upsert", "path": f"technik/{n}.md", "frontmatter": frontmatter(status="plant"), "body": n}
+            for n in ("a", "b", "c")])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["applied"], 3)
+        for n in ("a", "b", "c"):
+            self.assertIn("status: plant", self.read(f"technik/{n}.md"))
+        self.mock_rebuild.assert_called_once_with(
+            {"public", "group:friends", "group:family", "private"})
+
+    def test_delete_and_move(self):
+        response = self.batch(
+            {"op": "delete", "path": "technik/a.md"},
+            {"op": "move", "path": "technik/b.md", "to": "reisen/b.md"},
+            {"op": "move", "path": "technik/c.md", "to": "technik/a.md"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(p.relative_to(self.content_root).as_posix()
+                                for p in self.content_root.rglob("*.md")),
+                         ["reisen/b.md", "technik/a.md"])
+        self.assertEqual(self.mock_rebuild.call_count, 1)
+
+    def test_invalid_operation_rejects_whole_batch(self):
+        response = self.batch(
+            {"op": "upsert", "path": "technik/a.md", "frontmatter": frontmatter(status="plant")},
+            {"op": "upsert", "path": "technik/b.md", "frontmatter": frontmatter(status="weed")},
+            {"op": "delete", "path": "technik/fehlt.md"},
+            {"op": "move", "path": "technik/c.md", "to": "technik/a.md"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json["details"], [
+            "operations[1]: invalid status 'weed'",
+            "operations[2]: file not found",
+            "operations[3]: target already exists",
+        ])
+        self.assertIn("status: seedling", self.read("technik/a.md"))
+        self.mock_rebuild.assert_not_called()
+
+    def test_failure_rolls_back_applied_operations(self):
+        original_a, original_b = self.read("technik/a.md"), self.read("technik/b.md")
+        real_replace = os.replace
+
+        def failing_replace(src, dst):
+            if str(dst).endswith("reisen/c.md"):
+                raise OSError("disk full")
+            return real_replace(src, dst)
+
+        with patch('server.os.replace', failing_replace):
+            response = self.batch(
+                {"op": "upsert", "path": "technik/a.md", "frontmatter": frontmatter(status="plant")},
+                {"op": "upsert", "path": "technik/neu.md", "frontmatter": frontmatter()},
+                {"op": "delete", "path": "technik/b.md"},
+                {"op": "move", "path": "technik/c.md", "to": "reisen/c.md"})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.read("technik/a.md"), original_a)
+        self.assertEqual(self.read("technik/b.md"), original_b)
+        self.assertFalse((self.content_root / "technik/neu.md").exists())
+        self.assertTrue((self.content_root / "technik/c.md").exists())
+        self.assertFalse((self.content_root / "reisen").exists())
+        self.mock_rebuild.assert_not_called()
+
+    def test_created_directories_are_removed_on_rollback(self):
+        def failing_write(path, data, **kwargs):
+            raise OSError("disk full")
+
+        with patch('server.atomic_write', failing_write):
+            response = self.batch(
+                {"op": "upsert", "path": "reisen/2026/neu.md", "frontmatter": frontmatter()})
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse((self.content_root / "reisen").exists())
+        self.assertTrue((self.content_root / "technik").is_dir())
+
+    def test_non_string_body_is_rejected(self):
+        response = self.batch(
+            {"op": "upsert", "path": "technik/a.md", "frontmatter": frontmatter(), "body": ["x"]})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json["details"], ["operations[0]: body must be a string"])
+        self.mock_rebuild.assert_not_called()
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.app.get('/api/content/technik/a.md').headers["ETag"]
+        response = self.batch(
+            {"op": "upsert", "path": "technik/a.md", "frontmatter": frontmatter(), "if_match": etag},
+            {"op": "delete", "path": "technik/b.md", "if_match": '"stale"'})
+        self.assertEqual(response.status_code, 412)
+        self.assertIn("status: seedling", self.read("technik/a.md"))
+        self.assertTrue((self.content_root / "technik/b.md").exists())
+
+
+class TestJobs(ContentApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = Path(self.test_dir) / "build-report.json"
+        self.patchers = [
+            patch('server._jobs', server.JobHistory(Path(self.test_dir) / "jobs", keep=2)),
+            patch('server.BUILD_REPORT', self.report),
+            patch('server.subprocess.run', self.fake_build),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.returncode = 0
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        super().tearDown()
+
+    def fake_build(self, cmd, **kwargs):
+        self.report.write_text(json.dumps({"steps": {
+            "filter": {"seconds": 0.4},
+            "hugo:private": {"seconds": 3.2},
+            "hugo:public": {"seconds": 0.0, "cache": "hit"},
+            "check:link-check": {"skipped": True},
+            "check:leak-check": {"seconds": 0.0, "skipped": True, "cache": "hit"},
+        }}), encoding="utf-8")
+        return subprocess.CompletedProcess(cmd, self.returncode, stdout="[build] done\n")
+
+    def test_builds_are_recorded_with_phases_and_logs(self):
+        self.assertTrue(server._run_build({"private"}, ["PUT /api/content/technik/a.md"]))
+        jobs = self.app.get('/api/content/_jobs').json["jobs"]
+        self.assertEqual(len(jobs), 1)
+        job = jobs[0]
+        self.assertEqual(job["trigger"], ["PUT /api/content/technik/a.md"])
+        self.assertEqual(job["audiences"], ["private"])
+        self.assertEqual(job["phases"], {"filter": 0.4, "hugo:private": 3.2})
+        self.assertEqual(self.app.get(f'/api/content/_jobs/{job["id"]}').json["result"], "ok")
+        self.assertEqual(self.app.get(f'/api/content/_jobs/{job["id"]}/log').data, b"[build] done\n")
+        self.assertEqual(self.app.get('/api/content/_jobs/unbekannt/log').status_code, 404)
+
+    def test_history_is_rotated(self):
+        for _ in range(3):
+            server._run_build(None)
+        jobs = self.app.get('/api/content/_jobs').json["jobs"]
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(len(list((Path(self.test_dir) / "jobs").glob("*.log"))), 2)
+
+    def test_metrics(self):
+        server._run_build(None)
+        self.returncode = 1
+        server._run_build(None)
+        text = self.app.get('/metrics').data.decode()
+        self.assertIn('mygarden_rebuilds_total{result="ok"} 1', text)
+        self.assertIn('mygarden_rebuilds_total{result="failed"} 1', text)
+        self.assertIn('mygarden_build_phase_duration_seconds_bucket{phase="hugo:private",le="5"} 2', text)
+        self.assertIn('mygarden_build_phase_duration_seconds_count{phase="filter"} 2', text)
+        self.assertIn("mygarden_rebuild_duration_seconds_count 2", text)
+        self.assertNotIn('phase="hugo:public"', text)
+        self.assertNotIn('phase="check:leak-check"', text)
+
+
+class TestStreamingUploads(ContentApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.avatar_patcher = patch('server.AVATAR_DIR', Path(self.test_dir) / "avatars")
+        self.avatar_patcher.start()
+        self.limit_patcher = patch('server.UPLOAD_MAX_SIZE', 1000)
+        self.limit_patcher.start()
+
+    def tearDown(self):
+        self.avatar_patcher.stop()
+        self.limit_patcher.stop()
+        super().tearDown()
+
+    def upload(self, payload):
+        return self.app.post('/api/content/image', content_type='multipart/form-data', data={
+            'page_path': 'technik/bundle/index.md',
+            'image_name': 'bild.jpg',
+            'image': (BytesIO(payload), 'bild.jpg'),
+        })
+
+    def test_image_within_limit_is_stored(self):
+        response = self.upload(b"x" * 1000)
+        self.assertEqual(response.status_code, 200)
+        target = self.content_root / "technik" / "bundle" / "bild.jpg"
+        self.assertEqual(target.read_bytes(), b"x" * 1000)
+        self.assertEqual([p.name for p in target.parent.iterdir()], ["bild.jpg"])
+
+    def test_oversized_image_is_rejected_without_leftovers(self):
+        target = self.content_root / "technik" / "bundle" / "bild.jpg"
+        target.parent.mkdir(parents=True)
+        target.write_bytes(b"old")
+        response = self.upload(b"x" * 1001)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(target.read_bytes(), b"old")
+        self.assertEqual([p.name for p in target.parent.iterdir()], ["bild.jpg"])
+        self.mock_rebuild.assert_not_called()
+
+    def test_avatar_limit(self):
+        with patch('server.AVATAR_MAX_SIZE', 10):
+            ok = self.app.put('/api/content/_avatar', data=b"y" * 10, content_type='image/jpeg')
+            too_big = self.app.put('/api/content/_avatar', data=b"z" * 11, content_type='image/jpeg')
+            empty = self.app.put('/api/content/_avatar', data=b"", content_type='image/jpeg')
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(too_big.status_code, 413)
+        self.assertEqual(empty.status_code, 400)
+        self.assertEqual((Path(self.test_dir) / "avatars" / "admin.jpg").read_bytes(), b"y" * 10)
+
+
+class TestContentListing(ContentApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_page("technik/docker.md", visibility="public")
+        self.write_page("technik/geheim.md", status="seedling", visibility="private")
+        (self.content_root / "reisen").mkdir()
+        (self.content_root / "reisen" / "hamburg.md").write_text(
+            '---\ntitle: "Hamburg"\nsegment: reisen\nstatus: tree\nvisibility: public\n'
+            'date: 2026-03-01\ntags: ["reisen", "hafen"]\n---\n\nDer Hafen bei Nacht.\n',
+            encoding="utf-8")
+
+    def paths(self, query=""):
+        response = self.app.get('/api/content' + query)
+        self.assertEqual(response.status_code, 200)
+        return [item["path"] for item in response.json["items"]]
+
+    def test_filters(self):
+        self.assertEqual(self.paths("?segment=reisen"), ["reisen/hamburg.md"])
+        self.assertEqual(self.paths("?visibility=private"), ["technik/geheim.md"])
+        self.assertEqual(self.paths("?tag=hafen"), ["reisen/hamburg.md"])
+        self.assertEqual(self.paths("?date_from=2026-03-01"), ["reisen/hamburg.md"])
+
+    def test_full_text_search_matches_body_and_prefixes(self):
+        self.assertEqual(self.paths("?q=hafen+nacht"), ["reisen/hamburg.md"])
+        self.assertEqual(self.paths("?q=ham"), ["reisen/hamburg.md"])
+        self.assertEqual(self.paths("?q=nichtvorhanden"), [])
+
+    def test_query_of_one_character_tokens_does_not_filter(self):
+        self.assertEqual(self.paths("?q=a+b&sort=path"), self.paths("?sort=path"))
+        self.assertEqual(self.paths("?q=x+hafen"), ["reisen/hamburg.md"])
+
+    def test_pagination(self):
+        response = self.app.get('/api/content?sort=path&limit=2&offset=1')
+        self.assertEqual(response.json["total"], 3)
+        self.assertEqual([i["path"] for i in response.json["items"]],
+                         ["technik/docker.md", "technik/geheim.md"])
+        self.assertEqual(self.app.get('/api/content?limit=0').status_code, 400)
+        self.assertEqual(self.app.get('/api/content?sort=size').status_code, 400)
+
+    def test_index_follows_writes(self):
+        self.assertEqual(self.paths("?q=umzug"), [])
+        self.app.put('/api/content/technik/docker.md',
+                     json={"frontmatter": frontmatter(), "body": "Umzug auf den NAS"})
+        self.assertEqual(self.paths("?q=umzug"), ["technik/docker.md"])
+        self.app.delete('/api/content/technik/docker.md')
+        self.assertEqual(self.paths("?q=umzug"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import shutil
+import tempfile
+import threading
+import time
+import sys
+import os
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "build"))
+from rebuild import BuildCoordinator, RebuildScheduler
+
+
+class TestRebuildScheduler(unittest.TestCase):
+    def wait_idle(self, scheduler, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = scheduler.status()
+            if not status["pending"] and not status["rebuilding"]:
+                return status
+            time.sleep(0.01)
+        self.fail("scheduler did not become idle")
+
+    def test_burst_is_coalesced_into_one_build(self):
+        runs = []
+        scheduler = RebuildScheduler(lambda audiences: runs.append(audiences) or True, debounce=0.1)
+        for _ in range(5):
+            scheduler.request()
+        self.assertTrue(scheduler.status()["pending"])
+        status = self.wait_idle(scheduler)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(status["last_result"], "ok")
+        self.assertIsNotNone(status["last_duration"])
+
+    def test_request_during_build_schedules_one_follow_up(self):
+        started = threading.Event()
+        release = threading.Event()
+        runs = []
+
+        def run(audiences):
+            runs.append(audiences)
+            started.set()
+            release.wait(5)
+            return True
+
+        scheduler = RebuildScheduler(run, debounce=0.05)
+        scheduler.request()
+        self.assertTrue(started.wait(5))
+        # Edits saved while the build runs must not be lost ...
+        scheduler.request()
+        scheduler.request()
+        self.assertTrue(scheduler.status()["rebuilding"])
+        self.assertTrue(scheduler.status()["pending"])
+        release.set()
+        self.wait_idle(scheduler)
+        # ... but they share a single follow-up build.
+        self.assertEqual(len(runs), 2)
+
+    def test_coalesced_requests_build_union_of_audiences(self):
+        runs = []
+        scheduler = RebuildScheduler(lambda audiences: runs.append(audiences) or True, debounce=0.1)
+        scheduler.request(["private"])
+        scheduler.request(["public", "private"])
+        self.assertEqual(scheduler.status()["pending_audiences"], ["private", "public"])
+        self.wait_idle(scheduler)
+        self.assertEqual(runs, [{"private", "public"}])
+
+        scheduler.request(["private"])
+        scheduler.request()
+        self.wait_idle(scheduler)
+        self.assertEqual(runs[-1], None)
+
+    def test_failed_build_is_reported(self):
+        scheduler = RebuildScheduler(lambda audiences: False, debounce=0.01)
+        scheduler.request()
+        self.assertEqual(self.wait_idle(scheduler)["last_result"], "failed")
+
+
+class TestBuildCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = Path(tempfile.mkdtemp()) / "rebuild"
+        self.runs = []
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir.parent)
+
+    def coordinator(self, run=None):
+        def record(audiences, triggers):
+            self.runs.append(audiences)
+            self.triggers = triggers
+            return True
+
+        return BuildCoordinator(self.state_dir, run or record)
+
+    def test_workers_share_one_spool(self):
+        worker_a, worker_b = self.coordinator(), self.coordinator()
+        worker_a.submit(["private"], "PUT /api/content/a.md")
+        worker_b.submit(["public"], "DELETE /api/content/b.md")
+        self.assertEqual(worker_a.status()["pending_audiences"], ["private", "public"])
+        self.assertTrue(worker_b.run_pending())
+        # The other worker's scheduler fires too, but finds nothing left to build.
+        self.assertTrue(worker_a.run_pending())
+        self.assertEqual(self.runs, [{"private", "public"}])
+        self.assertEqual(self.triggers, ["PUT /api/content/a.md", "DELETE /api/content/b.md"])
+        status = worker_a.status()
+        self.assertFalse(status["pending"])
+        self.assertEqual(status["last_result"], "ok")
+
+    def test_waiting_worker_builds_requests_made_during_a_build(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(audiences, triggers):
+            self.runs.append(audiences)
+            started.set()
+            release.wait(5)
+            return True
+
+        builder, other = self.coordinator(slow), self.coordinator()
+        builder.submit(["private"])
+        thread = threading.Thread(target=builder.run_pending)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        self.assertTrue(other.status()["rebuilding"])
+        other.submit(None)
+        follow_up = threading.Thread(target=other.run_pending)
+        follow_up.start()
+        release.set()
+        thread.join(5)
+        follow_up.join(5)
+        self.assertEqual(self.runs, [{"private"}, None])
+        self.assertFalse(other.status()["rebuilding"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import shutil
+import tempfile
+import threading
+import time
+import sys
+import os
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "build"))
+from content_cache import ContentCache
+from watcher import InotifyWatcher, PollingWatcher
+
+PAGE = '---\ntitle: "{title}"\n---\n\n{body}\n'
+
+
+class WatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "technik").mkdir()
+        self.changes = []
+        self.changed = threading.Event()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def on_change(self, rel):
+        self.changes.append(rel)
+        self.changed.set()
+
+    def write(self, rel, title="Notiz", body="Text."):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(PAGE.format(title=title, body=body), encoding="utf-8")
+        return path
+
+    def wait_for(self, rel, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if rel in self.changes:
+                return
+            self.changed.wait(0.05)
+            self.changed.clear()
+        self.fail(f"no change reported for {rel}: {self.changes}")
+
+
+class TestContentCache(WatcherTestCase):
+    def test_hot_reads_do_not_touch_disk(self):
+        path = self.write("technik/a.md", title="Alt")
+        cache = ContentCache(self.root)
+        self.assertEqual(cache.get("technik/a.md")[0]["title"], "Alt")
+        path.unlink()
+        self.assertEqual(cache.get("technik/a.md")[0]["title"], "Alt")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.invalidate("technik/a.md")
+        self.assertIsNone(cache.get("technik/a.md"))
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        for name in ("a", "b", "c"):
+            self.write(f"technik/{name}.md", body="x" * 100)
+        size = len((self.root / "technik/a.md").read_bytes())
+        cache = ContentCache(self.root, max_bytes=2 * size)
+        cache.get("technik/a.md")
+        cache.get("technik/b.md")
+        cache.get("technik/a.md")
+        cache.get("technik/c.md")
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["bytes"], 2 * size)
+        misses = cache.misses
+        cache.get("technik/a.md")
+        self.assertEqual(cache.misses, misses)
+        cache.get("technik/b.md")
+        self.assertEqual(cache.misses, misses + 1)
+
+
+class TestPollingWatcher(WatcherTestCase):
+    def test_reports_changed_added_and_removed_pages(self):
+        self.write("technik/a.md")
+        gone = self.write("technik/b.md")
+        watcher = PollingWatcher(self.root, self.on_change)
+        watcher._snapshot = watcher.scan()
+        self.write("technik/a.md", body="Neuer, längerer Text.")
+        self.write("reisen/neu.md")
+        gone.unlink()
+        (self.root / "technik" / "bild.jpg").write_bytes(b"x")
+        watcher.check()
+        self.assertEqual(self.changes, ["reisen/neu.md", "technik/a.md", "technik/b.md"])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestInotifyWatcher(WatcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.watcher = InotifyWatcher(self.root, self.on_change).start()
+
+    def tearDown(self):
+        self.watcher.stop()
+        super().tearDown()
+
+    def test_reports_writes_and_deletes(self):
+        path = self.write("technik/a.md")
+        self.wait_for("technik/a.md")
+        self.changes.clear()
+        path.unlink()
+        self.wait_for("technik/a.md")
+
+    def test_atomic_rename_is_reported(self):
+        tmp = self.root / "technik" / ".a.md.tmp"
+        tmp.write_text(PAGE.format(title="x", body="y"), encoding="utf-8")
+        os.replace(tmp, self.root / "technik" / "a.md")
+        self.wait_for("technik/a.md")
+        self.assertNotIn("technik/.a.md.tmp", self.changes)
+
+    def test_new_directories_are_watched(self):
+        (self.root / "reisen").mkdir()
+        # Give the watcher a moment to add the new directory.
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not any(
+                p.name == "reisen" for p in self.watcher._dirs.values()):
+            time.sleep(0.01)
+        self.write("reisen/neu.md")
+        self.wait_for("reisen/neu.md")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+"""Watch the content tree for changes made outside the API.
+
+Uses Linux inotify (via ctypes, no extra dependency) and falls back to
+polling mtimes when inotify is unavailable, e.g. on macOS or when the
+watch limit is exhausted.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable
+
+# Called with the changed page path relative to the root, or None when the
+# change cannot be pinned to single pages (queue overflow, directory moves).
+OnChange = Callable[[str | None], None]
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def _is_page(name: str) -> bool:
+    return name.endswith(".md") and not name.startswith(".")
+
+
+class PollingWatcher:
+    """Detect changed, added and removed pages by comparing (mtime, size)."""
+
+    mode = "poll"
+
+    def __init__(self, root: Path, on_change: OnChange, interval: float = 2.0):
+        self.root = root
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._snapshot: dict[str, tuple[int, int]] = {}
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if _is_page(name):
+                    full = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(full)
+                    except FileNotFoundError:
+                        continue
+                    rel = Path(full).relative_to(self.root).as_posix()
+                    snapshot[rel] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def check(self) -> None:
+        """Compare against the previous scan and report every difference."""
+        current = self.scan()
+        previous, self._snapshot = self._snapshot, current
+        for rel in sorted(previous.keys() | current.keys()):
+            if previous.get(rel) != current.get(rel):
+                self.on_change(rel)
+
+    def start(self) -> "PollingWatcher":
+        self._snapshot = self.scan()
+        self._thread = threading.Thread(target=self._loop, name="content-poll", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[content-api] content poll failed: {e}")
+
+
+class InotifyWatcher:
+    """Recursive inotify watch; new subdirectories are added as they appear."""
+
+    mode = "inotify"
+
+    def __init__(self, root: Path, on_change: OnChange):
+        self.root = root
+        self.on_change = on_change
+        self._libc = _load_libc()
+        self._fd = -1
+        self._dirs: dict[int, Path] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "InotifyWatcher":
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            os.close(fd)
+            self._fd = -1
+            raise
+        self._thread = threading.Thread(target=self._loop, name="content-inotify", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed: {os.strerror(err)}", str(path))
+        self._dirs[wd] = path
+
+    def _add_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            self._add_watch(Path(dirpath))
+
+    def _remove_tree(self, top: Path) -> None:
+        for wd, path in list(self._dirs.items()):
+            if path == top or top in path.parents:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def _loop(self) -> None:
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(data)
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _dispatch(self, data: bytes) -> None:
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            pos += length
+            try:
+                self._handle(wd, mask, name)
+            except Exception as e:
+                print(f"[content-api] content watch event failed: {e}")
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self.on_change(None)
+            return
+        if mask & IN_IGNORED:
+            self._dirs.pop(wd, None)
+            return
+        directory = self._dirs.get(wd)
+        if directory is None or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            return
+        path = directory / name
+        if mask & IN_ISDIR:
+            if name.startswith("."):
+                return
+            if mask & IN_MOVED_FROM:
+                self._remove_tree(path)
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+            # A moved or new directory can carry any number of pages.
+            if mask & (IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE):
+                self.on_change(None)
+            elif mask & IN_CREATE:
+                # Pages written before the watch existed would be missed.
+                for sub in path.rglob("*.md"):
+                    self.on_change(sub.relative_to(self.root).as_posix())
+            return
+        if _is_page(name):
+            self.on_change(path.relative_to(self.root).as_posix())
+
+
+def _load_libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "inotify is not available")
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def start_watcher(root: Path, on_change: OnChange, mode: str = "auto",
+                  interval: float = 2.0) -> InotifyWatcher | PollingWatcher | None:
+    """Start watching root; mode is auto, inotify, poll or off."""
+    if mode == "off":
+        return None
+    if mode in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(root, on_change).start()
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            print(f"[content-api] inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(root, on_change, interval).start()
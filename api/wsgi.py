@@ -0,0 +1,12 @@
+"""WSGI entry point for running the content API under gunicorn.
+
+    gunicorn -c api/gunicorn.conf.py wsgi:app
+
+Each worker process gets its own listing index, page cache and content
+watcher; rebuilds are coordinated across workers by server._coordinator.
+"""
+from server import app, startup
+
+startup()
+
+__all__ = ["app"]
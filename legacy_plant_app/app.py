@@ -1,12 +1,12 @@
 from flask import Flask, render_template, request, jsonify
-from garden import get_garden_data, update_plant_image
+from garden import atomic_writer, get_garden_data, update_plant_image
 import os
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
 
-# Konfiguration für Uploads
-UPLOAD_FOLDER = 'static/uploads'
+# Konfiguration für Uploads (im static-Ordner der App, den Flask unter /static ausliefert)
+UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -45,7 +45,9 @@ def upload_file(plant_id):
         save_name = f"{plant_id}_{filename}"
         
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], save_name)
-        file.save(filepath)
+        # Atomar ersetzen, damit nie ein halb geschriebenes Bild ausgeliefert wird
+        with atomic_writer(filepath, fsync=True) as out:
+            file.save(out)
         
         # Pfad für das Frontend (relativ zum Web-Root)
         web_path = f"/static/uploads/{save_name}"
@@ -1,7 +1,15 @@
 import json
 import os
+import sys
+from pathlib import Path
 
-DATA_FILE = 'plants.json'
+# Gemeinsame Schreib-Hilfen (atomar ersetzen, fsync, Sperren) aus scripts/build;
+# app.py importiert atomic_writer von hier.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts' / 'build'))
+from atomicio import atomic_write, atomic_writer, path_lock  # noqa: E402,F401
+
+# Neben dem Modul statt relativ zum Arbeitsverzeichnis (pytest läuft auch vom Repo-Root).
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plants.json')
 
 def load_plants():
     """Lädt die Pflanzenliste aus der JSON-Datei."""
@@ -18,10 +26,10 @@ def load_plants():
         return []
 
 def save_plants(plants):
-    """Speichert die Pflanzenliste in die JSON-Datei."""
+    """Speichert die Pflanzenliste atomar (temporäre Datei + Umbenennen) in die JSON-Datei."""
     try:
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(plants, f, indent=4, ensure_ascii=False)
+        with path_lock(DATA_FILE):
+            atomic_write(DATA_FILE, json.dumps(plants, indent=4, ensure_ascii=False), fsync=True)
     except Exception as e:
         print(f"Fehler beim Speichern der Pflanzen: {e}")
 
@@ -35,14 +43,16 @@ def update_plant_image(plant_id, filename):
     """
     Aktualisiert den Bildpfad einer Pflanze.
     """
-    plants = load_plants()
-    updated = False
-    for plant in plants:
-        if plant.get('id') == plant_id:
-            plant['image'] = filename
-            updated = True
-            break
-    
-    if updated:
-        save_plants(plants)
+    # Lesen und Schreiben unter einer Sperre, damit parallele Uploads sich nicht überschreiben.
+    with path_lock(DATA_FILE):
+        plants = load_plants()
+        updated = False
+        for plant in plants:
+            if plant.get('id') == plant_id:
+                plant['image'] = filename
+                updated = True
+                break
+
+        if updated:
+            save_plants(plants)
     return updated
@@ -82,3 +82,23 @@ def test_update_plant_image_invalid_id(mock_garden_data):
     data = garden.get_garden_data()
     # Prüfen wir einfach das erste Element, ob es noch das alte Bild hat
     assert data[0]['image'] == "/static/images/monstera.jpg"
+
+def test_save_plants_replaces_file_atomically(mock_garden_data):
+    """save_plants ersetzt die Datei per Umbenennen und hinterlässt keine Temp-Dateien."""
+    os.chmod(mock_garden_data, 0o640)
+    inode = os.stat(mock_garden_data).st_ino
+    garden.save_plants(TEST_PLANTS[:1])
+
+    with open(mock_garden_data, encoding='utf-8') as f:
+        assert json.load(f) == TEST_PLANTS[:1]
+    assert os.stat(mock_garden_data).st_ino != inode
+    assert os.stat(mock_garden_data).st_mode & 0o777 == 0o640
+    assert os.listdir(mock_garden_data.parent) == [mock_garden_data.name]
+
+def test_update_plant_image_is_written_atomically(mock_garden_data):
+    """update_plant_image schreibt unter der Sperre und hinterlässt keine Temp-Dateien."""
+    assert garden.update_plant_image(2, "/static/uploads/2_neu.jpg") is True
+
+    with open(mock_garden_data, encoding='utf-8') as f:
+        assert json.load(f)[1]['image'] == "/static/uploads/2_neu.jpg"
+    assert os.listdir(mock_garden_data.parent) == [mock_garden_data.name]
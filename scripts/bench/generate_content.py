@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Generate a synthetic content tree (and matching public HTML) for benchmarks.
+
+Layout written below --out:
+
+  site/content/   markdown pages with a realistic frontmatter mix: segments,
+                  notes/articles/trips, dossiers with timeline entries,
+                  public/group/private visibility, all statuses, tags and
+                  leaf bundles with small images
+  out/public/     one index.html per page the public audience may see, with
+                  internal links, standing in for Hugo's output so the
+                  leak and link checks have something to scan
+
+The result only depends on --pages and --seed.
+"""
+from __future__ import annotations
+import argparse
+from pathlib import Path
+import random
+import shutil
+import struct
+import sys
+from typing import Dict, List, Tuple
+import zlib
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'build'))
+from audiences import should_include  # noqa: E402
+from content_index import output_url  # noqa: E402
+
+SEGMENTS = ('politik', 'technik', 'reisen')
+GROUPS = ('friends', 'family')
+TAGS = ('notiz', 'linux', 'docker', 'nas', 'hugo', 'python', 'iran', 'wahl', 'europa',
+        'hamburg', 'roma', 'bahn', 'wandern', 'essen', 'backup', 'netzwerk', 'timeline')
+WORDS = ('garten', 'notiz', 'server', 'reise', 'hafen', 'einordnung', 'quelle', 'frage',
+         'docker', 'compose', 'build', 'seite', 'stadt', 'abend', 'zug', 'politik', 'lage',
+         'dossier', 'entwicklung', 'backup', 'netz', 'datei', 'bild', 'weg', 'morgen')
+
+# Weighted choices: (value, weight)
+VISIBILITY = (('public', 60), ('group', 15), ('private', 25))
+STATUS = (('seedling', 20), ('plant', 50), ('tree', 30))
+
+Page = Tuple[Path, Dict]
+
+
+def pick(rng: random.Random, weighted: Tuple[Tuple[str, int], ...]) -> str:
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def tiny_png(rng: random.Random, size: int = 16) -> bytes:
+    """A valid, random-noise RGB PNG of size x size pixels."""
+    raw = b''.join(b'\x00' + rng.randbytes(size * 3) for _ in range(size))
+
+    def chunk(ctype: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + ctype + data
+                + struct.pack('>I', zlib.crc32(ctype + data) & 0xFFFFFFFF))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+def frontmatter_text(fm: Dict) -> str:
+    lines = ['---']
+    for key, value in fm.items():
+        if isinstance(value, list):
+            if key == 'tags':
+                lines.append(f'{key}: [' + ', '.join(f'"{v}"' for v in value) + ']')
+            else:
+                lines.append(f'{key}:')
+                lines.extend(f'  - {v}' for v in value)
+        elif key == 'title':
+            lines.append(f'{key}: "{value}"')
+        else:
+            lines.append(f'{key}: {value}')
+    lines.append('---')
+    return '\n'.join(lines) + '\n'
+
+
+def body_text(rng: random.Random, links: List[str]) -> str:
+    paragraphs = []
+    for _ in range(rng.randint(2, 6)):
+        words = rng.choices(WORDS, k=rng.randint(30, 120))
+        paragraphs.append(' '.join(words).capitalize() + '.')
+    for url in links:
+        paragraphs.append(f'Siehe auch [{rng.choice(WORDS)}]({url}).')
+    return '\n\n'.join(paragraphs) + '\n'
+
+
+def plan_pages(n: int, rng: random.Random) -> List[Page]:
+    """Decide path and frontmatter of n pages (section indexes included)."""
+    pages: List[Page] = [(Path('_index.md'), {'title': 'Garten', 'status': 'tree', 'visibility': 'public'})]
+    for segment in SEGMENTS:
+        pages.append((Path(segment) / '_index.md',
+                      {'title': segment.title(), 'status': 'tree', 'visibility': 'public'}))
+    pages.append((Path('politik/timeline/_index.md'),
+                  {'title': 'Timeline', 'status': 'tree', 'visibility': 'public'}))
+
+    dossiers: List[str] = []
+    i = 0
+    while len(pages) < n:
+        i += 1
+        segment = rng.choice(SEGMENTS)
+        visibility = pick(rng, VISIBILITY)
+        fm: Dict = {'title': f'{segment.title()} {i}'}
+        roll = rng.random()
+        if segment == 'politik' and (roll < 0.05 or not dossiers):
+            key = f'dossier-{len(dossiers) + 1}'
+            dossiers.append(key)
+            fm.update(type='dossier', dossier_key=key)
+            rel = Path(segment) / f'{key}.md'
+        elif segment == 'politik' and roll < 0.45:
+            dossier = rng.choice(dossiers)
+            fm.update(type='timeline-entry', dossier=dossier)
+            rel = Path('politik/timeline') / f'{dossier}-{i}.md'
+        elif (segment == 'reisen' and roll < 0.3) or roll < 0.08:
+            fm.update(type='trip' if segment == 'reisen' else 'article')
+            rel = Path(segment) / f'bundle-{i}' / 'index.md'
+        else:
+            fm.update(type='article' if roll < 0.6 else 'note')
+            rel = Path(segment) / f'seite-{i}.md'
+
+        date = f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        fm.update(segment=segment, status=pick(rng, STATUS), visibility=visibility)
+        if visibility == 'group':
+            fm['groups'] = rng.sample(GROUPS, rng.randint(1, 2))
+        fm['date'] = date
+        if fm['type'] == 'timeline-entry':
+            fm['event_date'] = date
+        fm['tags'] = rng.sample(TAGS, rng.randint(1, 4))
+        pages.append((rel, fm))
+    return pages
+
+
+def write_tree(out: Path, pages: List[Page], rng: random.Random) -> Dict[str, int]:
+    content = out / 'site' / 'content'
+    urls = [output_url(rel) for rel, _ in pages]
+    stats = {'pages': 0, 'bundles': 0, 'images': 0, 'public_html': 0}
+    public: List[Tuple[Page, str]] = []
+
+    for (rel, fm), url in zip(pages, urls):
+        path = content / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        links = [] if rel.name == '_index.md' else rng.sample(urls, min(3, len(urls)))
+        path.write_text(frontmatter_text(fm) + '\n' + body_text(rng, links), encoding='utf-8')
+        stats['pages'] += 1
+        if rel.name == 'index.md':
+            stats['bundles'] += 1
+            for k in range(rng.randint(1, 3)):
+                (path.parent / f'bild-{k}.png').write_bytes(tiny_png(rng))
+                stats['images'] += 1
+        if should_include(fm, 'public', None):
+            public.append(((rel, fm), url))
+
+    # Stand-in for Hugo's public output: only allowed pages, linking each other.
+    public_urls = [url for _, url in public]
+    html_root = out / 'out' / 'public'
+    for (rel, fm), url in public:
+        links = rng.sample(public_urls, min(5, len(public_urls)))
+        anchors = ''.join(f'<li><a href="{u}">{u}</a></li>' for u in links)
+        html = (f'<!doctype html><html><head><title>{fm["title"]}</title>'
+                f'<link rel="stylesheet" href="/css/main.css"></head><body>'
+                f'<nav><a href="/">Home</a></nav><h1>{fm["title"]}</h1><ul>{anchors}</ul>'
+                f'</body></html>')
+        target = html_root / url.strip('/') / 'index.html'
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(html, encoding='utf-8')
+        stats['public_html'] += 1
+    (html_root / 'css').mkdir(parents=True, exist_ok=True)
+    (html_root / 'css' / 'main.css').write_text('body{}\n', encoding='utf-8')
+    return stats
+
+
+def generate(out: Path, n: int, seed: int = 1) -> Dict[str, int]:
+    """(Re)create the synthetic site below out; returns what was written."""
+    for sub in ('site', 'out'):
+        shutil.rmtree(out / sub, ignore_errors=True)
+    rng = random.Random(seed)
+    return write_tree(out, plan_pages(n, rng), rng)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--pages', type=int, default=1000)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--out', required=True, help='workspace dir (site/ and out/ are replaced)')
+    args = ap.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    stats = generate(out, args.pages, args.seed)
+    print(f"[bench] generated {stats['pages']} page(s), {stats['bundles']} bundle(s), "
+          f"{stats['images']} image(s), {stats['public_html']} public HTML page(s) in {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Time the build tools and the content API on synthetic content trees.
+
+For every --sizes entry a tree is generated with generate_content.py below
+--workspace and the following are timed (best of --repeat runs):
+
+  filter_site.cold     all audiences into an empty staging root, fresh index
+  filter_site.warm     the same again (index and staging trees up to date)
+  leak_check           public output against the source (--full)
+  frontmatter_lint     the whole content tree (empty result cache)
+  link_check           the public output (--full)
+  *.unchanged          the checks again, with nothing changed since the last run
+  api.*                content API requests via Flask's test client (list with
+                       a cold/warm search index, full-text query, 100 GETs with
+                       a cold/hot page cache, 20 PUTs); skipped without Flask
+
+Tool phases (from --timings) are reported as '<name>/<phase>'. Results are
+compared against --baseline; a value counts as regression when it is
+--tolerance times slower and at least --min-seconds slower. --save-baseline
+stores the current run as the new baseline; the exit status is 1 when
+anything regressed. Timings are machine specific, so the baseline lives in
+.cache/ and is not committed.
+
+  python3 scripts/bench/run_bench.py --sizes 1000,10000
+  python3 scripts/bench/run_bench.py --sizes 100000 --repeat 1
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from generate_content import generate  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BUILD = REPO_ROOT / 'scripts' / 'build'
+CHECKS = REPO_ROOT / 'scripts' / 'checks'
+API = REPO_ROOT / 'api'
+AUDIENCES = 'public,group:friends,group:family,private'
+
+Results = Dict[str, float]
+
+
+def run_tool(name: str, cmd: List[str], cwd: Path, env: Dict[str, str], results: Results) -> None:
+    """Run cmd once, add its wall time and --timings phases to results."""
+    timings = cwd / 'timings' / f'{name}.json'
+    timings.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    proc = subprocess.run(cmd + ['--timings', str(timings)], cwd=cwd, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - started
+    # The checks may legitimately report findings; only a crash is fatal.
+    if proc.returncode != 0 and 'Traceback' in proc.stderr:
+        raise RuntimeError(f'{name} crashed:\n{proc.stderr}')
+    results[name] = seconds
+    try:
+        phases = json.loads(timings.read_text(encoding='utf-8')).get('phases', {})
+    except (FileNotFoundError, ValueError):
+        phases = {}
+    for phase, value in phases.items():
+        results[f'{name}/{phase}'] = value
+
+
+def bench_tools(ws: Path) -> Results:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    index = ws / 'content-index.sqlite3'
+    results: Results = {}
+
+    for path in (index, ws / 'staging'):
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+    stage = [sys.executable, str(BUILD / 'filter_site.py'), '--source', 'site',
+             '--audiences', AUDIENCES, '--dest-root', 'staging', '--index', str(index)]
+    run_tool('filter_site.cold', stage, ws, env, results)
+    run_tool('filter_site.warm', stage, ws, env, results)
+
+    # The checks remember the previous run; the second run shows the no-change cost.
+    env['CHECK_MANIFEST_DIR'] = str(ws / 'manifests')
+    leak = [sys.executable, str(BUILD / 'leak_check.py'), '--source', 'site/content',
+            '--out', 'out', '--index', str(index)]
+    run_tool('leak_check', leak + ['--full'], ws, env, results)
+    run_tool('leak_check.unchanged', leak, ws, env, results)
+    lint = [sys.executable, str(CHECKS / 'frontmatter-lint.py'), '--index', str(index),
+            '--cache', str(ws / 'manifests' / 'frontmatter-lint.json')]
+    (ws / 'manifests' / 'frontmatter-lint.json').unlink(missing_ok=True)
+    run_tool('frontmatter_lint', lint, ws, env, results)
+    run_tool('frontmatter_lint.unchanged', lint, ws, env, results)
+    link = [sys.executable, str(CHECKS / 'link-check.py'), '--out', 'out']
+    run_tool('link_check', link + ['--full'], ws, env, results)
+    run_tool('link_check.unchanged', link, ws, env, results)
+    return results
+
+
+def _timed(results: Results, name: str, fn: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    fn()
+    results[name] = time.perf_counter() - started
+
+
+def bench_api(ws: Path) -> Optional[Results]:
+    try:
+        import flask  # noqa: F401
+    except ImportError:
+        return None
+    sys.path.insert(0, str(API))
+    from unittest.mock import patch
+    import server
+
+    content = ws / 'site' / 'content'
+    # Section indexes lack the fields the API requires of pages, so PUTs would get a 422.
+    pages = sorted(p.relative_to(content).as_posix() for p in content.rglob('*.md') if p.name != '_index.md')
+    rng = random.Random(1)
+    sample = rng.sample(pages, min(100, len(pages)))
+    results: Results = {}
+
+    def expect(resp, status: int = 200) -> None:
+        if resp.status_code != status:
+            raise RuntimeError(f'API returned {resp.status_code}: {resp.get_data(as_text=True)[:200]}')
+
+    def get_all() -> None:
+        for rel in sample:
+            expect(client.get(f'/api/content/{rel}'))
+
+    def put_some() -> None:
+        for rel in sample[:20]:
+            page = client.get(f'/api/content/{rel}').get_json()
+            expect(client.put(f'/api/content/{rel}', json={'frontmatter': page['frontmatter'],
+                                                           'body': page['body'] + '\nNachtrag.\n'}))
+
+    with patch('server.CONTENT_ROOT', content), patch('server._trigger_rebuild'):
+        server._search_index = None
+        server._content_cache = None
+        client = server.app.test_client()
+        _timed(results, 'api.list_cold', lambda: expect(client.get('/api/content?limit=50')))
+        _timed(results, 'api.list_warm', lambda: expect(client.get('/api/content?limit=50')))
+        _timed(results, 'api.list_filtered', lambda: expect(
+            client.get('/api/content?segment=politik&visibility=public&sort=title&offset=20&limit=50')))
+        _timed(results, 'api.search', lambda: expect(client.get('/api/content?q=garten+docker&limit=50')))
+        _timed(results, 'api.get_cold_x100', get_all)
+        _timed(results, 'api.get_hot_x100', get_all)
+        _timed(results, 'api.put_x20', put_some)
+        server._search_index = None
+        server._content_cache = None
+    return results
+
+
+def best_of(runs: List[Results]) -> Results:
+    best: Results = {}
+    for run in runs:
+        for name, seconds in run.items():
+            best[name] = min(seconds, best.get(name, seconds))
+    return {name: round(seconds, 4) for name, seconds in sorted(best.items())}
+
+
+def compare(baseline: Results, current: Results, tolerance: float, min_seconds: float) -> List[str]:
+    """Print a comparison table and return the names that regressed."""
+    regressions = []
+    print(f"  {'benchmark':<40} {'seconds':>10} {'baseline':>10} {'ratio':>7}")
+    for name, seconds in current.items():
+        old = baseline.get(name)
+        ratio = f'{seconds / old:.2f}' if old else '-'
+        flag = ''
+        if old is not None and seconds > old * tolerance and seconds - old >= min_seconds:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        old_text = f'{old:.4f}' if old is not None else '-'
+        print(f'  {name:<40} {seconds:>10.4f} {old_text:>10} {ratio:>7}{flag}')
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', default='1000,10000', help='comma separated page counts (e.g. 1000,10000,100000)')
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--repeat', type=int, default=3, help='runs per size; the fastest one counts')
+    ap.add_argument('--workspace', default=str(REPO_ROOT / '.cache' / 'bench'))
+    ap.add_argument('--baseline', default=None, help='default: <workspace>/baseline.json')
+    ap.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    ap.add_argument('--tolerance', type=float, default=1.3, help='slowdown factor that counts as regression')
+    ap.add_argument('--min-seconds', type=float, default=0.05, help='ignore slowdowns smaller than this')
+    ap.add_argument('--no-api', action='store_true', help='skip the content API benchmarks')
+    ap.add_argument('--output', help='also write the results as JSON to this path')
+    args = ap.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    except ValueError:
+        ap.error('--sizes must be comma separated integers')
+    workspace = Path(args.workspace).resolve()
+    baseline_path = Path(args.baseline) if args.baseline else workspace / 'baseline.json'
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        baseline = {}
+
+    report: Dict = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'seed': args.seed,
+        'sizes': {},
+    }
+    regressions: List[str] = []
+    for size in sizes:
+        ws = workspace / f'pages-{size}'
+        runs: List[Results] = []
+        for i in range(max(1, args.repeat)):
+            # Regenerate every run: the API benchmark edits pages.
+            ws.mkdir(parents=True, exist_ok=True)
+            stats = generate(ws, size, args.seed)
+            print(f'[bench] {size} pages, run {i + 1}/{args.repeat} '
+                  f"({stats['bundles']} bundles, {stats['public_html']} public HTML pages)", flush=True)
+            results = bench_tools(ws)
+            if not args.no_api:
+                api = bench_api(ws)
+                if api is None:
+                    if i == 0:
+                        print('[bench] Flask not installed, skipping API benchmarks')
+                else:
+                    results.update(api)
+            runs.append(results)
+        best = best_of(runs)
+        report['sizes'][str(size)] = best
+        print(f'[bench] {size} pages:')
+        regressed = compare(baseline.get('sizes', {}).get(str(size), {}), best,
+                            args.tolerance, args.min_seconds)
+        regressions += [f'{size}:{name}' for name in regressed]
+
+    text = json.dumps(report, indent=2) + '\n'
+    if args.output:
+        Path(args.output).write_text(text, encoding='utf-8')
+    if args.save_baseline:
+        # Keep sizes that were not part of this run.
+        merged = dict(report, sizes={**baseline.get('sizes', {}), **report['sizes']})
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(merged, indent=2) + '\n', encoding='utf-8')
+        print(f'[bench] baseline written to {baseline_path}')
+
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    if not baseline and not args.save_baseline:
+        print('[bench] no baseline yet (use --save-baseline)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,34 @@
+import unittest
+import shutil
+import subprocess
+import tempfile
+import sys
+import os
+
+RUN_BENCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_bench.py")
+
+
+class TestBenchSmoke(unittest.TestCase):
+    """One quick pass over small trees, so a benchmark that crashes is caught."""
+
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_small_sizes_run_through(self):
+        proc = subprocess.run(
+            [sys.executable, RUN_BENCH, "--sizes", "20,200", "--repeat", "1", "--workspace", self.workspace],
+            capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stdout[-2000:] + proc.stderr[-2000:])
+        self.assertIn("[bench] 200 pages:", proc.stdout)
+        try:
+            import flask  # noqa: F401
+        except ImportError:
+            return
+        self.assertIn("api.put_x20", proc.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,12 +15,14 @@ require_docker_access() {
 
 require_docker_access
 
-# Clean up .build directory
-if [ -d ".build" ]; then
+# Staging trees under .build are synced incrementally by filter_site.py, so
+# they are kept between runs. Set CLEAN_BUILD=1 to force a full re-stage.
+if [[ "${CLEAN_BUILD:-0}" == "1" && -d ".build" ]]; then
   echo "Cleaning up .build directory..."
   
-  # Try to fix permissions first
-  chmod -R u+w .build || true
+  # Try to fix permissions first. Only directories: staged files may be
+  # hardlinks to site/content, and removing them needs no write permission.
+  find .build -type d ! -perm -u+w -exec chmod u+w {} + || true
   
   # Try normal remove first
   rm -rf .build || true
@@ -55,74 +57,9 @@ fi
 
 $DC pull hugo
 
-# Best-effort EXIF strip from JPEGs in content (privacy)
-python3 -c "
-import pathlib, sys
-try:
-    from PIL import Image
-    count = 0
-    for jpg in pathlib.Path('site/content').rglob('*.jpg'):
-        img = Image.open(jpg)
-        data = list(img.getdata())
-        clean = Image.new(img.mode, img.size)
-        clean.putdata(data)
-        clean.save(jpg, quality=95)
-        count += 1
-    for jpg in pathlib.Path('site/content').rglob('*.jpeg'):
-        img = Image.open(jpg)
-        data = list(img.getdata())
-        clean = Image.new(img.mode, img.size)
-        clean.putdata(data)
-        clean.save(jpg, quality=95)
-        count += 1
-    print(f'[INFO] Stripped EXIF from {count} JPEG(s)')
-except ImportError:
-    print('[WARN] Pillow not available — skipping EXIF strip', file=sys.stderr)
-except Exception as e:
-    print(f'[WARN] EXIF strip failed: {e}', file=sys.stderr)
-" || true
+# Strip image metadata (privacy), stage, build all audiences concurrently
+# (BUILD_WORKERS, default 2) and run the checks; per-step timings go to
+# .build/build-report.json.
+DC="${DC}" python3 scripts/build/build_all.py
 
-build_audience() {
-  local audience=$1
-  local group=${2:-}
-  local srcdir=".build/site-${audience}${group:+-${group}}"
-  local outdir="out/${audience}"
-
-  local baseurl="https://karimi.me/"
-
-  if [[ "${audience}" == "group" ]]; then
-    outdir="out/groups/${group}"
-    baseurl="https://karimi.me/g/${group}/"
-  elif [[ "${audience}" == "private" ]]; then
-    baseurl="https://karimi.me/private/"
-  fi
-
-  mkdir -p "${outdir}" "${srcdir}"
-
-  python3 scripts/build/filter_site.py \
-    --source site \
-    --dest "${srcdir}" \
-    --audience "${audience}" \
-    --group "${group}"
-
-  $DC run --rm -T --user "$(id -u):$(id -g)" \
-    hugo \
-    --source "/workspace/${srcdir}" \
-    --destination "/workspace/${outdir}" \
-    --baseURL "${baseurl}" \
-    --cleanDestinationDir \
-    --buildFuture \
-    --minify
-}
-
-build_audience public
-build_audience group friends
-build_audience group family
-build_audience private
-
-./scripts/checks/leak-check.sh
-./scripts/checks/verify-public-tree.sh
-./scripts/checks/frontmatter-lint.sh
-./scripts/checks/link-check.sh
-
-echo "Builds written to out/public, out/groups/friends, out/groups/family, out/private"
+echo "Builds written to out/ (${BUILD_AUDIENCES:-all audiences})"
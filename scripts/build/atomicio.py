@@ -0,0 +1,142 @@
+"""Atomic file replacement and per-path write locks.
+
+``atomic_writer``/``atomic_write`` write into a temp file in the target's
+directory and rename it over the target, so readers (Hugo, the API, the
+garden app) see either the old or the new file, never a torn one. With
+``fsync=True`` the data and the directory entry are flushed before and
+after the rename, so a crash cannot leave an empty or partial file either.
+
+``path_lock`` serializes writers of one path across threads and processes
+(e.g. read-modify-write of plants.json, If-Match checks in the API).
+Readers never need it: renames are atomic.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+PathLike = Union[str, 'os.PathLike[str]']
+
+LOCK_DIR = Path(os.environ.get('ATOMICIO_LOCK_DIR')
+                or Path(tempfile.gettempdir()) / 'mygarden-locks')
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it; do it once, before threads start.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_DEFAULT_MODE = 0o666 & ~_read_umask()
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # some filesystems do not support fsync on directories
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_writer(path: PathLike, fsync: bool = False,
+                  mode: Optional[int] = None) -> Iterator[BinaryIO]:
+    """Yield a binary file that replaces path when the block exits cleanly.
+
+    On an exception the temp file is removed and path is left untouched.
+    The new file keeps the permissions of the file it replaces; new files
+    get ``mode`` or the umask default.
+    """
+    target = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            yield fh
+            fh.flush()
+            if fsync:
+                os.fsync(fh.fileno())
+        if mode is None:
+            try:
+                mode = target.stat().st_mode & 0o7777
+            except FileNotFoundError:
+                mode = _DEFAULT_MODE
+        os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    if fsync:
+        _fsync_dir(target.parent)
+
+
+def atomic_write(path: PathLike, data: Union[bytes, str], fsync: bool = False,
+                 mode: Optional[int] = None, encoding: str = 'utf-8') -> None:
+    """Atomically replace path with data (str is encoded with encoding)."""
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    with atomic_writer(path, fsync=fsync, mode=mode) as fh:
+        fh.write(data)
+
+
+class _PathLock:
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.fd: Optional[int] = None
+
+
+_locks: Dict[str, _PathLock] = {}
+_locks_guard = threading.Lock()
+
+
+def lock_file_for(path: PathLike) -> Path:
+    key = os.path.abspath(path)
+    return LOCK_DIR / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.lock')
+
+
+@contextmanager
+def path_lock(path: PathLike) -> Iterator[None]:
+    """Hold the exclusive writer lock of path (reentrant within a thread).
+
+    Threads of one process share a lock object; other processes are kept
+    out by flock() on a lock file in LOCK_DIR, keyed by the absolute path,
+    so the locked file itself can be replaced freely.
+    """
+    key = os.path.abspath(path)
+    with _locks_guard:
+        state = _locks.setdefault(key, _PathLock())
+    with state.lock:
+        if state.depth == 0 and fcntl is not None:
+            LOCK_DIR.mkdir(parents=True, exist_ok=True)
+            fd = os.open(lock_file_for(key), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+            state.fd = fd
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and state.fd is not None:
+                fcntl.flock(state.fd, fcntl.LOCK_UN)
+                os.close(state.fd)
+                state.fd = None
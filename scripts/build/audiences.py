@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Audience model shared by the build scripts and the content API.
+
+An audience is written as ``public``, ``private`` or ``group:<name>`` on the
+command line (e.g. ``--audiences public,group:friends``).
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_AUDIENCES = 'public,group:friends,group:family,private'
+SITE_URL = 'https://karimi.me'
+
+
+def should_include(meta: Dict, audience: str, group: Optional[str]) -> bool:
+    visibility = str(meta.get('visibility', 'private')).strip().lower()
+    status = str(meta.get('status', 'seedling')).strip().lower()
+    groups = meta.get('groups', [])
+    if not isinstance(groups, list):
+        groups = [str(groups)] if groups else []
+
+    if audience == 'private':
+        return True
+    if audience == 'public':
+        return visibility == 'public' and status in {'plant', 'tree'}
+    # group audience
+    if visibility == 'public':
+        return True
+    if visibility == 'group' and group:
+        return group in [str(g) for g in groups]
+    return False
+
+
+class Audience(NamedTuple):
+    kind: str
+    group: Optional[str] = None
+
+    @property
+    def spec(self) -> str:
+        return f'group:{self.group}' if self.kind == 'group' else self.kind
+
+    @property
+    def name(self) -> str:
+        """Suffix used for the staging tree, e.g. ``.build/site-group-friends``."""
+        return f'group-{self.group}' if self.kind == 'group' else self.kind
+
+    @property
+    def out_dir(self) -> Path:
+        if self.kind == 'group':
+            return Path('out') / 'groups' / str(self.group)
+        return Path('out') / self.kind
+
+    @property
+    def url_prefix(self) -> str:
+        """Path prefix the gateway serves this audience under."""
+        if self.kind == 'group':
+            return f'/g/{self.group}/'
+        if self.kind == 'private':
+            return '/private/'
+        return '/'
+
+    @property
+    def base_url(self) -> str:
+        return SITE_URL + self.url_prefix
+
+    def includes(self, meta: Dict) -> bool:
+        return should_include(meta, self.kind, self.group)
+
+
+def audience_for_url(path: str) -> Audience:
+    """Audience whose output serves a root-relative URL path (see url_prefix)."""
+    if path.startswith('/g/'):
+        group = path[3:].split('/', 1)[0]
+        if group:
+            return Audience('group', group)
+    if path == '/private' or path.startswith('/private/'):
+        return Audience('private')
+    return Audience('public')
+
+
+def parse_audience(spec: str) -> Audience:
+    spec = spec.strip()
+    if spec in ('public', 'private'):
+        return Audience(spec)
+    kind, sep, group = spec.partition(':')
+    if kind == 'group' and sep and group:
+        return Audience('group', group)
+    raise ValueError(f"invalid audience '{spec}' (expected public, private or group:<name>)")
+
+
+def parse_audiences(specs: str) -> List[Audience]:
+    """Parse a comma separated audience list, dropping duplicates."""
+    audiences: List[Audience] = []
+    for spec in specs.split(','):
+        if not spec.strip():
+            continue
+        audience = parse_audience(spec)
+        if audience not in audiences:
+            audiences.append(audience)
+    return audiences
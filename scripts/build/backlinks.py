@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Forward/backward link graph of the content, per audience.
+
+Internal links are taken from the markdown sources: inline links and
+images ``[text](target)``, reference definitions ``[id]: target``, raw
+``href="..."`` attributes and Hugo's ``ref``/``relref`` shortcodes (code
+blocks and inline code are ignored). A target counts if it resolves to a
+page: site-absolute URLs (also with the site's host), URLs relative to the
+page and ``.md`` paths.
+
+Extracted links are cached per file by content hash (the content index
+already knows the hashes), so only changed files are read again.
+filter_site.py stages each audience's graph as ``data/backlinks.json``;
+both ends of every edge must be visible to that audience, so e.g. a
+private page never shows up as a backlink on a public page::
+
+    {"forward":  {"politik/a.md": ["technik/b.md"]},
+     "backward": {"technik/b.md": ["politik/a.md"]}}
+
+Keys and values are content paths, as Hugo's ``.File.Path``; see
+layouts/partials/backlinks.html.
+"""
+from __future__ import annotations
+import json
+import posixpath
+import re
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import unquote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from atomicio import atomic_write  # noqa: E402
+from audiences import SITE_URL  # noqa: E402
+from content_index import Page, output_url  # noqa: E402
+from frontmatter_parser import split_frontmatter  # noqa: E402
+
+DEFAULT_CACHE = Path(__file__).resolve().parents[2] / '.cache' / 'backlinks.json'
+SITE_HOST = urlsplit(SITE_URL).netloc
+
+_FENCE_RE = re.compile(r'^(```|~~~).*?^\1[ \t]*$', re.M | re.S)
+_CODE_RE = re.compile(r'`[^`\n]*`')
+_INLINE_RE = re.compile(r'\]\(\s*<?([^)\s>]+)>?(?:\s+["\'(][^)]*)?\)')
+_REFDEF_RE = re.compile(r'^[ \t]{0,3}\[[^\]\n]+\]:[ \t]*<?(\S+?)>?(?:[ \t].*)?$', re.M)
+_HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.I)
+_SHORTCODE_RE = re.compile(r'\{\{[<%]\s*(?:rel)?ref\s+"([^"#]*)[^"]*"\s*[>%]\}\}')
+
+# Content path -> [sha256, linked page URLs]
+LinkCache = Dict[str, list]
+
+
+def _resolve(target: str, rel: str, url: str) -> str:
+    """URL of the page a link target on page (rel, url) points at, or ''."""
+    parts = urlsplit(target)
+    if parts.scheme or parts.netloc:
+        if parts.scheme not in ('http', 'https') or parts.netloc.lower() != SITE_HOST:
+            return ''
+    path = unquote(parts.path)
+    if not path:
+        return ''
+    if path.endswith('.md'):
+        # A content file, relative to this page's file or (with '/') to the content root.
+        base = '' if path.startswith('/') else posixpath.dirname(rel)
+        joined = posixpath.normpath(posixpath.join(base, path.lstrip('/')))
+        return '' if joined.startswith('..') else output_url(Path(joined))
+    if not path.startswith('/'):
+        path = posixpath.join(url, path)
+    path = posixpath.normpath(path)
+    if posixpath.splitext(path)[1]:
+        return ''  # a file (image, feed, stylesheet), not a page
+    return '/' if path in ('/', '.') else path.rstrip('/') + '/'
+
+
+def extract_links(body: str, rel: str, url: str) -> List[str]:
+    """Distinct page URLs linked from the body of the page at content path rel."""
+    text = _CODE_RE.sub('', _FENCE_RE.sub('', body))
+    targets = [_resolve(t, rel, url)
+               for t in _INLINE_RE.findall(text) + _REFDEF_RE.findall(text) + _HREF_RE.findall(text)]
+    for ref in _SHORTCODE_RE.findall(text):
+        if not ref:
+            continue
+        if not ref.endswith('.md'):
+            ref = ref.rstrip('/') + '.md'
+        # Like Hugo: bare names are relative to the page, paths start at the content root.
+        if '/' in ref and not ref.startswith(('.', '/')):
+            ref = '/' + ref
+        targets.append(_resolve(ref, rel, url))
+    links: List[str] = []
+    for link in targets:
+        if link and link != url and link not in links:
+            links.append(link)
+    return links
+
+
+def load_cache(path: Path) -> LinkCache:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(path: Path, cache: LinkCache) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(cache, separators=(',', ':'), sort_keys=True))
+
+
+def page_links(content_root: Path, pages: List[Page], cache: LinkCache) -> Tuple[Dict[str, List[str]], int]:
+    """Linked URLs per content path, and how many files had to be read.
+
+    cache is updated in place and pruned to the given pages.
+    """
+    links: Dict[str, List[str]] = {}
+    parsed = 0
+    for page in pages:
+        rel = page.rel.as_posix()
+        entry = cache.get(rel)
+        if entry is None or entry[0] != page.sha256:
+            _, body = split_frontmatter((content_root / rel).read_text(encoding='utf-8'))
+            entry = cache[rel] = [page.sha256, extract_links(body, rel, page.url)]
+            parsed += 1
+        links[rel] = entry[1]
+    for rel in set(cache) - set(links):
+        del cache[rel]
+    return links, parsed
+
+
+def link_graph(links: Dict[str, List[str]], pages: List[Page], visible: Iterable[str]) -> Dict:
+    """Forward and backward edges between the visible pages (content paths)."""
+    visible = set(visible)
+    by_url = {page.url: page.rel.as_posix() for page in pages if page.rel.as_posix() in visible}
+    forward: Dict[str, List[str]] = {}
+    backward: Dict[str, List[str]] = {}
+    for source in sorted(visible):
+        targets = [by_url[url] for url in links.get(source, ()) if url in by_url]
+        if targets:
+            forward[source] = targets
+        for target in targets:
+            backward.setdefault(target, []).append(source)
+    return {'forward': forward, 'backward': backward}
+
+
+def graph_json(graph: Dict) -> str:
+    return json.dumps(graph, ensure_ascii=False, indent=1, sort_keys=True) + '\n'
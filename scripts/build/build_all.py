@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""Build orchestrator called by scripts/build-all.sh.
+
+Strips image metadata, stages every audience with a single filter_site.py
+run, then builds the audience trees with Hugo concurrently on a bounded
+worker pool and runs the post-build checks as soon as their inputs exist
+(checks reading out/ only after leak-check has pruned it). Per-step wall times are
+printed and written to a JSON build report, together with the phase timings
+the Python tools report (see timings.py). Steps and phases that got markedly
+slower than in the previous report are flagged as regressions.
+
+Each staged .build/site-<audience> tree gets a Merkle hash (tree_hash.py),
+combined with its Hugo command and the image's ``hugo version``. If that
+equals the input of the last build that passed its checks, and that
+build's output is still untouched, Hugo and the checks that only need
+cached audiences are skipped; the report's 'cache' records hit or miss per
+audience.
+
+Environment:
+  DC                           docker-compose command (set by build-all.sh)
+  BUILD_AUDIENCES              default for --audiences
+  BUILD_WORKERS                default for --workers
+  BUILD_REGRESSION_FACTOR      slowdown factor that counts as regression (1.5)
+  BUILD_REGRESSION_MIN_SECONDS ignore slowdowns smaller than this (0.25)
+  BUILD_CACHE                  set to 0 to always run Hugo (like --no-cache)
+"""
+from __future__ import annotations
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import hashlib
+import json
+import os
+from pathlib import Path
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audiences import DEFAULT_AUDIENCES, Audience, parse_audiences  # noqa: E402
+from atomicio import atomic_write  # noqa: E402
+from staging import HUGO_STATE  # noqa: E402
+from timings import TIMINGS_DIR_ENV  # noqa: E402
+from tree_hash import TreeHasher  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_REPORT = Path('.build') / 'build-report.json'
+TIMINGS_DIR = ROOT / '.build' / 'timings'
+BUILD_CACHE = ROOT / '.cache' / 'build-cache.json'
+BUILD_CACHE_VERSION = 1
+REGRESSION_FACTOR = float(os.environ.get('BUILD_REGRESSION_FACTOR', '1.5'))
+REGRESSION_MIN_SECONDS = float(os.environ.get('BUILD_REGRESSION_MIN_SECONDS', '0.25'))
+
+# Marks checks that need every audience's output; they get --audiences <specs>.
+ALL_AUDIENCES = 'all'
+
+# check name -> (command, audience whose output it needs, ALL_AUDIENCES or None for source-only,
+#                checks that must have passed first)
+# leak-check --fix deletes pages from out/, so everything else reading out/ waits for it.
+CHECKS: Dict[str, tuple] = {
+    'frontmatter-lint': (['bash', 'scripts/checks/frontmatter-lint.sh'], None, ()),
+    'leak-check': (['bash', 'scripts/checks/leak-check.sh'], ALL_AUDIENCES, ()),
+    'verify-public-tree': (['bash', 'scripts/checks/verify-public-tree.sh'], Audience('public'), ('leak-check',)),
+    'link-check': (['bash', 'scripts/checks/link-check.sh'], ALL_AUDIENCES, ('leak-check',)),
+}
+
+
+def run_step(name: str, cmd: List[str]) -> Dict:
+    """Run a command from the repo root and time it.
+
+    Tools that support timings.py write theirs into a per-step directory;
+    they end up in the step's 'timings' (tool name -> timings dict).
+    """
+    timings_dir = TIMINGS_DIR / name.replace(':', '_')
+    shutil.rmtree(timings_dir, ignore_errors=True)
+    env = dict(os.environ, **{TIMINGS_DIR_ENV: str(timings_dir)})
+    started = time.monotonic()
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, env=env)
+        returncode, output = proc.returncode, proc.stdout + proc.stderr
+    except OSError as e:
+        # Missing or non-executable tool: fail the step like a shell would, so the
+        # report is still written and dependent checks are skipped.
+        returncode, output = 127, f'{e}\n'
+    step = {
+        'name': name,
+        'cmd': cmd,
+        'returncode': returncode,
+        'seconds': round(time.monotonic() - started, 3),
+        'output': output,
+    }
+    timings = {}
+    for path in sorted(timings_dir.glob('*.json')):
+        try:
+            timings[path.stem] = json.loads(path.read_text(encoding='utf-8'))
+        except ValueError:
+            continue
+    if timings:
+        step['timings'] = timings
+    return step
+
+
+def load_report(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def step_durations(report: Dict) -> Dict[str, float]:
+    """Flatten a report into 'step' and 'step/tool.phase' -> seconds."""
+    durations: Dict[str, float] = {}
+    for name, step in report.get('steps', {}).items():
+        # A cache hit's time says nothing about how long the real step takes.
+        if 'seconds' not in step or step.get('cache') == 'hit':
+            continue
+        durations[name] = step['seconds']
+        for tool, timings in step.get('timings', {}).items():
+            for phase, seconds in timings.get('phases', {}).items():
+                durations[f'{name}/{tool}.{phase}'] = seconds
+    return durations
+
+
+def find_regressions(previous: Dict, current: Dict) -> List[Dict]:
+    """Steps/phases that got slower by REGRESSION_FACTOR and REGRESSION_MIN_SECONDS."""
+    before = step_durations(previous)
+    regressions = []
+    for name, seconds in sorted(step_durations(current).items()):
+        old = before.get(name)
+        if old is None:
+            continue
+        if seconds > old * REGRESSION_FACTOR and seconds - old >= REGRESSION_MIN_SECONDS:
+            regressions.append({'name': name, 'previous': old, 'seconds': seconds})
+    return regressions
+
+
+def hugo_command(dc: List[str], audience: Audience) -> List[str]:
+    return dc + [
+        'run', '--rm', '-T', '--user', f'{os.getuid()}:{os.getgid()}',
+        'hugo',
+        '--source', f'/workspace/.build/site-{audience.name}',
+        '--destination', f'/workspace/{audience.out_dir.as_posix()}',
+        '--baseURL', audience.base_url,
+        '--cleanDestinationDir',
+        '--buildFuture',
+        '--minify',
+    ]
+
+
+def build_audience(dc: List[str], audience: Audience) -> Dict:
+    (ROOT / audience.out_dir).mkdir(parents=True, exist_ok=True)
+    return run_step(f'hugo:{audience.spec}', hugo_command(dc, audience))
+
+
+def load_build_cache(path: Path) -> Dict:
+    try:
+        cache = json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    if cache.get('version') != BUILD_CACHE_VERSION:
+        cache = {}
+    return {'files': cache.get('files', {}), 'audiences': cache.get('audiences', {})}
+
+
+def save_build_cache(path: Path, cache: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(dict(cache, version=BUILD_CACHE_VERSION), separators=(',', ':')))
+
+
+def hugo_version(dc: List[str]) -> Optional[str]:
+    """``hugo version`` of the image the builds run with, or None if it cannot be run."""
+    try:
+        proc = subprocess.run(dc + ['run', '--rm', '-T', 'hugo', 'version'],
+                              cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    version = proc.stdout.strip()
+    return version if proc.returncode == 0 and version else None
+
+
+def input_hash(hasher: TreeHasher, site: Path, command: List[str], hugo: str) -> str:
+    """Hash of everything a Hugo build depends on: staged tree, command line and Hugo itself."""
+    # Hugo's own state in the source dir is not input.
+    tree = hasher.hash(site, exclude=HUGO_STATE)
+    h = hashlib.sha256(tree.encode())
+    h.update(json.dumps([command, hugo]).encode())
+    return h.hexdigest()
+
+
+def cache_hits(hasher: TreeHasher, entries: Dict[str, Dict], inputs: Dict[Audience, str],
+               root: Path = ROOT) -> Set[Audience]:
+    """Audiences whose input equals their last good build's and whose output is untouched."""
+    hits: Set[Audience] = set()
+    for a, digest in inputs.items():
+        entry = entries.get(a.spec)
+        out = root / a.out_dir
+        if entry is not None and entry['input'] == digest and out.is_dir() \
+                and hasher.hash(out) == entry['output']:
+            hits.add(a)
+    return hits
+
+
+def cached_step(dc: List[str], audience: Audience, digest: str) -> Dict:
+    """Stand-in for a Hugo step whose input and output are unchanged."""
+    return {
+        'name': f'hugo:{audience.spec}',
+        'cmd': hugo_command(dc, audience),
+        'returncode': 0,
+        'seconds': 0.0,
+        'output': f'input {digest[:12]} unchanged, Hugo skipped',
+        'cache': 'hit',
+    }
+
+
+def print_step(step: Dict) -> None:
+    status = 'OK' if step['returncode'] == 0 else f"FAIL rc={step['returncode']}"
+    print(f"[build] {step['name']}: {status} in {step['seconds']:.2f}s")
+    output = step['output'].rstrip()
+    if output:
+        for line in output.splitlines():
+            print(f"  {line}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--audiences', default=os.environ.get('BUILD_AUDIENCES') or DEFAULT_AUDIENCES)
+    ap.add_argument('--workers', type=int, default=int(os.environ.get('BUILD_WORKERS', '2')),
+                    help='concurrent Hugo builds')
+    ap.add_argument('--report', default=str(DEFAULT_REPORT))
+    ap.add_argument('--no-cache', action='store_true', default=os.environ.get('BUILD_CACHE') == '0',
+                    help='run Hugo and all checks even if an audience\'s input is unchanged')
+    args = ap.parse_args()
+
+    try:
+        audiences = parse_audiences(args.audiences)
+    except ValueError as e:
+        ap.error(str(e))
+    dc = shlex.split(os.environ.get('DC', 'docker-compose'))
+    started = time.monotonic()
+    report: Dict = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'audiences': [a.spec for a in audiences],
+        'workers': args.workers,
+        'steps': {},
+    }
+
+    # Best effort: a failed sanitizer run is reported but does not stop the build.
+    images = run_step('sanitize-images', [sys.executable, 'scripts/build/sanitize_images.py'])
+    print_step(images)
+    report['steps']['sanitize-images'] = images
+
+    staged = run_step('filter', [
+        sys.executable, 'scripts/build/filter_site.py',
+        '--source', 'site',
+        '--dest-root', '.build',
+        '--audiences', ','.join(a.spec for a in audiences),
+    ])
+    print_step(staged)
+    report['steps']['filter'] = staged
+    failed = staged['returncode'] != 0
+
+    if not failed:
+        # Which audiences can reuse their previous output.
+        build_cache = load_build_cache(BUILD_CACHE)
+        hasher = TreeHasher(build_cache['files'])
+        started_hash = time.monotonic()
+        # A pulled image may bring another Hugo; without knowing it nothing is reused.
+        hugo = hugo_version(dc)
+        inputs = {a: input_hash(hasher, ROOT / '.build' / f'site-{a.name}', hugo_command(dc, a), hugo or '')
+                  for a in audiences}
+        hits = set() if args.no_cache or hugo is None else cache_hits(hasher, build_cache['audiences'], inputs)
+        report['hugo_version'] = hugo
+        report['cache'] = {a.spec: {'result': 'hit' if a in hits else 'miss', 'input': inputs[a]}
+                           for a in audiences}
+        hashed = {
+            'name': 'hash-inputs',
+            'returncode': 0,
+            'seconds': round(time.monotonic() - started_hash, 3),
+            'output': (f"{hasher.files} file(s), {hasher.read} read; "
+                       + (f"cache hits: {', '.join(a.spec for a in audiences if a in hits) or 'none'}"
+                          if hugo else "hugo version unknown, cache not used")),
+        }
+        print_step(hashed)
+        report['steps']['hash-inputs'] = hashed
+
+        built: Dict[Audience, Dict] = {a: cached_step(dc, a, inputs[a]) for a in audiences if a in hits}
+        for a in audiences:
+            if a in hits:
+                print_step(built[a])
+                report['steps'][built[a]['name']] = built[a]
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as builds, \
+                ThreadPoolExecutor(max_workers=len(CHECKS)) as checks:
+            # future -> audience for Hugo builds, None for checks
+            running: Dict[Future, Optional[Audience]] = {
+                builds.submit(build_audience, dc, a): a for a in audiences if a not in hits
+            }
+            waiting: Set[str] = set(CHECKS)
+            submitted: Set[str] = set()
+
+            def passed(name: str) -> bool:
+                step = report['steps'][f'check:{name}']
+                return step.get('cache') == 'hit' or step.get('returncode') == 0
+
+            def submit_ready_checks() -> None:
+                progress = True
+                while progress:
+                    progress = False
+                    for name in sorted(waiting):
+                        if submit_check(name):
+                            waiting.discard(name)
+                            progress = True
+
+            def submit_check(name: str) -> bool:
+                """Submit or skip a waiting check; False while its inputs are not ready."""
+                cmd, needs, after = CHECKS[name]
+                if any(p in waiting or (p in submitted and f'check:{p}' not in report['steps']) for p in after):
+                    return False
+                if needs == ALL_AUDIENCES:
+                    required = list(audiences)
+                    cmd = cmd + ['--audiences', ','.join(a.spec for a in audiences)]
+                else:
+                    required = [] if needs is None else [needs]
+                if any(a not in audiences for a in required):
+                    # Output not part of this build; nothing to check.
+                    return True
+                if not all(a in built for a in required):
+                    return False
+                if any(built[a]['returncode'] != 0 for a in required) or \
+                        not all(passed(p) for p in after if f'check:{p}' in report['steps']):
+                    report['steps'][f'check:{name}'] = {'name': f'check:{name}', 'skipped': True}
+                    return True
+                if required and all(a in hits for a in required):
+                    # Passed on exactly this output last time.
+                    report['steps'][f'check:{name}'] = {'name': f'check:{name}', 'skipped': True, 'cache': 'hit'}
+                    return True
+                submitted.add(name)
+                running[checks.submit(run_step, f'check:{name}', cmd)] = None
+                return True
+
+            submit_ready_checks()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    audience = running.pop(fut)
+                    step = fut.result()
+                    print_step(step)
+                    report['steps'][step['name']] = step
+                    failed = failed or step['returncode'] != 0
+                    if audience is not None:
+                        built[audience] = step
+                submit_ready_checks()
+
+        # Remember the audiences that built and passed every check on their output.
+        for a in audiences:
+            failed_checks = [name for name, (_, needs, _) in CHECKS.items()
+                             if needs in (a, ALL_AUDIENCES)
+                             and report['steps'].get(f'check:{name}', {}).get('returncode', 0) != 0]
+            if built[a]['returncode'] != 0 or failed_checks:
+                build_cache['audiences'].pop(a.spec, None)
+            elif a not in hits and hugo is not None:
+                build_cache['audiences'][a.spec] = {'input': inputs[a], 'output': hasher.hash(ROOT / a.out_dir)}
+        build_cache['files'] = hasher.pruned()
+        save_build_cache(BUILD_CACHE, build_cache)
+
+    report['total_seconds'] = round(time.monotonic() - started, 3)
+    report['ok'] = not failed
+    report_path = ROOT / args.report
+
+    previous = load_report(report_path)
+    # Only comparable against a successful build of the same audiences.
+    if previous and previous.get('ok') and previous.get('audiences') == report['audiences']:
+        report['regressions'] = find_regressions(previous, report)
+        for r in report['regressions']:
+            print(f"[build] regression: {r['name']} {r['previous']:.2f}s -> {r['seconds']:.2f}s")
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    print(f"[build] {'done' if not failed else 'FAILED'} in {report['total_seconds']:.2f}s "
+          f"(report: {args.report})")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
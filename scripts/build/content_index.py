@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Persistent SQLite index of content metadata.
+
+Every pipeline step needs the frontmatter of every page. Instead of each
+script walking and parsing ``site/content`` on its own, the index keeps the
+parsed frontmatter per file, keyed by path, mtime, size and content hash.
+``refresh()`` only stats the tree and re-parses files whose stat changed.
+
+Usable as a script to warm the index ahead of a build::
+
+    python3 scripts/build/content_index.py --source site/content
+"""
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from frontmatter_parser import FrontMatter, split_frontmatter  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_INDEX_PATH = Path(os.environ.get('CONTENT_INDEX', REPO_ROOT / '.cache' / 'content-index.sqlite3'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    frontmatter TEXT NOT NULL,
+    visibility TEXT NOT NULL,
+    status TEXT NOT NULL,
+    groups TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (root, path)
+);
+"""
+
+
+def output_url(rel: Path) -> str:
+    """Hugo URL of a content file relative to the content root."""
+    if rel.name in ('_index.md', 'index.md'):
+        parent = rel.parent.as_posix()
+        return '/' if parent == '.' else f'/{parent}/'
+    parent = rel.parent.as_posix()
+    prefix = '' if parent == '.' else f'/{parent}'
+    return f'{prefix}/{rel.stem}/'
+
+
+def _normalized(meta: FrontMatter) -> Tuple[str, str, List[str]]:
+    visibility = str(meta.get('visibility', 'private')).strip().lower()
+    status = str(meta.get('status', 'seedling')).strip().lower()
+    groups = meta.get('groups', [])
+    if not isinstance(groups, list):
+        groups = [str(groups)] if groups else []
+    return visibility, status, [str(g) for g in groups]
+
+
+@dataclass(frozen=True)
+class Page:
+    rel: Path
+    mtime_ns: int
+    size: int
+    sha256: str
+    frontmatter: FrontMatter
+    visibility: str
+    status: str
+    groups: List[str]
+    url: str
+
+
+def iter_markdown(content_root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (posix relative path, stat) for every markdown file."""
+    root = str(content_root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in filenames:
+            if not name.endswith('.md'):
+                continue
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root).replace(os.sep, '/')
+            yield rel, os.stat(full)
+
+
+class ContentIndex:
+    """Incrementally maintained frontmatter index for one content root."""
+
+    def __init__(self, content_root: Path, db_path: Optional[Path] = None) -> None:
+        self.content_root = Path(content_root)
+        self._root_key = str(self.content_root.resolve())
+        db = str(db_path if db_path is not None else DEFAULT_INDEX_PATH)
+        if db != ':memory:':
+            Path(db).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db, timeout=30)
+        if db != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+        self._pages: Optional[Dict[str, Page]] = None
+        # Counts of the last refresh(), for timing reports.
+        self.refresh_stats: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> 'ContentIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the tree; return change counts."""
+        stats = {'scanned': 0, 'rehashed': 0, 'parsed': 0, 'removed': 0}
+        known = {
+            row[0]: (row[1], row[2], row[3])
+            for row in self._db.execute(
+                'SELECT path, mtime_ns, size, sha256 FROM pages WHERE root = ?', (self._root_key,))
+        }
+        seen = set()
+        with self._db:
+            for rel, st in iter_markdown(self.content_root):
+                stats['scanned'] += 1
+                seen.add(rel)
+                prev = known.get(rel)
+                if prev and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+                    continue
+                raw = (self.content_root / rel).read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                if prev and prev[2] == digest:
+                    self._db.execute(
+                        'UPDATE pages SET mtime_ns = ?, size = ? WHERE root = ? AND path = ?',
+                        (st.st_mtime_ns, st.st_size, self._root_key, rel))
+                    stats['rehashed'] += 1
+                    continue
+                meta, _ = split_frontmatter(raw.decode('utf-8'))
+                visibility, status, groups = _normalized(meta)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (self._root_key, rel, st.st_mtime_ns, st.st_size, digest,
+                     json.dumps(meta, ensure_ascii=False), visibility, status,
+                     json.dumps(groups, ensure_ascii=False), output_url(Path(rel))))
+                stats['parsed'] += 1
+            for rel in set(known) - seen:
+                self._db.execute('DELETE FROM pages WHERE root = ? AND path = ?', (self._root_key, rel))
+                stats['removed'] += 1
+        self._pages = None
+        self.refresh_stats = stats
+        return stats
+
+    def _load(self) -> Dict[str, Page]:
+        if self._pages is None:
+            self._pages = {}
+            rows = self._db.execute(
+                'SELECT path, mtime_ns, size, sha256, frontmatter, visibility, status, groups, url '
+                'FROM pages WHERE root = ? ORDER BY path', (self._root_key,))
+            for path, mtime_ns, size, sha256, fm, visibility, status, groups, url in rows:
+                self._pages[path] = Page(
+                    rel=Path(path), mtime_ns=mtime_ns, size=size, sha256=sha256,
+                    frontmatter=json.loads(fm), visibility=visibility, status=status,
+                    groups=json.loads(groups), url=url)
+        return self._pages
+
+    def pages(self) -> List[Page]:
+        """All indexed pages, sorted by path."""
+        return list(self._load().values())
+
+    def get(self, rel: Path) -> Optional[Page]:
+        return self._load().get(Path(rel).as_posix())
+
+
+def open_index(content_root: Path, db_path: Optional[Path] = None) -> ContentIndex:
+    """Open the index for ``content_root`` and refresh it."""
+    index = ContentIndex(content_root, db_path)
+    index.refresh()
+    return index
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--source', default='site/content')
+    ap.add_argument('--index', default=str(DEFAULT_INDEX_PATH))
+    args = ap.parse_args()
+
+    with ContentIndex(Path(args.source), Path(args.index)) as index:
+        stats = index.refresh()
+    print(f"[content-index] {stats['scanned']} file(s) scanned, "
+          f"{stats['rehashed']} unchanged after rehash, {stats['parsed']} parsed, {stats['removed']} removed")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
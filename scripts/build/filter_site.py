@@ -1,68 +1,22 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import argparse
+import os
 from pathlib import Path
-import re
 import shutil
 import sys
-from typing import List, Set, Dict, Optional, Tuple, Union
-
-
-def parse_frontmatter(path: Path) -> Dict[str, Union[str, List[str]]]:
-    text = path.read_text(encoding='utf-8').replace('\r\n', '\n').replace('\r', '\n')
-    if not text.startswith('---\n'):
-        return {}
-
-    # Accept YAML frontmatter with platform-dependent newlines and optional
-    # whitespace around the closing delimiter.
-    m = re.match(r'^---\n(.*?)\n---\s*(?:\n|$)', text, re.DOTALL)
-    if not m:
-        return {}
-
-    fm = m.group(1).splitlines()
-    data: Dict[str, Union[str, List[str]]] = {}
-    current_list_key = None
-    for raw in fm:
-        line = raw.rstrip()
-        if not line.strip() or line.strip().startswith('#'):
-            continue
-        m = re.match(r'^([A-Za-z0-9_-]+):\s*(.*)$', line)
-        if m:
-            key, val = m.group(1), m.group(2).strip()
-            current_list_key = None
-            if val.startswith('[') and val.endswith(']'):
-                inner = val[1:-1].strip()
-                data[key] = [x.strip().strip('"\'') for x in inner.split(',') if x.strip()]
-            elif val == '':
-                data[key] = []
-                current_list_key = key
-            else:
-                data[key] = val.strip('"\'')
-            continue
-        m = re.match(r'^\s*-\s*(.+)$', line)
-        if m and current_list_key:
-            if isinstance(data[current_list_key], list):
-                data[current_list_key].append(m.group(1).strip().strip('"\''))
-    return data
-
-
-def should_include(meta: Dict, audience: str, group: Optional[str]) -> bool:
-    visibility = str(meta.get('visibility', 'private')).strip().lower()
-    status = str(meta.get('status', 'seedling')).strip().lower()
-    groups = meta.get('groups', [])
-    if not isinstance(groups, list):
-        groups = [str(groups)] if groups else []
-
-    if audience == 'private':
-        return True
-    if audience == 'public':
-        return visibility == 'public' and status in {'plant', 'tree'}
-    # group audience
-    if visibility == 'public':
-        return True
-    if visibility == 'group' and group:
-        return group in [str(g) for g in groups]
-    return False
+from typing import List, Set, Dict, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audiences import Audience, parse_audiences, should_include  # noqa: E402,F401
+from backlinks import (DEFAULT_CACHE as DEFAULT_BACKLINKS_CACHE, graph_json, link_graph,  # noqa: E402
+                       load_cache, page_links, save_cache)
+from content_index import DEFAULT_INDEX_PATH, Page, open_index  # noqa: E402
+from staging import LINK_MODES, Stager, Tree  # noqa: E402
+from timings import Timings, add_arguments as add_timing_arguments, instrument  # noqa: E402
+
+# Staging plan: content-relative path -> source file to copy, or synthesized text.
+Plan = Dict[Path, Union[Path, str]]
 
 
 def clean_destination(dst: Path) -> Tuple[bool, str]:
@@ -88,61 +42,63 @@ def clean_destination(dst: Path) -> Tuple[bool, str]:
 
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument('--source', required=True)
-    ap.add_argument('--dest', required=True)
-    ap.add_argument('--audience', choices=['public', 'group', 'private'], required=True)
-    ap.add_argument('--group', default='')
-    args = ap.parse_args()
-
-    src = Path(args.source)
-    dst = Path(args.dest)
-    ok, err = clean_destination(dst)
-    if not ok:
-        print(f"[FAIL] {err}", file=sys.stderr)
-        return 1
-    dst.mkdir(parents=True, exist_ok=True)
-
-    for item in src.iterdir():
+def site_tree(src: Path) -> Tree:
+    """Everything but content/ and resources/ from the site source."""
+    tree: Tree = {}
+    for item in sorted(src.iterdir()):
         if item.name in ('content', 'resources'):
             continue
-        target = dst / item.name
         if item.is_dir():
-            if target.exists():
-                shutil.rmtree(target, ignore_errors=True)
-            
-            # Python 3.8+ supports dirs_exist_ok
-            if sys.version_info >= (3, 8):
-                shutil.copytree(item, target, copy_function=shutil.copyfile, dirs_exist_ok=True)
-            else:
-                shutil.copytree(item, target, copy_function=shutil.copyfile)
+            for dirpath, dirnames, filenames in os.walk(item):
+                dirnames.sort()
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    tree[path.relative_to(src)] = path
         else:
-            shutil.copyfile(item, target)
+            tree[Path(item.name)] = item
+    return tree
+
+
+def bundle_resources(content_root: Path, pages: List[Page]) -> Dict[Path, List[Path]]:
+    """Map each leaf bundle dir (has index.md) to its non-markdown resources."""
+    resources: Dict[Path, List[Path]] = {}
+    for page in pages:
+        if page.rel.name != 'index.md':
+            continue
+        bundle_dir = page.rel.parent
+        resources[bundle_dir] = [
+            bundle_dir / res.name
+            for res in sorted((content_root / bundle_dir).iterdir())
+            if res.is_file() and res.suffix.lower() != '.md'
+        ]
+    return resources
 
-    content_root = src / 'content'
-    (dst / 'content').mkdir(parents=True, exist_ok=True)
 
+def plan_audience(
+    pages: List[Page],
+    resources: Dict[Path, List[Path]],
+    content_root: Path,
+    audience: Audience,
+) -> Plan:
+    """Decide which content files the audience's staging tree contains."""
     include_regular: Set[Path] = set()
     include_regular_meta: Dict[Path, Dict] = {}
-    index_files: List[Path] = []
+    index_files: List[Tuple[Path, Dict]] = []
 
     # First pass: decide on regular content pages.
-    for md in content_root.rglob('*.md'):
-        rel = md.relative_to(content_root)
-        if md.name == '_index.md':
-            index_files.append(rel)
+    for page in pages:
+        rel, meta = page.rel, page.frontmatter
+        if rel.name == '_index.md':
+            index_files.append((rel, meta))
             continue
-        meta = parse_frontmatter(md)
-        if should_include(meta, args.audience, args.group or None):
+        if audience.includes(meta):
             include_regular.add(rel)
             include_regular_meta[rel] = meta
 
     # Include section/home indexes when needed so pretty section URLs work.
     include_indexes: Set[Path] = set()
-    for rel in index_files:
-        meta = parse_frontmatter(content_root / rel)
-        if should_include(meta, args.audience, args.group or None):
+    for rel, meta in index_files:
+        if audience.includes(meta):
             include_indexes.add(rel)
             continue
 
@@ -153,18 +109,15 @@ def main() -> int:
             if has_child:
                 include_indexes.add(rel)
 
+    plan: Plan = {}
     for rel in sorted(include_regular | include_indexes):
-        out = dst / 'content' / rel
-        out.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copyfile(content_root / rel, out)
+        plan[rel] = content_root / rel
 
         # Page bundle support: if this is an index.md (leaf bundle),
-        # copy all non-MD sibling resources (images, etc.)
+        # include all non-MD sibling resources (images, etc.)
         if rel.name == 'index.md':
-            bundle_dir = (content_root / rel).parent
-            for res in bundle_dir.iterdir():
-                if res.is_file() and res.suffix.lower() != '.md':
-                    shutil.copyfile(res, out.parent / res.name)
+            for res in resources.get(rel.parent, []):
+                plan[res] = content_root / res
 
     # Synthesize missing section _index.md files for included pages.
     # This keeps pretty section URLs (e.g. /politik/) resolvable even if an
@@ -193,26 +146,116 @@ def main() -> int:
         if section in leaf_bundle_dirs:
             continue
         idx_rel = section / '_index.md'
-        idx_dst = dst / 'content' / idx_rel
-        if idx_dst.exists():
+        if idx_rel in plan:
             continue
         idx_src = content_root / idx_rel
-        idx_dst.parent.mkdir(parents=True, exist_ok=True)
         if idx_src.exists():
-            shutil.copy2(idx_src, idx_dst)
+            plan[idx_rel] = idx_src
         else:
-            idx_dst.write_text(
-                "\n".join([
-                    "---",
-                    f'title: "{section.name.title()}"',
-                    "status: tree",
-                    "visibility: public",
-                    "---",
-                    "",
-                ]),
-                encoding='utf-8',
-            )
+            plan[idx_rel] = "\n".join([
+                "---",
+                f'title: "{section.name.title()}"',
+                "status: tree",
+                "visibility: public",
+                "---",
+                "",
+            ])
+
+    return plan
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--source', required=True)
+    ap.add_argument('--dest', help='staging dir for a single --audience')
+    ap.add_argument('--audience', choices=['public', 'group', 'private'])
+    ap.add_argument('--group', default='')
+    ap.add_argument('--audiences',
+                    help='comma separated list, e.g. public,group:friends,private; '
+                         'stages every audience from a single content walk')
+    ap.add_argument('--dest-root', default='.build',
+                    help='with --audiences: staging trees go to <dest-root>/site-<audience>')
+    ap.add_argument('--index', default=str(DEFAULT_INDEX_PATH),
+                    help="content metadata index (':memory:' to disable persistence)")
+    ap.add_argument('--link-mode', choices=LINK_MODES, default='auto',
+                    help='how sources are placed into staging trees (falls back to copy)')
+    ap.add_argument('--clean', action='store_true',
+                    help='wipe the staged content/ first instead of syncing incrementally')
+    ap.add_argument('--backlinks-cache', default=str(DEFAULT_BACKLINKS_CACHE),
+                    help='links extracted per source file, reused while the file is unchanged')
+    add_timing_arguments(ap)
+    args = ap.parse_args()
+
+    if args.audiences:
+        if args.audience or args.dest:
+            ap.error('--audiences cannot be combined with --audience/--dest')
+        try:
+            audiences = parse_audiences(args.audiences)
+        except ValueError as e:
+            ap.error(str(e))
+        targets = [(aud, Path(args.dest_root) / f'site-{aud.name}') for aud in audiences]
+    else:
+        if not args.audience or not args.dest:
+            ap.error('either --audiences or both --audience and --dest are required')
+        targets = [(Audience(args.audience, args.group or None), Path(args.dest))]
+
+    with instrument(args, 'filter_site') as timings:
+        return stage(args, targets, timings)
+
+
+def stage(args: argparse.Namespace, targets: List[Tuple[Audience, Path]], timings: Timings) -> int:
+    src = Path(args.source)
+    for _, dst in targets:
+        if args.clean:
+            with timings.phase('clean'):
+                ok, err = clean_destination(dst)
+            if not ok:
+                print(f"[FAIL] {err}", file=sys.stderr)
+                return 1
+        dst.mkdir(parents=True, exist_ok=True)
+
+    with timings.phase('site_tree'):
+        base_tree = site_tree(src)
+    content_root = src / 'content'
+    with timings.phase('index'):
+        with open_index(content_root, Path(args.index)) as index:
+            pages = index.pages()
+            timings.count(**{f'index_{k}': v for k, v in index.refresh_stats.items()})
+    with timings.phase('resources'):
+        resources = bundle_resources(content_root, pages)
+    timings.count(pages=len(pages), audiences=len(targets))
+    with timings.phase('links'):
+        cache_path = Path(args.backlinks_cache)
+        cache = load_cache(cache_path)
+        cached = len(cache)
+        links, parsed = page_links(content_root, pages, cache)
+        if parsed or len(cache) != cached:
+            save_cache(cache_path, cache)
+    timings.count(links_parsed=parsed)
+
+    stager = Stager(args.link_mode)
+    for audience, dst in targets:
+        desired: Tree = dict(base_tree)
+        with timings.phase('plan'):
+            plan = plan_audience(pages, resources, content_root, audience)
+        timings.count(**{f'planned:{audience.spec}': len(plan)})
+        desired.update({Path('content') / rel: source for rel, source in plan.items()})
+        # Hugo reads it as site.Data.backlinks; only pages this audience sees take part.
+        with timings.phase('links'):
+            graph = link_graph(links, pages, (rel.as_posix() for rel in plan if rel.suffix == '.md'))
+        desired[Path('data') / 'backlinks.json'] = graph_json(graph)
+        try:
+            with timings.phase('sync'):
+                stager.sync(desired, dst)
+        except PermissionError as e:
+            print(f"[FAIL] cannot update staging tree '{dst}': {e}. "
+                  "This often happens after running the build once with sudo. "
+                  "Fix ownership (e.g. `sudo chown -R $USER:$USER .build out`) "
+                  "or run this command with sudo.", file=sys.stderr)
+            return 1
+    timings.count(**stager.stats)
 
+    print(f"[filter-site] {stager.report()}")
     return 0
 
 if __name__ == '__main__':
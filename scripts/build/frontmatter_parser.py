@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Shared minimal YAML frontmatter parser for content markdown files.
+
+Used by the build scripts, the checks and the content API so that every
+caller sees the same metadata for a page. File-based parsing stops reading
+at the closing ``---`` delimiter; the body is never loaded.
+"""
+from __future__ import annotations
+from pathlib import Path
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+FrontMatter = Dict[str, Union[str, List[str]]]
+
+# Accept YAML frontmatter with platform-dependent newlines and optional
+# whitespace around the closing delimiter.
+_BLOCK_RE = re.compile(r'^---\n(.*?)\n---\s*(?:\n|$)', re.DOTALL)
+_KV_RE = re.compile(r'^([A-Za-z0-9_-]+):\s*(.*)$')
+_LIST_ITEM_RE = re.compile(r'^\s*-\s*(.+)$')
+_QUOTES = '"\''
+
+
+def _normalize_newlines(text: str) -> str:
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def parse_lines(lines: Iterable[str]) -> FrontMatter:
+    """Parse the lines between the ``---`` delimiters into a dict."""
+    data: FrontMatter = {}
+    current_list_key: Optional[str] = None
+    for raw in lines:
+        line = raw.rstrip()
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        kv = _KV_RE.match(line)
+        if kv:
+            key, val = kv.group(1), kv.group(2).strip()
+            current_list_key = None
+            if val.startswith('[') and val.endswith(']'):
+                inner = val[1:-1].strip()
+                data[key] = [x.strip().strip(_QUOTES) for x in inner.split(',') if x.strip()]
+            elif val == '':
+                data[key] = []
+                current_list_key = key
+            else:
+                data[key] = val.strip(_QUOTES)
+            continue
+        item = _LIST_ITEM_RE.match(line)
+        if item and current_list_key:
+            values = data.setdefault(current_list_key, [])
+            if isinstance(values, list):
+                values.append(item.group(1).strip().strip(_QUOTES))
+    return data
+
+
+def split_frontmatter(text: str) -> Tuple[FrontMatter, str]:
+    """Split markdown text into (frontmatter, body).
+
+    Text without a valid frontmatter block yields ``({}, text)``.
+    """
+    text = _normalize_newlines(text)
+    if not text.startswith('---\n'):
+        return {}, text
+    m = _BLOCK_RE.match(text)
+    if not m:
+        return {}, text
+    return parse_lines(m.group(1).split('\n')), text[m.end():]
+
+
+def read_header_lines(path: Path) -> Optional[List[str]]:
+    """Return the raw frontmatter lines of ``path`` without reading the body.
+
+    Returns None when the file has no (terminated) frontmatter block.
+    """
+    # newline=None translates \r\n and \r to \n, same as _normalize_newlines.
+    with open(path, 'r', encoding='utf-8', newline=None) as fh:
+        if fh.readline() != '---\n':
+            return None
+        lines: List[str] = []
+        for line in fh:
+            # The closing delimiter needs at least one line of header before it
+            # (an empty block is not frontmatter), mirroring _BLOCK_RE.
+            if lines and line.rstrip() == '---':
+                return lines
+            lines.append(line.rstrip('\n'))
+    return None
+
+
+def parse_frontmatter(path: Path) -> FrontMatter:
+    """Parse the frontmatter of a markdown file; ``{}`` if there is none."""
+    lines = read_header_lines(path)
+    if lines is None:
+        return {}
+    return parse_lines(lines)
@@ -2,151 +2,208 @@
 from __future__ import annotations
 import argparse
 from pathlib import Path
-import re
-from typing import Set, Tuple, List, Dict
-
-
-def parse_frontmatter(path: Path) -> Dict[str, str]:
-    text = path.read_text(encoding='utf-8')
-    if not text.startswith('---\n'):
-        return {}
-    parts = text.split('\n---\n', 1)
-    if len(parts) != 2:
-        return {}
-    fm = parts[0].splitlines()[1:]
-    data = {}
-    for raw in fm:
-        line = raw.strip()
-        if not line:
-            continue
-        m = re.match(r'^([A-Za-z0-9_-]+):\s*(.*)$', line)
-        if not m:
-            continue
-        key, val = m.group(1), m.group(2).strip().strip('"\'')
-        data[key] = val
-    return data
+import sys
+from typing import Dict, List, Optional, Set, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audiences import DEFAULT_AUDIENCES, Audience, parse_audiences  # noqa: E402
+from content_index import DEFAULT_INDEX_PATH, Page, open_index  # noqa: E402
+from output_manifest import DEFAULT_MANIFEST_DIR, TreeSnapshot, load_manifest, save_manifest  # noqa: E402
+from timings import Timings, add_arguments as add_timing_arguments, instrument  # noqa: E402
 
-def is_public_allowed(meta: Dict[str, str]) -> bool:
-    visibility = str(meta.get('visibility', 'private')).lower()
-    status = str(meta.get('status', 'seedling')).lower()
-    return visibility == 'public' and status in {'plant', 'tree'}
 
+# Top-level output dirs Hugo generates from taxonomies rather than content files.
+TAXONOMY_DIRS = {'tags', 'categories'}
 
-def remove_empty_parents(path: Path, stop: Path) -> None:
-    cur = path.parent
-    while cur != stop and cur.exists():
-        try:
-            cur.rmdir()
-        except OSError:
-            break
-        cur = cur.parent
+
+def html_rel(page: Page) -> str:
+    """Output file of a page relative to the audience's output root."""
+    url = page.url.strip('/')
+    return f'{url}/index.html' if url else 'index.html'
 
 
-def expected_public_pages(src: Path, pub: Path) -> Tuple[Set[Path], Set[Path]]:
-    """Return (allowed, disallowed) html leaf paths derived from content files."""
-    allowed: Set[Path] = set()
-    disallowed: Set[Path] = set()
-
-    for md in src.rglob('*.md'):
-        rel = md.relative_to(src)
-        meta = parse_frontmatter(md)
-
-        if md.name == '_index.md':
-            # Hugo section/home index mapping
-            if rel.parent == Path('.'):
-                html = pub / 'index.html'
-            else:
-                html = pub / rel.parent.as_posix() / 'index.html'
-        elif md.name == 'index.md':
-            # Hugo leaf page bundle: dir/index.md -> dir/index.html
-            html = pub / rel.parent.as_posix() / 'index.html'
+def output_policy(pages: List[Page], audience: Audience) -> Tuple[Set[str], Set[str]]:
+    """Return (allowed, disallowed) output paths for the audience.
+
+    Section/home indexes are allowed when the audience may see the index
+    itself or any page below it, like filter_site.py stages them.
+    """
+    allowed: Set[str] = set()
+    disallowed: Set[str] = set()
+    sections: Set[str] = set()
+    for page in pages:
+        if page.rel.name == '_index.md':
+            continue
+        if audience.includes(page.frontmatter):
+            allowed.add(html_rel(page))
+            sections.update(parent.as_posix() for parent in page.rel.parents)
         else:
-            html = pub / rel.parent.as_posix() / md.stem / 'index.html'
+            disallowed.add(html_rel(page))
 
-        if is_public_allowed(meta):
-            allowed.add(html)
+    for page in pages:
+        if page.rel.name != '_index.md':
+            continue
+        if audience.includes(page.frontmatter) or page.rel.parent.as_posix() in sections:
+            allowed.add(html_rel(page))
         else:
-            disallowed.add(html)
+            disallowed.add(html_rel(page))
+    return allowed, disallowed - allowed
+
 
-    return allowed, disallowed
+def html_outputs(files: Set[str]) -> Set[str]:
+    """The index.html pages among an output tree's files."""
+    return {f for f in files if f == 'index.html' or f.endswith('/index.html')}
 
 
-def looks_content_derived(pub: Path, html: Path, src: Path) -> bool:
+def looks_content_derived(html: str, sources: Set[str]) -> bool:
     """True if the output path corresponds to a possible content file path."""
-    rel = html.relative_to(pub)
-    parts = rel.parts
-    if len(parts) == 1 and parts[0] == 'index.html':
+    parts = html.split('/')
+    if parts == ['index.html']:
         return True
-
-    if len(parts) >= 2 and parts[-1] == 'index.html':
+    if parts[-1] != 'index.html':
+        return False
+    if len(parts) == 2:
         # section index: /section/index.html -> content/section/_index.md
-        if len(parts) == 2:
-            return (src / parts[0] / '_index.md').exists()
-
-        # regular leaf page path: /section/slug/index.html
-        # Treat as content-derived unless it's a known taxonomy leaf path.
-        if len(parts) >= 3:
-            if parts[0] in {'tags', 'categories'}:
-                return False
-            return True
+        return f'{parts[0]}/_index.md' in sources
+    # regular leaf page path: /section/slug/index.html
+    # Treat as content-derived unless it's a known taxonomy leaf path.
+    return parts[0] not in TAXONOMY_DIRS
+
+
+def find_leaks(pages: List[Page], allowed: Set[str], disallowed: Set[str],
+               present: Set[str]) -> List[str]:
+    """Leaked or orphaned output paths among present, without touching the disk."""
+    # Direct policy leak: known page the audience may not see exists in its output.
+    leaks = present & disallowed
+    # Orphan leak: content-derived page exists but matches no current source
+    # (non-content pages such as taxonomies are ignored).
+    sources = {page.rel.as_posix() for page in pages}
+    unknown = present - allowed - disallowed
+    leaks.update(html for html in unknown if looks_content_derived(html, sources))
+    return sorted(leaks)
+
+
+def candidates(present: Set[str], allowed: Set[str], disallowed: Set[str],
+               snapshot: TreeSnapshot, previous: Optional[Dict]) -> Set[str]:
+    """Output pages whose verdict may differ from the previous run's."""
+    if previous is None:
+        return present
+    added = present - html_outputs(snapshot.previous_files())
+    changed = (allowed ^ set(previous['allowed'])) | (disallowed ^ set(previous['disallowed']))
+    return added | (present & (changed | set(previous['leaks'])))
 
-        # fallback exact source match if present
-        section = Path(*parts[:-2])
-        slug = parts[-2]
-        if (src / section / f'{slug}.md').exists():
-            return True
 
-    return False
+def remove_empty_parents(path: Path, stop: Path) -> None:
+    cur = path.parent
+    while cur != stop and cur.exists():
+        try:
+            cur.rmdir()
+        except OSError:
+            break
+        cur = cur.parent
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument('--source', required=True)
-    ap.add_argument('--public', required=True)
+    ap.add_argument('--public', help='check only this public output dir')
+    ap.add_argument('--out', default='out',
+                    help='output root holding public/, groups/<name>/ and private/')
+    ap.add_argument('--audiences', default=DEFAULT_AUDIENCES,
+                    help='comma separated audiences whose output under --out is checked '
+                         '(missing output dirs are skipped)')
     ap.add_argument('--fix', action='store_true', help='delete leaked/orphaned files and empty dirs')
+    ap.add_argument('--index', default=str(DEFAULT_INDEX_PATH),
+                    help="content metadata index (':memory:' to disable persistence)")
+    ap.add_argument('--manifest-dir', default=str(DEFAULT_MANIFEST_DIR),
+                    help='where the previous run is remembered, so only changes are re-examined')
+    ap.add_argument('--full', action='store_true', help='ignore the previous run and check everything')
+    add_timing_arguments(ap)
     args = ap.parse_args()
 
-    src = Path(args.source)
-    pub = Path(args.public)
-
-    allowed, disallowed = expected_public_pages(src, pub)
+    if args.public:
+        root = Path(args.public)
+        targets = [(Audience('public'), root)]
+    else:
+        try:
+            audiences = parse_audiences(args.audiences)
+        except ValueError as e:
+            ap.error(str(e))
+        root = Path(args.out)
+        targets = [(a, root / a.out_dir.relative_to('out')) for a in audiences]
 
-    leaks: List[Path] = []
+    with instrument(args, 'leak_check') as timings:
+        return check(args, root, targets, timings)
 
-    # Direct policy leak: known non-public page exists in public output.
-    for html in sorted(disallowed):
-        if html.exists():
-            leaks.append(html)
 
-    # Orphan leak: content-derived page exists but no longer allowed by current source.
-    for html in pub.rglob('index.html'):
-        if html in allowed or html in disallowed:
-            continue
-        if not looks_content_derived(pub, html, src):
-            # Ignore non-content generated pages (e.g. taxonomy/utility pages).
+def check(args: argparse.Namespace, root: Path, targets: List[Tuple[Audience, Path]],
+          timings: Timings) -> int:
+    src = Path(args.source)
+    manifest_path = Path(args.manifest_dir) / 'leak_check.json'
+    stored = load_manifest(manifest_path, root)
+    manifest = None if args.full else stored
+    # Audiences not checked in this run keep their state for the next run.
+    state: Dict[str, Dict] = dict((stored or {}).get('audiences', {}))
+
+    with timings.phase('index'):
+        with open_index(src, Path(args.index)) as index:
+            pages = index.pages()
+            timings.count(**{f'index_{k}': v for k, v in index.refresh_stats.items()})
+    timings.count(pages=len(pages))
+
+    failed = False
+    for audience, out in targets:
+        if not out.is_dir():
+            print(f'Leak check skipped {audience.spec}: {out} does not exist.')
+            state.pop(audience.spec, None)
             continue
-        leaks.append(html)
-
-    if leaks:
-        if args.fix:
-            for f in leaks:
-                if f.exists():
-                    f.unlink()
-                    remove_empty_parents(f, pub)
-            print('Leak check fixed leaked/orphaned pages in out/public:')
-            for x in leaks:
-                print(f' - removed {x}')
+        previous = (manifest or {}).get('audiences', {}).get(audience.spec)
+        with timings.phase('scan'):
+            snapshot = TreeSnapshot(out, previous and previous['tree']).scan()
+            present = html_outputs(snapshot.files)
+        with timings.phase('compare'):
+            allowed, disallowed = output_policy(pages, audience)
+            examine = candidates(present, allowed, disallowed, snapshot, previous)
+            leaks = find_leaks(pages, allowed, disallowed, examine)
+        timings.count(html_files=len(present), examined=len(examine), leaks=len(leaks),
+                      dirs_listed=snapshot.listed, dirs_reused=snapshot.reused)
+
+        remaining = leaks
+        if not leaks:
+            print(f'Leak check passed: no pages hidden from {audience.spec} found in {out} '
+                  f'({len(examine)} of {len(present)} page(s) examined).')
+        elif args.fix:
+            with timings.phase('fix'):
+                for html in leaks:
+                    f = out / html
+                    if f.exists():
+                        f.unlink()
+                        remove_empty_parents(f, out)
+            snapshot.discard(leaks)
+            remaining = []
+            print(f'Leak check fixed leaked/orphaned pages in {out}:')
+            for html in leaks:
+                print(f' - removed {out / html}')
             print('Leak check passed after auto-fix.')
-            return 0
-
-        print('Leak check failed. Non-public or orphaned pages found in out/public:')
-        for x in leaks:
-            print(f' - {x}')
+        else:
+            failed = True
+            print(f'Leak check failed. Pages hidden from {audience.spec} or orphaned pages found in {out}:')
+            for html in leaks:
+                print(f' - {out / html}')
+
+        state[audience.spec] = {
+            'tree': snapshot.as_dict(),
+            'allowed': sorted(allowed),
+            'disallowed': sorted(disallowed),
+            'leaks': remaining,
+        }
+
+    with timings.phase('manifest'):
+        save_manifest(manifest_path, root, {'audiences': state})
+
+    if failed:
         print('Hint: run scripts/checks/leak-check.sh (default auto-fix) or LEAK_CHECK_STRICT=1 for strict mode.')
         return 1
-
-    print('Leak check passed: no non-public pages found in out/public.')
     return 0
 
 
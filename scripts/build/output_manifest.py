@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Manifests of the previous output trees, for incremental post-build checks.
+
+A check stores what it saw of ``out/`` in ``<manifest dir>/<tool>.json``.
+The next run uses it to list and re-examine only what changed:
+
+* ``TreeSnapshot`` re-lists a directory only if its mtime changed (an entry
+  was added, removed or renamed); other directories reuse their listing.
+* Checks that read files keep (mtime, size, hash) per file and only re-read
+  files whose stat changed, and only re-process them if the hash did.
+
+Anything modified within ``RACY_NS`` of the previous scan is not trusted,
+since it may have changed again within the filesystem's timestamp
+granularity (the same trick git's index uses). A manifest written for a
+different output root or format version is ignored.
+"""
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from atomicio import atomic_write  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_MANIFEST_DIR = Path(os.environ.get('CHECK_MANIFEST_DIR', REPO_ROOT / '.cache' / 'checks'))
+MANIFEST_VERSION = 1
+RACY_NS = 2 * 10**9
+
+
+def load_manifest(path: Path, root: Path) -> Optional[Dict]:
+    """The manifest stored for output root, or None if there is no usable one."""
+    try:
+        manifest = json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('root') != str(root.resolve()):
+        return None
+    return manifest
+
+
+def save_manifest(path: Path, root: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    manifest = dict(data, version=MANIFEST_VERSION, root=str(root.resolve()))
+    atomic_write(path, json.dumps(manifest, separators=(',', ':')))
+
+
+def trusted(mtime_ns: int, previous_scan_ns: Optional[int]) -> bool:
+    """Whether an unchanged mtime proves the entry is unchanged since the last scan."""
+    return previous_scan_ns is not None and mtime_ns < previous_scan_ns - RACY_NS
+
+
+class TreeSnapshot:
+    """All files below root as posix paths, listed with the help of a previous snapshot."""
+
+    def __init__(self, root: Path, previous: Optional[Dict] = None) -> None:
+        self.root = root
+        self.previous = previous or {}
+        self.scanned_at_ns = 0
+        self.dirs: Dict[str, Dict] = {}
+        self.files: Set[str] = set()
+        self.listed = 0
+        self.reused = 0
+
+    def scan(self) -> 'TreeSnapshot':
+        self.scanned_at_ns = time.time_ns()
+        previous_dirs = self.previous.get('dirs', {})
+        previous_scan = self.previous.get('scanned_at_ns')
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.root, rel)
+            try:
+                mtime_ns = os.stat(full).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            old = previous_dirs.get(rel)
+            if old is not None and old['mtime_ns'] == mtime_ns and trusted(mtime_ns, previous_scan):
+                files, subdirs = old['files'], old['dirs']
+                self.reused += 1
+            else:
+                files, subdirs = [], []
+                with os.scandir(full) as entries:
+                    for entry in entries:
+                        (subdirs if entry.is_dir(follow_symlinks=False) else files).append(entry.name)
+                files.sort()
+                subdirs.sort()
+                self.listed += 1
+            self.dirs[rel] = {'mtime_ns': mtime_ns, 'files': files, 'dirs': subdirs}
+            prefix = f'{rel}/' if rel else ''
+            self.files.update(prefix + name for name in files)
+            stack.extend(prefix + name for name in subdirs)
+        return self
+
+    def previous_files(self) -> Set[str]:
+        files: Set[str] = set()
+        for rel, listing in self.previous.get('dirs', {}).items():
+            prefix = f'{rel}/' if rel else ''
+            files.update(prefix + name for name in listing['files'])
+        return files
+
+    def discard(self, paths: List[str]) -> None:
+        """Forget files this run deleted (their dirs are re-listed next time anyway)."""
+        for path in paths:
+            self.files.discard(path)
+            rel, _, name = path.rpartition('/')
+            listing = self.dirs.get(rel)
+            if listing is not None and name in listing['files']:
+                listing['files'].remove(name)
+
+    def as_dict(self) -> Dict:
+        return {'scanned_at_ns': self.scanned_at_ns, 'dirs': self.dirs}
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Strip privacy-relevant metadata (EXIF, XMP, IPTC, comments) from images.
+
+Works on the container format instead of decoding pixels, so it is
+lossless and needs no Pillow:
+
+- JPEG: drops APP1 (EXIF/XMP), APP3-APP13, APP15 and COM segments; keeps
+  JFIF (APP0), ICC profiles (APP2) and Adobe (APP14) colour information.
+  The compressed image data is copied verbatim; everything after the EOI
+  marker (MPO secondary images with their own EXIF, motion-photo videos,
+  vendor trailers) is dropped.
+- PNG: drops tEXt, zTXt, iTXt, eXIf and tIME chunks.
+
+Files whose content hash is recorded as clean in the cache are skipped,
+the rest are processed on a process pool.
+"""
+from __future__ import annotations
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from atomicio import atomic_write, path_lock  # noqa: E402
+
+DEFAULT_CACHE = Path(__file__).resolve().parents[2] / '.cache' / 'image-sanitizer.json'
+JPEG_SUFFIXES = {'.jpg', '.jpeg'}
+PNG_SUFFIXES = {'.png'}
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_DROP = {b'tEXt', b'zTXt', b'iTXt', b'eXIf', b'tIME'}
+# Markers without a length field.
+_JPEG_STANDALONE = {0x01} | set(range(0xD0, 0xD8))
+_SOS = 0xDA
+_EOI = 0xD9
+
+
+def _keep_jpeg_segment(marker: int, payload: bytes) -> bool:
+    if marker == 0xE2:
+        return payload.startswith(b'ICC_PROFILE\x00')
+    if marker in (0xE0, 0xEE):
+        return True
+    return not (0xE1 <= marker <= 0xEF or marker == 0xFE)
+
+
+def _scan_end(data: bytes, pos: int) -> int:
+    """Offset of the first marker after the entropy-coded data starting at pos."""
+    while True:
+        pos = data.find(b'\xff', pos)
+        if pos < 0 or pos + 1 >= len(data):
+            return len(data)
+        following = data[pos + 1]
+        # FF00 is a stuffed data byte, FFD0-FFD7 restart markers inside the scan.
+        if following == 0x00 or 0xD0 <= following <= 0xD7:
+            pos += 2
+        elif following == 0xFF:
+            pos += 1
+        else:
+            return pos
+
+
+def strip_jpeg(data: bytes) -> Optional[bytes]:
+    """Return data without metadata segments and trailer, or None if it is not a JPEG."""
+    if not data.startswith(b'\xff\xd8'):
+        return None
+    out = [b'\xff\xd8']
+    pos = 2
+    while pos < len(data):
+        if data[pos] != 0xFF:
+            return None
+        # Skip fill bytes between segments.
+        while pos < len(data) and data[pos] == 0xFF:
+            pos += 1
+        if pos >= len(data):
+            return None
+        marker = data[pos]
+        pos += 1
+        if marker in _JPEG_STANDALONE:
+            out.append(bytes((0xFF, marker)))
+            continue
+        if marker == _EOI:
+            # End of the (first) image; whatever follows is not part of it.
+            out.append(b'\xff\xd9')
+            break
+        if pos + 2 > len(data):
+            return None
+        length = int.from_bytes(data[pos:pos + 2], 'big')
+        end = pos + length
+        if length < 2 or end > len(data):
+            return None
+        if marker == _SOS:
+            # Copy the scan; progressive images have more segments and scans after it.
+            scan_end = _scan_end(data, end)
+            out.append(data[pos - 2:scan_end])
+            pos = scan_end
+            continue
+        if _keep_jpeg_segment(marker, data[pos + 2:end]):
+            out.append(data[pos - 2:end])
+        pos = end
+    return b''.join(out)
+
+
+def strip_png(data: bytes) -> Optional[bytes]:
+    """Return data without text/time/EXIF chunks, or None if it is not a PNG."""
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+    out = [_PNG_SIGNATURE]
+    pos = len(_PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length = int.from_bytes(data[pos:pos + 4], 'big')
+        ctype = data[pos + 4:pos + 8]
+        end = pos + 12 + length
+        if end > len(data):
+            return None
+        if ctype not in _PNG_DROP:
+            out.append(data[pos:end])
+        pos = end
+        if ctype == b'IEND':
+            break
+    return b''.join(out)
+
+
+def sanitize_file(path: str) -> Tuple[str, str, int, str]:
+    """Sanitize one image in place.
+
+    Returns (path, outcome, bytes removed, sha256 of the clean file) where
+    outcome is 'stripped', 'clean' or 'unsupported'.
+    """
+    p = Path(path)
+    # The content API writes uploads under the same lock; without it an upload
+    # landing between read and replace would be overwritten with the old image.
+    with path_lock(p):
+        data = p.read_bytes()
+        suffix = p.suffix.lower()
+        clean = strip_jpeg(data) if suffix in JPEG_SUFFIXES else strip_png(data)
+        if clean is None:
+            return path, 'unsupported', 0, ''
+        if clean == data:
+            return path, 'clean', 0, hashlib.sha256(data).hexdigest()
+        atomic_write(p, clean)
+    return path, 'stripped', len(data) - len(clean), hashlib.sha256(clean).hexdigest()
+
+
+def load_cache(path: Path) -> Dict[str, Dict]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(path: Path, cache: Dict[str, Dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(cache, indent=1, sort_keys=True))
+
+
+def find_images(root: Path) -> List[Path]:
+    suffixes = JPEG_SUFFIXES | PNG_SUFFIXES
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in suffixes:
+                found.append(Path(dirpath) / name)
+    return found
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--source', default='site/content')
+    ap.add_argument('--cache', default=str(DEFAULT_CACHE))
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    started = time.monotonic()
+    cache_path = Path(args.cache)
+    cache = load_cache(cache_path)
+    images = find_images(Path(args.source))
+
+    # A cache entry is trusted if size/mtime match; otherwise the content hash decides.
+    todo: List[Path] = []
+    cached = 0
+    for img in images:
+        key = str(img.resolve())
+        entry = cache.get(key)
+        st = img.stat()
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            cached += 1
+            continue
+        if entry and entry['sha256'] == hashlib.sha256(img.read_bytes()).hexdigest():
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            cached += 1
+            continue
+        todo.append(img)
+    scanned = time.monotonic()
+
+    counts = {'stripped': 0, 'clean': 0, 'unsupported': 0, 'failed': 0}
+    removed = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(todo)))) as pool:
+            futures = [pool.submit(sanitize_file, str(img)) for img in todo]
+            for img, fut in zip(todo, futures):
+                try:
+                    path, outcome, freed, digest = fut.result()
+                except Exception as e:
+                    print(f'[WARN] could not sanitize {img}: {e}', file=sys.stderr)
+                    counts['failed'] += 1
+                    continue
+                counts[outcome] += 1
+                removed += freed
+                if outcome == 'unsupported':
+                    print(f'[WARN] not a valid image, left untouched: {path}', file=sys.stderr)
+                    continue
+                st = Path(path).stat()
+                cache[str(Path(path).resolve())] = {
+                    'sha256': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                }
+    finished = time.monotonic()
+
+    live = {str(img.resolve()) for img in images}
+    save_cache(cache_path, {k: v for k, v in cache.items() if k in live})
+
+    print(f"[images] {len(images)} image(s): {counts['stripped']} stripped "
+          f"({removed} bytes of metadata), {counts['clean']} already clean, {cached} cached, "
+          f"{counts['unsupported'] + counts['failed']} skipped; "
+          f"scan {scanned - started:.2f}s, sanitize {finished - scanned:.2f}s")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Place source files into .build/site-* staging trees without byte copies.
+
+Modes:
+  auto     reflink, else hardlink, else copy (default)
+  reflink  copy-on-write clone (btrfs/XFS, e.g. Synology btrfs volumes)
+  hardlink shared inode; staging trees are never written to, so this is safe
+  copy     plain byte copy (previous behaviour)
+
+There is no symlink mode: Hugo does not follow symlinked content, so such a
+tree would build a site with pages silently missing.
+
+Whatever cannot be linked (cross-device, unsupported filesystem) falls back
+to copying, so every mode always produces a complete tree.
+
+``Stager.sync`` diffs a desired tree against an existing staging tree and
+only touches added, changed or obsolete files, so Hugo sees stable inputs
+between rebuilds. Staged files are never written in place: a file that
+changed is unlinked and staged again, so writes can never reach a
+hardlinked source in site/. For the same reason nothing may chmod or edit
+files below .build; only its directories are ours.
+"""
+from __future__ import annotations
+import errno
+import os
+from pathlib import Path
+import shutil
+from typing import Dict, Iterable, Union
+
+# Desired staging tree: path relative to the staging root -> source file or text.
+Tree = Dict[Path, Union[Path, str]]
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+LINK_MODES = ('auto', 'reflink', 'hardlink', 'copy')
+
+# Top-level entries Hugo writes into its source dir: the resource cache and its build lock.
+HUGO_STATE = ('resources', '.hugo_build.lock')
+
+# ioctl request number of FICLONE from <linux/fs.h>
+FICLONE = 0x40049409
+
+# errnos meaning "this filesystem (pair) cannot do that", not a real failure
+_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY,
+                errno.EINVAL, errno.ENOSYS, errno.EMLINK}
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, 'reflink not supported on this platform')
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+
+def _unlink_existing(dst: Path) -> None:
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+
+
+def _is_current(source: Union[Path, str], out: Path) -> bool:
+    """True if the staged file at ``out`` already matches ``source``."""
+    try:
+        out_st = out.lstat()
+    except FileNotFoundError:
+        return False
+    if isinstance(source, str):
+        return out.is_file() and not out.is_symlink() and out.read_bytes() == source.encode('utf-8')
+    if out.is_symlink():
+        return False  # left over from the former symlink mode
+    src_st = source.stat()
+    if (out_st.st_dev, out_st.st_ino) == (src_st.st_dev, src_st.st_ino):
+        return True
+    return out_st.st_size == src_st.st_size and out_st.st_mtime_ns == src_st.st_mtime_ns
+
+
+def _remove_empty_dirs(root: Path, keep: Iterable[str]) -> None:
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        cur = Path(dirpath)
+        if cur == root or cur.relative_to(root).parts[0] in keep:
+            continue
+        if not os.listdir(cur):
+            cur.rmdir()
+
+
+class Stager:
+    """Stages files with the cheapest method the filesystem supports."""
+
+    def __init__(self, mode: str = 'auto') -> None:
+        if mode not in LINK_MODES:
+            raise ValueError(f"invalid link mode '{mode}' (allowed: {', '.join(LINK_MODES)})")
+        self.mode = mode
+        self._reflink_ok = mode in ('auto', 'reflink')
+        self._hardlink_ok = mode in ('auto', 'hardlink')
+        self.stats: Dict[str, int] = {
+            'files': 0, 'reflink': 0, 'hardlink': 0, 'copy': 0, 'written': 0,
+            'bytes_avoided': 0, 'bytes_written': 0, 'unchanged': 0, 'removed': 0,
+        }
+
+    def stage(self, src: Path, dst: Path) -> str:
+        """Place src at dst; return the method that was used."""
+        _unlink_existing(dst)
+        st = src.stat()
+        method = self._link(src, dst)
+        if method == 'copy':
+            shutil.copyfile(src, dst)
+            self.stats['bytes_written'] += st.st_size
+        else:
+            self.stats['bytes_avoided'] += st.st_size
+        if method in ('copy', 'reflink'):
+            # Keep the source mtime so the next sync can tell the copy is current.
+            os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.stats['files'] += 1
+        self.stats[method] += 1
+        return method
+
+    def write_text(self, dst: Path, text: str) -> None:
+        """Write a synthesized file into the staging tree."""
+        _unlink_existing(dst)
+        data = text.encode('utf-8')
+        dst.write_bytes(data)
+        self.stats['files'] += 1
+        self.stats['written'] += 1
+        self.stats['bytes_written'] += len(data)
+
+    def sync(self, desired: Tree, root: Path, keep: Iterable[str] = HUGO_STATE) -> None:
+        """Make ``root`` contain exactly ``desired``.
+
+        Top-level entries named in ``keep`` (Hugo's resource cache and lock) are left alone.
+        """
+        keep = set(keep)
+        existing = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            cur = Path(dirpath)
+            if cur == root:
+                dirnames[:] = [d for d in dirnames if d not in keep]
+                filenames = [f for f in filenames if f not in keep]
+            # Symlinked directories are entries to compare, not trees to descend.
+            for d in [d for d in dirnames if (cur / d).is_symlink()]:
+                dirnames.remove(d)
+                filenames.append(d)
+            for name in filenames:
+                existing.add((cur / name).relative_to(root))
+
+        for rel in sorted(existing - set(desired)):
+            (root / rel).unlink()
+            self.stats['removed'] += 1
+
+        for rel, source in sorted(desired.items()):
+            out = root / rel
+            if rel in existing and _is_current(source, out):
+                self.stats['unchanged'] += 1
+                continue
+            if out.is_dir() and not out.is_symlink():
+                shutil.rmtree(out)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(source, Path):
+                self.stage(source, out)
+            else:
+                self.write_text(out, source)
+
+        _remove_empty_dirs(root, keep)
+
+    def _link(self, src: Path, dst: Path) -> str:
+        if self._reflink_ok:
+            try:
+                _reflink(src, dst)
+                return 'reflink'
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                self._reflink_ok = False
+        if self._hardlink_ok:
+            try:
+                os.link(src, dst)
+                return 'hardlink'
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                self._hardlink_ok = False
+        return 'copy'
+
+    def report(self) -> str:
+        s = self.stats
+        linked = s['reflink'] + s['hardlink']
+        return (f"staged {s['files']} file(s) [{self.mode}], {s['unchanged']} unchanged, "
+                f"{s['removed']} removed: {linked} linked "
+                f"(reflink {s['reflink']}, hardlink {s['hardlink']}), "
+                f"{s['copy']} copied, {s['written']} synthesized; "
+                f"{s['bytes_avoided']} bytes avoided, {s['bytes_written']} bytes written")
@@ -0,0 +1,126 @@
+import unittest
+import json
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audiences import Audience
+from backlinks import SITE_HOST, extract_links, graph_json, link_graph, page_links
+from content_index import Page, output_url
+
+
+def page(rel, visibility="public", groups=None, sha="0"):
+    meta = {"title": rel, "visibility": visibility, "status": "tree"}
+    if groups:
+        meta["groups"] = groups
+    return Page(Path(rel), 0, 0, sha, meta, visibility, "tree", groups or [], output_url(Path(rel)))
+
+
+def visible(pages, audience):
+    return [p.rel.as_posix() for p in pages if audience.includes(p.frontmatter)]
+
+
+class TestExtractLinks(unittest.TestCase):
+    def links(self, body, rel="politik/a.md"):
+        return extract_links(body, rel, output_url(Path(rel)))
+
+    def test_absolute_and_site_urls(self):
+        self.assertEqual(self.links(f"[b](/technik/b/) [c](https://{SITE_HOST}/reisen/c)"),
+                         ["/technik/b/", "/reisen/c/"])
+        self.assertEqual(self.links("[b](/technik/b/#abschnitt) [ext](https://example.org/technik/b/)"),
+                         ["/technik/b/"])
+
+    def test_relative_links_resolve_against_the_page(self):
+        self.assertEqual(self.links("[s](../b/) [t](../../technik/c/)"), ["/politik/b/", "/technik/c/"])
+        self.assertEqual(self.links("[m](b.md) [n](/technik/c.md) [o](../reisen/_index.md)"),
+                         ["/politik/b/", "/technik/c/", "/reisen/"])
+
+    def test_ref_shortcodes(self):
+        body = '{{< ref "b" >}} {{< relref "technik/c.md" >}} {{% ref "/reisen/d.md#x" %}}'
+        self.assertEqual(self.links(body), ["/politik/b/", "/technik/c/", "/reisen/d/"])
+
+    def test_reference_definitions_and_href(self):
+        body = '[b][1]\n\n[1]: /technik/b/ "Titel"\n\n<a href="/reisen/c/">c</a>\n'
+        self.assertEqual(self.links(body), ["/technik/b/", "/reisen/c/"])
+
+    def test_code_files_and_self_links_are_ignored(self):
+        body = "`[x](/technik/x/)`\n```\n[y](/technik/y/)\n```\n![img](/bilder/foto.jpg) [me](/politik/a/)\n"
+        self.assertEqual(self.links(body), [])
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            page("politik/offen.md"),
+            page("politik/geheim.md", visibility="private"),
+            page("reisen/freunde.md", visibility="group", groups=["friends"]),
+            page("technik/ziel.md"),
+        ]
+        self.links = {
+            "politik/offen.md": ["/technik/ziel/"],
+            "politik/geheim.md": ["/technik/ziel/", "/politik/offen/"],
+            "reisen/freunde.md": ["/technik/ziel/"],
+            "technik/ziel.md": ["/politik/geheim/"],
+        }
+
+    def graph(self, audience):
+        return link_graph(self.links, self.pages, visible(self.pages, audience))
+
+    def test_hidden_pages_never_appear_as_backlinks_in_public(self):
+        graph = self.graph(Audience("public"))
+        self.assertEqual(graph["backward"], {"technik/ziel.md": ["politik/offen.md"]})
+        self.assertNotIn("geheim", graph_json(graph))
+        self.assertNotIn("freunde", graph_json(graph))
+
+    def test_both_ends_must_be_visible(self):
+        graph = self.graph(Audience("group", "friends"))
+        self.assertEqual(graph["backward"], {"technik/ziel.md": ["politik/offen.md", "reisen/freunde.md"]})
+        # ziel links to a private page: no forward edge for the group either.
+        self.assertNotIn("technik/ziel.md", graph["forward"])
+
+    def test_private_sees_everything(self):
+        graph = self.graph(Audience("private"))
+        self.assertEqual(graph["backward"]["politik/geheim.md"], ["technik/ziel.md"])
+        self.assertEqual(graph["backward"]["politik/offen.md"], ["politik/geheim.md"])
+
+    def test_graph_json_is_stable(self):
+        graph = self.graph(Audience("private"))
+        self.assertEqual(json.loads(graph_json(graph)), graph)
+        self.assertEqual(graph_json(graph), graph_json(self.graph(Audience("private"))))
+
+
+class TestPageLinksCache(unittest.TestCase):
+    def setUp(self):
+        self.content = Path(tempfile.mkdtemp())
+        (self.content / "politik").mkdir()
+        self.path = self.content / "politik" / "a.md"
+        self.path.write_text("---\ntitle: A\n---\n[b](/technik/b/)\n", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.content)
+
+    def test_cached_entry_is_reused_while_the_hash_matches(self):
+        cache = {}
+        links, parsed = page_links(self.content, [page("politik/a.md", sha="1")], cache)
+        self.assertEqual((links, parsed), ({"politik/a.md": ["/technik/b/"]}, 1))
+
+        # Same hash: the file is not read again, even if it changed behind the index's back.
+        self.path.write_text("---\ntitle: A\n---\n[c](/technik/c/)\n", encoding="utf-8")
+        links, parsed = page_links(self.content, [page("politik/a.md", sha="1")], cache)
+        self.assertEqual((links, parsed), ({"politik/a.md": ["/technik/b/"]}, 0))
+
+        links, parsed = page_links(self.content, [page("politik/a.md", sha="2")], cache)
+        self.assertEqual((links, parsed), ({"politik/a.md": ["/technik/c/"]}, 1))
+        self.assertEqual(cache, {"politik/a.md": ["2", ["/technik/c/"]]})
+
+    def test_cache_is_pruned_to_current_pages(self):
+        cache = {"weg.md": ["x", ["/politik/a/"]]}
+        page_links(self.content, [page("politik/a.md", sha="1")], cache)
+        self.assertEqual(sorted(cache), ["politik/a.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
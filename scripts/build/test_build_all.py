@@ -0,0 +1,97 @@
+import unittest
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audiences import parse_audiences
+import build_all
+from build_all import cache_hits, hugo_command, input_hash, run_step
+from tree_hash import TreeHasher
+
+AUDIENCES = parse_audiences("public,group:friends,private")
+DC = ["docker-compose"]
+HUGO = "hugo v0.111.3+extended linux/amd64"
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for a in AUDIENCES:
+            site = self.site(a)
+            (site / "content").mkdir(parents=True)
+            (site / "content" / "_index.md").write_text(f"---\ntitle: {a.spec}\n---\n", encoding="utf-8")
+            (site / "hugo.toml").write_text('title = "Garten"\n', encoding="utf-8")
+            (self.root / a.out_dir).mkdir(parents=True)
+            (self.root / a.out_dir / "index.html").write_text(f"<h1>{a.spec}</h1>", encoding="utf-8")
+        # Entries as build_all.py stores them after a build that passed its checks.
+        hasher = TreeHasher()
+        self.entries = {a.spec: {"input": digest, "output": hasher.hash(self.root / a.out_dir)}
+                        for a, digest in self.inputs().items()}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def site(self, audience):
+        return self.root / ".build" / f"site-{audience.name}"
+
+    def inputs(self, hugo=HUGO):
+        hasher = TreeHasher()
+        return {a: input_hash(hasher, self.site(a), hugo_command(DC, a), hugo) for a in AUDIENCES}
+
+    def hits(self, hugo=HUGO):
+        return {a.spec for a in cache_hits(TreeHasher(), self.entries, self.inputs(hugo), self.root)}
+
+    def test_unchanged_input_is_a_hit_for_every_audience(self):
+        self.assertEqual(self.hits(), {"public", "group:friends", "private"})
+
+    def test_changing_one_staged_file_invalidates_only_that_audience(self):
+        page = self.site(AUDIENCES[2]) / "content" / "_index.md"
+        page.write_text("---\ntitle: private, edited\n---\n", encoding="utf-8")
+        self.assertEqual(self.hits(), {"public", "group:friends"})
+
+    def test_added_file_and_hugo_state(self):
+        site = self.site(AUDIENCES[0])
+        (site / "resources" / "_gen").mkdir(parents=True)
+        (site / "resources" / "_gen" / "x.css").write_text("a{}", encoding="utf-8")
+        (site / ".hugo_build.lock").write_text("", encoding="utf-8")
+        self.assertEqual(self.hits(), {"public", "group:friends", "private"})
+        (site / "content" / "neu.md").write_text("---\ntitle: Neu\n---\n", encoding="utf-8")
+        self.assertEqual(self.hits(), {"group:friends", "private"})
+
+    def test_other_hugo_version_invalidates_everything(self):
+        self.assertEqual(self.hits("hugo v0.120.0+extended linux/amd64"), set())
+
+    def test_touched_or_missing_output_is_a_miss(self):
+        (self.root / AUDIENCES[1].out_dir / "index.html").write_text("changed", encoding="utf-8")
+        shutil.rmtree(self.root / AUDIENCES[2].out_dir)
+        self.assertEqual(self.hits(), {"public"})
+
+
+class TestRunStep(unittest.TestCase):
+    def setUp(self):
+        self.timings_dir = Path(tempfile.mkdtemp())
+        self.saved = build_all.TIMINGS_DIR
+        build_all.TIMINGS_DIR = self.timings_dir
+
+    def tearDown(self):
+        build_all.TIMINGS_DIR = self.saved
+        shutil.rmtree(self.timings_dir)
+
+    def test_missing_command_fails_the_step(self):
+        step = run_step("hugo:public", ["/nonexistent/docker-compose", "version"])
+        self.assertEqual(step["name"], "hugo:public")
+        self.assertEqual(step["cmd"], ["/nonexistent/docker-compose", "version"])
+        self.assertEqual(step["returncode"], 127)
+        self.assertIn("/nonexistent/docker-compose", step["output"])
+        self.assertIn("seconds", step)
+
+    def test_command_output_and_returncode(self):
+        step = run_step("check:x", [sys.executable, "-c", "import sys; print('out'); sys.exit(3)"])
+        self.assertEqual((step["returncode"], step["output"]), (3, "out\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from content_index import ContentIndex, open_index
+
+
+class TestRefresh(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.content = self.test_dir / "content"
+        self.db = self.test_dir / "index.sqlite"
+        self.write("_index.md", "public")
+        self.write("politik/a.md", "public")
+        self.write("politik/b.md", "private")
+        with open_index(self.content, self.db) as index:
+            self.assertEqual(index.refresh_stats, {"scanned": 3, "rehashed": 0, "parsed": 3, "removed": 0})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, rel, visibility):
+        path = self.content / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"---\ntitle: {rel}\nvisibility: {visibility}\n---\n", encoding="utf-8")
+        return path
+
+    def refresh(self):
+        index = ContentIndex(self.content, self.db)
+        self.addCleanup(index.close)
+        return index, index.refresh()
+
+    def test_unchanged_file_is_reused_by_mtime_and_size(self):
+        # Same size and mtime: the file is not read, even though its bytes differ.
+        path = self.content / "politik/b.md"
+        st = path.stat()
+        path.write_text(path.read_text(encoding="utf-8").replace("private", "publicx"), encoding="utf-8")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        index, stats = self.refresh()
+        self.assertEqual(stats, {"scanned": 3, "rehashed": 0, "parsed": 0, "removed": 0})
+        self.assertEqual(index.get(Path("politik/b.md")).visibility, "private")
+
+    def test_touched_file_with_identical_bytes_is_reused_by_hash(self):
+        path = self.content / "politik/a.md"
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        index, stats = self.refresh()
+        self.assertEqual(stats, {"scanned": 3, "rehashed": 1, "parsed": 0, "removed": 0})
+        self.assertEqual(index.get(Path("politik/a.md")).mtime_ns, st.st_mtime_ns + 10**9)
+        # The new mtime is stored: the next refresh does not hash it again.
+        self.assertEqual(self.refresh()[1]["rehashed"], 0)
+
+    def test_edited_file_is_parsed_again(self):
+        path = self.write("politik/a.md", "group\ngroups: [friends]")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        index, stats = self.refresh()
+        self.assertEqual(stats, {"scanned": 3, "rehashed": 0, "parsed": 1, "removed": 0})
+        page = index.get(Path("politik/a.md"))
+        self.assertEqual((page.visibility, page.groups), ("group", ["friends"]))
+
+    def test_deleted_file_is_removed(self):
+        (self.content / "politik/b.md").unlink()
+        index, stats = self.refresh()
+        self.assertEqual(stats, {"scanned": 2, "rehashed": 0, "parsed": 0, "removed": 1})
+        self.assertIsNone(index.get(Path("politik/b.md")))
+        self.assertEqual([p.rel.as_posix() for p in index.pages()], ["_index.md", "politik/a.md"])
+
+    def test_all_changes_in_one_refresh(self):
+        a = self.content / "politik/a.md"
+        st = a.stat()
+        os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        b = self.write("politik/b.md", "public")
+        os.utime(b, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+        (self.content / "_index.md").unlink()
+        self.write("technik/c.md", "public")
+        index, stats = self.refresh()
+        self.assertEqual(stats, {"scanned": 3, "rehashed": 1, "parsed": 2, "removed": 1})
+        self.assertEqual(index.refresh_stats, stats)
+
+    def test_roots_share_one_database(self):
+        other = self.test_dir / "other"
+        other.mkdir()
+        (other / "x.md").write_text("---\ntitle: x\n---\n", encoding="utf-8")
+        with open_index(other, self.db) as index:
+            self.assertEqual([p.rel.as_posix() for p in index.pages()], ["x.md"])
+        self.assertEqual(self.refresh()[1]["removed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+import unittest
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from audiences import Audience
+from content_index import Page, output_url
+from leak_check import candidates, find_leaks, output_policy
+from output_manifest import RACY_NS, TreeSnapshot
+
+LEAK_CHECK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "leak_check.py")
+PUBLIC = Audience("public")
+FRIENDS = Audience("group", "friends")
+
+
+def page(rel, visibility="public", status="tree", groups=None):
+    meta = {"title": rel, "visibility": visibility, "status": status}
+    if groups:
+        meta["groups"] = groups
+    return Page(Path(rel), 0, 0, "", meta, visibility, status, groups or [], output_url(Path(rel)))
+
+
+PAGES = [
+    page("_index.md"),
+    page("politik/_index.md", visibility="private"),
+    page("politik/offen.md"),
+    page("politik/geheim.md", visibility="private"),
+    page("reisen/_index.md", visibility="private"),
+    page("reisen/freunde.md", visibility="group", groups=["friends"]),
+    page("technik/entwurf.md", status="seedling"),
+]
+
+
+class TestOutputPolicy(unittest.TestCase):
+    def test_public(self):
+        allowed, disallowed = output_policy(PAGES, PUBLIC)
+        self.assertEqual(allowed, {"index.html", "politik/index.html", "politik/offen/index.html"})
+        self.assertEqual(disallowed, {"politik/geheim/index.html", "reisen/index.html",
+                                      "reisen/freunde/index.html", "technik/entwurf/index.html"})
+
+    def test_group_sees_its_pages_and_their_sections(self):
+        allowed, disallowed = output_policy(PAGES, FRIENDS)
+        self.assertIn("reisen/freunde/index.html", allowed)
+        self.assertIn("reisen/index.html", allowed)
+        self.assertIn("technik/entwurf/index.html", allowed)
+        self.assertEqual(disallowed, {"politik/geheim/index.html"})
+
+
+class TestFindLeaks(unittest.TestCase):
+    def test_disallowed_and_orphaned_pages_are_leaks(self):
+        allowed, disallowed = output_policy(PAGES, PUBLIC)
+        present = allowed | {
+            "politik/geheim/index.html",   # hidden from public
+            "politik/geloescht/index.html",  # source no longer exists
+            "tags/reise/index.html",       # taxonomy, not content
+            "archiv/index.html",           # section without _index.md
+        }
+        self.assertEqual(find_leaks(PAGES, allowed, disallowed, present),
+                         ["politik/geheim/index.html", "politik/geloescht/index.html"])
+
+    def test_only_given_paths_are_examined(self):
+        allowed, disallowed = output_policy(PAGES, PUBLIC)
+        self.assertEqual(find_leaks(PAGES, allowed, disallowed, {"politik/offen/index.html"}), [])
+
+
+class TestCandidates(unittest.TestCase):
+    def setUp(self):
+        self.out = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def write(self, *rels):
+        for rel in rels:
+            (self.out / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.out / rel).write_text("<html></html>", encoding="utf-8")
+
+    def test_without_previous_run_everything_is_examined(self):
+        self.write("index.html", "a/index.html")
+        snapshot = TreeSnapshot(self.out).scan()
+        present = {"index.html", "a/index.html"}
+        self.assertEqual(candidates(present, set(), set(), snapshot, None), present)
+
+    def test_added_changed_and_previously_leaked_pages(self):
+        self.write("index.html", "a/index.html", "b/index.html", "c/index.html")
+        first = TreeSnapshot(self.out).scan()
+        self.write("d/index.html")
+        snapshot = TreeSnapshot(self.out, first.as_dict()).scan()
+        previous = {
+            "allowed": ["index.html", "a/index.html", "b/index.html"],
+            "disallowed": [],
+            "leaks": ["c/index.html"],
+        }
+        # a's source became private: its verdict may change.
+        allowed, disallowed = {"index.html", "b/index.html"}, {"a/index.html"}
+        present = {"index.html", "a/index.html", "b/index.html", "c/index.html", "d/index.html"}
+        self.assertEqual(candidates(present, allowed, disallowed, snapshot, previous),
+                         {"a/index.html", "c/index.html", "d/index.html"})
+
+
+class TestTreeSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.out = Path(tempfile.mkdtemp())
+        (self.out / "a").mkdir()
+        (self.out / "a" / "index.html").write_text("", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def rescan(self, dir_mtime_ns, previous_scan_ns):
+        """Add a file to a/ behind the snapshot's back, keeping a/'s mtime at dir_mtime_ns."""
+        os.utime(self.out / "a", ns=(dir_mtime_ns, dir_mtime_ns))
+        first = TreeSnapshot(self.out).scan().as_dict()
+        first["scanned_at_ns"] = previous_scan_ns
+        (self.out / "a" / "neu.html").write_text("", encoding="utf-8")
+        os.utime(self.out / "a", ns=(dir_mtime_ns, dir_mtime_ns))
+        return TreeSnapshot(self.out, first).scan()
+
+    def test_old_listing_is_trusted(self):
+        scan = time.time_ns()
+        snapshot = self.rescan(scan - RACY_NS - 1, scan)
+        self.assertEqual(snapshot.files, {"a/index.html"})
+        self.assertEqual(snapshot.reused, 1)
+
+    def test_listing_within_racy_window_is_not_trusted(self):
+        scan = time.time_ns()
+        snapshot = self.rescan(scan - RACY_NS, scan)
+        self.assertEqual(snapshot.files, {"a/index.html", "a/neu.html"})
+        self.assertEqual(snapshot.reused, 0)
+
+    def test_changed_directory_is_listed_again(self):
+        (self.out / "b").mkdir()
+        first = TreeSnapshot(self.out).scan().as_dict()
+        first["scanned_at_ns"] += 10 * RACY_NS
+        (self.out / "b" / "index.html").write_text("", encoding="utf-8")
+        snapshot = TreeSnapshot(self.out, first).scan()
+        self.assertIn("b/index.html", snapshot.files)
+
+
+class TestIncrementalRuns(unittest.TestCase):
+    """leak_check.py across runs, with the output tree aged so listings are reused."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.content = self.test_dir / "content"
+        self.out = self.test_dir / "out"
+        self.manifests = self.test_dir / "manifests"
+        self.age = 100
+        self.source("_index.md", "public")
+        self.source("politik/_index.md", "public")
+        self.source("politik/offen.md", "public")
+        self.source("politik/geheim.md", "private")
+        for tree in ("public", "private"):
+            self.html(tree, "index.html", "politik/index.html", "politik/offen/index.html")
+        self.html("private", "politik/geheim/index.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def source(self, rel, visibility):
+        path = self.content / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"---\ntitle: {rel}\nvisibility: {visibility}\nstatus: tree\n---\n", encoding="utf-8")
+
+    def html(self, tree, *rels):
+        for rel in rels:
+            path = self.out / tree / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("<html></html>", encoding="utf-8")
+
+    def settle(self):
+        """Backdate every output dir (to a new time each call) so the next run trusts its listing."""
+        self.age += 10
+        stamp = time.time_ns() - self.age * 10**9
+        for dirpath, _, _ in os.walk(self.out):
+            os.utime(dirpath, ns=(stamp, stamp))
+
+    def run_check(self, *extra):
+        proc = subprocess.run(
+            [sys.executable, LEAK_CHECK, "--source", str(self.content), "--out", str(self.out),
+             "--index", ":memory:", "--manifest-dir", str(self.manifests), *extra],
+            capture_output=True, text=True)
+        return proc.returncode, proc.stdout
+
+    def test_page_removed_by_fix_and_regenerated_is_caught_again(self):
+        self.html("public", "politik/geheim/index.html")
+        self.settle()
+        rc, output = self.run_check("--audiences", "public", "--fix")
+        self.assertEqual(rc, 0)
+        self.assertIn("removed", output)
+        self.assertFalse((self.out / "public/politik/geheim").exists())
+
+        self.html("public", "politik/geheim/index.html")
+        self.settle()
+        rc, output = self.run_check("--audiences", "public")
+        self.assertEqual(rc, 1)
+        self.assertIn("politik/geheim/index.html", output)
+
+    def test_orphan_is_flagged_after_its_source_is_deleted(self):
+        self.settle()
+        self.assertEqual(self.run_check("--audiences", "public")[0], 0)
+        (self.content / "politik/offen.md").unlink()
+        rc, output = self.run_check("--audiences", "public")
+        self.assertEqual(rc, 1)
+        self.assertIn("politik/offen/index.html", output)
+        self.assertEqual(self.run_check("--audiences", "public", "--fix")[0], 0)
+        self.assertFalse((self.out / "public/politik/offen").exists())
+
+    def test_unchanged_output_is_not_examined_again(self):
+        self.settle()
+        self.assertIn("(3 of 3 page(s) examined)", self.run_check("--audiences", "public")[1])
+        self.assertIn("(0 of 3 page(s) examined)", self.run_check("--audiences", "public")[1])
+
+    def test_manifest_keeps_audiences_of_other_runs(self):
+        self.assertEqual(self.run_check("--audiences", "public")[0], 0)
+        self.assertEqual(self.run_check("--audiences", "private")[0], 0)
+        manifest = json.loads((self.manifests / "leak_check.json").read_text(encoding="utf-8"))
+        self.assertEqual(sorted(manifest["audiences"]), ["private", "public"])
+
+        shutil.rmtree(self.out / "private")
+        self.run_check("--audiences", "private")
+        manifest = json.loads((self.manifests / "leak_check.json").read_text(encoding="utf-8"))
+        self.assertEqual(sorted(manifest["audiences"]), ["public"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import shutil
+import tempfile
+import threading
+import time
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from atomicio import path_lock
+from sanitize_images import sanitize_file, strip_jpeg, strip_png
+
+
+def segment(marker, payload):
+    return bytes((0xFF, marker)) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+APP0 = segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+EXIF = segment(0xE1, b"Exif\x00\x00GPSLatitude 52.5200 GPSLongitude 13.4050")
+DQT = segment(0xDB, b"\x00" + bytes(range(64)))
+DHT = segment(0xC4, b"\x00" + bytes(16))
+SOF = segment(0xC0, b"\x08\x00\x01\x00\x01\x01\x01\x11\x00")
+SOS = segment(0xDA, b"\x01\x01\x00\x00\x3f\x00")
+# Entropy-coded data with a stuffed FF00 and a restart marker.
+SCAN = b"\x12\x34\xff\x00\x56\xff\xd0\x78"
+EOI = b"\xff\xd9"
+
+
+def jpeg(*parts):
+    return b"\xff\xd8" + b"".join(parts)
+
+
+class TestStripJpeg(unittest.TestCase):
+    def test_exif_is_removed_and_image_data_kept(self):
+        clean = strip_jpeg(jpeg(APP0, EXIF, DQT, SOF, DHT, SOS, SCAN, EOI))
+        self.assertEqual(clean, jpeg(APP0, DQT, SOF, DHT, SOS, SCAN, EOI))
+
+    def test_trailer_with_exif_after_eoi_is_dropped(self):
+        # MPO secondary image / motion-photo style trailer carrying its own GPS data.
+        trailer = jpeg(EXIF, SOF, SOS, SCAN, EOI) + b"MotionPhoto_Data"
+        clean = strip_jpeg(jpeg(APP0, DQT, SOF, SOS, SCAN, EOI) + trailer)
+        self.assertEqual(clean, jpeg(APP0, DQT, SOF, SOS, SCAN, EOI))
+        self.assertNotIn(b"GPS", clean)
+
+    def test_progressive_scans_and_segments_between_them_are_kept(self):
+        data = jpeg(APP0, SOF, DHT, SOS, SCAN, DHT, SOS, SCAN, EOI)
+        self.assertEqual(strip_jpeg(data), data)
+
+    def test_metadata_between_scans_is_removed(self):
+        clean = strip_jpeg(jpeg(APP0, SOF, SOS, SCAN, EXIF, SOS, SCAN, EOI))
+        self.assertEqual(clean, jpeg(APP0, SOF, SOS, SCAN, SOS, SCAN, EOI))
+
+    def test_missing_eoi_keeps_the_scan(self):
+        data = jpeg(APP0, SOF, SOS, SCAN)
+        self.assertEqual(strip_jpeg(data), data)
+
+    def test_not_a_jpeg(self):
+        self.assertIsNone(strip_jpeg(b"GIF89a"))
+        self.assertIsNone(strip_png(b"\xff\xd8"))
+
+
+class TestSanitizeFile(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = Path(self.test_dir) / "photo.jpg"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_strips_in_place(self):
+        self.path.write_bytes(jpeg(APP0, EXIF, SOF, SOS, SCAN, EOI) + jpeg(EXIF, SOS, SCAN, EOI))
+        _, outcome, removed, _ = sanitize_file(str(self.path))
+        self.assertEqual(outcome, "stripped")
+        self.assertEqual(self.path.read_bytes(), jpeg(APP0, SOF, SOS, SCAN, EOI))
+        self.assertGreater(removed, 0)
+        self.assertEqual(sanitize_file(str(self.path))[1], "clean")
+
+    def test_waits_for_a_writer_holding_the_path_lock(self):
+        self.path.write_bytes(jpeg(APP0, EXIF, SOF, SOS, SCAN, EOI))
+        uploaded = jpeg(APP0, DQT, SOF, SOS, SCAN, EOI)
+        with path_lock(self.path):
+            worker = threading.Thread(target=sanitize_file, args=(str(self.path),))
+            worker.start()
+            time.sleep(0.1)
+            self.assertTrue(worker.is_alive())
+            # An upload replacing the file while the sanitizer waits must survive.
+            self.path.write_bytes(uploaded)
+        worker.join(5)
+        self.assertEqual(self.path.read_bytes(), uploaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from staging import LINK_MODES, Stager
+
+
+class StagingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.src = self.test_dir / "site"
+        self.root = self.test_dir / "stage"
+        (self.src / "content" / "politik").mkdir(parents=True)
+        self.page = self.src / "content" / "politik" / "a.md"
+        self.page.write_text("---\ntitle: A\n---\nText\n", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+
+class TestLinkModes(StagingTestCase):
+    def test_symlink_mode_is_rejected(self):
+        self.assertNotIn("symlink", LINK_MODES)
+        with self.assertRaises(ValueError):
+            Stager("symlink")
+
+    def test_left_over_symlink_is_replaced_by_a_file(self):
+        out = self.root / "content" / "a.md"
+        out.parent.mkdir(parents=True)
+        os.symlink(self.page, out)
+        Stager("copy").sync({Path("content/a.md"): self.page}, self.root)
+        self.assertFalse(out.is_symlink())
+        self.assertEqual(out.read_bytes(), self.page.read_bytes())
+
+    def test_hardlinked_source_is_never_written_through(self):
+        rel = Path("content/a.md")
+        stager = Stager("hardlink")
+        stager.sync({rel: self.page}, self.root)
+        self.assertEqual(os.stat(self.root / rel).st_ino, os.stat(self.page).st_ino)
+
+        # The same path becomes synthesized text: the link is replaced, the source untouched.
+        stager.sync({rel: "generated\n"}, self.root)
+        self.assertEqual((self.root / rel).read_text(encoding="utf-8"), "generated\n")
+        self.assertEqual(self.page.read_text(encoding="utf-8"), "---\ntitle: A\n---\nText\n")
+        self.assertNotEqual(os.stat(self.root / rel).st_ino, os.stat(self.page).st_ino)
+
+
+class TestSync(StagingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = self.src / "content" / "politik" / "b.md"
+        self.other.write_text("---\ntitle: B\n---\n", encoding="utf-8")
+        self.desired = {
+            Path("content/politik/a.md"): self.page,
+            Path("content/politik/b.md"): self.other,
+            Path("content/politik/_index.md"): "---\ntitle: Politik\n---\n",
+        }
+
+    def staged(self):
+        return sorted(p.relative_to(self.root).as_posix() for p in self.root.rglob("*") if p.is_file())
+
+    def test_unchanged_files_are_left_alone(self):
+        Stager("copy").sync(self.desired, self.root)
+        inodes = {rel: os.stat(self.root / rel).st_ino for rel in self.desired}
+        stager = Stager("copy")
+        stager.sync(self.desired, self.root)
+        self.assertEqual(stager.stats["unchanged"], 3)
+        self.assertEqual(stager.stats["files"], 0)
+        self.assertEqual({rel: os.stat(self.root / rel).st_ino for rel in self.desired}, inodes)
+
+    def test_removed_file_and_empty_dir_are_deleted(self):
+        Stager("copy").sync(self.desired, self.root)
+        stager = Stager("copy")
+        stager.sync({Path("content/_index.md"): "home\n"}, self.root)
+        self.assertEqual(self.staged(), ["content/_index.md"])
+        self.assertFalse((self.root / "content" / "politik").exists())
+        self.assertEqual(stager.stats["removed"], 3)
+
+    def test_replaced_source_is_staged_again(self):
+        Stager("copy").sync(self.desired, self.root)
+        replacement = self.src / "a.new"
+        replacement.write_text("---\ntitle: A2\n---\nNeu\n", encoding="utf-8")
+        os.replace(replacement, self.page)
+        self.desired[Path("content/politik/_index.md")] = "---\ntitle: Politik 2\n---\n"
+        stager = Stager("copy")
+        stager.sync(self.desired, self.root)
+        self.assertEqual(stager.stats["copy"], 1)
+        self.assertEqual(stager.stats["written"], 1)
+        self.assertEqual(stager.stats["unchanged"], 1)
+        self.assertEqual((self.root / "content/politik/a.md").read_bytes(), self.page.read_bytes())
+
+    def test_file_replaced_by_directory(self):
+        Stager("copy").sync({Path("content/politik"): "not a dir\n"}, self.root)
+        Stager("copy").sync(self.desired, self.root)
+        self.assertEqual(self.staged(), sorted(rel.as_posix() for rel in self.desired))
+
+    def test_hardlink_then_copy(self):
+        rel = Path("content/politik/a.md")
+        Stager("hardlink").sync(self.desired, self.root)
+        self.assertEqual(os.stat(self.root / rel).st_ino, os.stat(self.page).st_ino)
+
+        # Same content through a hardlink counts as current in copy mode too.
+        stager = Stager("copy")
+        stager.sync(self.desired, self.root)
+        self.assertEqual(stager.stats["unchanged"], 3)
+
+        # Once the source is replaced the new version is copied, not linked.
+        replacement = self.src / "a.new"
+        replacement.write_text("---\ntitle: A2\n---\n", encoding="utf-8")
+        os.replace(replacement, self.page)
+        stager = Stager("copy")
+        stager.sync(self.desired, self.root)
+        self.assertEqual(stager.stats["copy"], 1)
+        self.assertNotEqual(os.stat(self.root / rel).st_ino, os.stat(self.page).st_ino)
+        self.assertEqual((self.root / rel).read_bytes(), self.page.read_bytes())
+
+    def test_hugo_state_is_preserved(self):
+        Stager("copy").sync(self.desired, self.root)
+        cached = self.root / "resources" / "_gen" / "images" / "x.jpg"
+        cached.parent.mkdir(parents=True)
+        cached.write_bytes(b"img")
+        lock = self.root / ".hugo_build.lock"
+        lock.write_bytes(b"")
+        Stager("copy").sync({}, self.root)
+        self.assertTrue(cached.is_file())
+        self.assertTrue(lock.is_file())
+        self.assertEqual(self.staged(), [".hugo_build.lock", "resources/_gen/images/x.jpg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
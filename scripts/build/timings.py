@@ -0,0 +1,93 @@
+"""Phase timings and optional cProfile dumps for the build and check tools.
+
+Every tool wraps its work in ``instrument(args, name)`` and its phases in
+``timings.phase(...)``. Timings are written as JSON when ``--timings PATH``
+is given ('-' prints to stdout) or, without it, to
+``$BUILD_TIMINGS_DIR/<tool>.json`` when that variable is set (build_all.py
+does so and folds the files into its build report). ``--profile PATH``
+additionally dumps cProfile stats for ``python -m pstats PATH``.
+
+JSON layout::
+
+    {"tool": "filter_site", "total_seconds": 1.23,
+     "phases": {"index": 0.4, "plan": 0.1, ...},   # seconds, summed per name
+     "counters": {"pages": 812, "bytes_written": 0, ...}}
+"""
+from __future__ import annotations
+import argparse
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, Iterator, Optional
+
+TIMINGS_DIR_ENV = 'BUILD_TIMINGS_DIR'
+
+
+class Timings:
+    def __init__(self, tool: str) -> None:
+        self.tool = tool
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block; repeated phases of the same name add up."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, **counters: int) -> None:
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def as_dict(self) -> Dict:
+        return {
+            'tool': self.tool,
+            'total_seconds': round(time.perf_counter() - self._started, 4),
+            'phases': {k: round(v, 4) for k, v in self.phases.items()},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument('--timings', metavar='PATH',
+                    help=f"write phase timings as JSON ('-' for stdout; default ${TIMINGS_DIR_ENV}/<tool>.json)")
+    ap.add_argument('--profile', metavar='PATH', help='write cProfile stats to PATH')
+
+
+def timings_path(tool: str, requested: Optional[str]) -> Optional[str]:
+    if requested:
+        return requested
+    directory = os.environ.get(TIMINGS_DIR_ENV)
+    return str(Path(directory) / f'{tool}.json') if directory else None
+
+
+@contextmanager
+def instrument(args: argparse.Namespace, tool: str) -> Iterator[Timings]:
+    """Collect timings (and a profile) for the wrapped tool run."""
+    timings = Timings(tool)
+    profiler = None
+    if getattr(args, 'profile', None):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield timings
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        dest = timings_path(tool, getattr(args, 'timings', None))
+        if dest == '-':
+            print(json.dumps(timings.as_dict()))
+        elif dest:
+            Path(dest).parent.mkdir(parents=True, exist_ok=True)
+            Path(dest).write_text(json.dumps(timings.as_dict(), indent=2), encoding='utf-8')
+            if dest == getattr(args, 'timings', None):
+                print(f'[{tool}] timings written to {dest}', file=sys.stderr)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Merkle hashes of directory trees, for skipping builds whose input is unchanged.
+
+A file hashes to the sha256 of its bytes, a directory to the sha256 of its
+sorted ``<kind> <name> <hash>`` entries, so two trees hash alike exactly
+when they hold the same names and bytes; timestamps, inodes and how a file
+was staged (hardlink, reflink, copy) do not matter. Symlinks are followed.
+
+File digests are cached by path with (inode, size, mtime). Staging trees
+are mostly hardlinks to the sources, so an unchanged tree costs one stat
+per file and nothing is read. Files modified within ``RACY_NS`` of hashing
+are not cached, since they may change again within the filesystem's
+timestamp granularity.
+"""
+from __future__ import annotations
+import hashlib
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from output_manifest import RACY_NS  # noqa: E402
+
+READ_CHUNK = 1024 * 1024
+
+# Absolute path -> [inode, size, mtime_ns, sha256]
+FileHashes = Dict[str, list]
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TreeHasher:
+    """Hashes trees, reusing and refreshing a cache of file digests."""
+
+    def __init__(self, cache: Optional[FileHashes] = None) -> None:
+        self.cache: FileHashes = cache if cache is not None else {}
+        self.seen: Set[str] = set()
+        self.files = 0
+        self.read = 0
+        self._now_ns = 0
+
+    def hash(self, root: Path, exclude: Iterable[str] = ()) -> str:
+        """Hash of the tree below root; exclude names top-level entries to leave out."""
+        self._now_ns = time.time_ns()
+        return self._dir(str(root), set(exclude))
+
+    def _dir(self, path: str, exclude: set) -> str:
+        with os.scandir(path) as it:
+            entries = sorted((e for e in it if e.name not in exclude), key=lambda e: e.name)
+        h = hashlib.sha256()
+        for entry in entries:
+            if entry.is_dir():
+                kind, digest = 'd', self._dir(entry.path, set())
+            else:
+                kind, digest = 'f', self._file(entry)
+            h.update(f'{kind} {entry.name} {digest}\n'.encode('utf-8', 'surrogateescape'))
+        return h.hexdigest()
+
+    def _file(self, entry: os.DirEntry) -> str:
+        st = entry.stat()
+        key = [st.st_ino, st.st_size, st.st_mtime_ns]
+        self.files += 1
+        self.seen.add(entry.path)
+        cached = self.cache.get(entry.path)
+        if cached is not None and cached[:3] == key:
+            return cached[3]
+        digest = file_digest(entry.path)
+        self.read += 1
+        if st.st_mtime_ns < self._now_ns - RACY_NS:
+            self.cache[entry.path] = key + [digest]
+        else:
+            self.cache.pop(entry.path, None)
+        return digest
+
+    def pruned(self) -> FileHashes:
+        """The cache restricted to files hashed by this hasher."""
+        return {path: entry for path, entry in self.cache.items() if path in self.seen}
@@ -1,111 +1,259 @@
 #!/usr/bin/env python3
-"""Validate frontmatter of all content markdown files."""
+"""Validate frontmatter of all content markdown files.
+
+Per-file rules run on a process pool for files whose content hash is not
+in the cache yet; the cache keeps every file's diagnostics (also "none"),
+so unchanged files are never re-read. Cross-file rules (duplicate
+dossier_key, timeline entries pointing to a missing dossier) run over the
+content index on every call. Diagnostics carry line numbers and can be
+written as text, JSON or SARIF 2.1.0.
+"""
 from __future__ import annotations
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
 import re
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "build"))
+from atomicio import atomic_write  # noqa: E402
+from content_index import DEFAULT_INDEX_PATH, Page, open_index  # noqa: E402
+from frontmatter_parser import FrontMatter, parse_lines, read_header_lines  # noqa: E402
+from timings import Timings, add_arguments as add_timing_arguments, instrument  # noqa: E402
+
 VALID_TYPES = {"note", "trip", "timeline-entry", "dossier", "article"}
 VALID_SEGMENTS = {"politik", "technik", "reisen"}
 VALID_STATUSES = {"seedling", "plant", "tree"}
 VALID_VISIBILITIES = {"public", "group", "private"}
 REQUIRED_FIELDS = {"title", "type", "segment", "status", "visibility", "date"}
 
+RULES = {
+    "no-frontmatter": "File has no valid frontmatter block",
+    "missing-field": "A required frontmatter field is missing",
+    "invalid-type": "type is not one of the known page types",
+    "invalid-segment": "segment is not one of the known segments",
+    "invalid-status": "status is not seedling, plant or tree",
+    "invalid-visibility": "visibility is not public, group or private",
+    "missing-groups": "visibility 'group' without groups",
+    "duplicate-dossier-key": "Several dossiers share one dossier_key",
+    "missing-dossier": "Timeline entry refers to a dossier_key no dossier has",
+}
+# Bump when per-file rules change, so cached results are not reused.
+RULES_VERSION = 1
+DEFAULT_CACHE = Path(__file__).resolve().parents[2] / ".cache" / "frontmatter-lint.json"
+# Below this many files to lint a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 200
 
-def parse_frontmatter(path: Path) -> dict:
-    """Minimal YAML frontmatter parser (mirrors filter_site.py logic)."""
-    text = path.read_text(encoding="utf-8").replace("\r\n", "\n").replace("\r", "\n")
-    if not text.startswith("---\n"):
-        return {}
+_KEY_RE = re.compile(r"^([A-Za-z0-9_-]+):")
 
-    m = re.match(r"^---\n(.*?)\n---\s*(?:\n|$)", text, re.DOTALL)
-    if not m:
-        return {}
+# {"path": "politik/x.md", "line": 3, "rule": "invalid-type", "message": "..."}; path is
+# relative to the content root until the diagnostics are reported.
+Diagnostic = dict
+
+
+def diagnostic(path: str, line: int, rule: str, message: str) -> Diagnostic:
+    return {"path": path, "line": line, "rule": rule, "message": message}
+
+
+def field_lines(header: list[str]) -> dict[str, int]:
+    """Line number of each top-level key (the opening --- is line 1)."""
+    lines: dict[str, int] = {}
+    for number, line in enumerate(header, start=2):
+        m = _KEY_RE.match(line)
+        if m:
+            lines.setdefault(m.group(1), number)
+    return lines
 
-    data: dict = {}
-    current_list_key: str | None = None
-    for raw in m.group(1).splitlines():
-        line = raw.rstrip()
-        if not line.strip() or line.strip().startswith("#"):
-            continue
-        kv = re.match(r"^([A-Za-z0-9_-]+):\s*(.*)$", line)
-        if kv:
-            key, val = kv.group(1), kv.group(2).strip()
-            current_list_key = None
-            if val.startswith("[") and val.endswith("]"):
-                inner = val[1:-1].strip()
-                data[key] = [x.strip().strip("\"'") for x in inner.split(",") if x.strip()]
-            elif val == "":
-                data[key] = []
-                current_list_key = key
-            else:
-                data[key] = val.strip("\"'")
-            continue
-        lm = re.match(r"^\s*-\s*(.+)$", line)
-        if lm and current_list_key:
-            data.setdefault(current_list_key, []).append(lm.group(1).strip().strip("\"'"))
-    return data
-
-
-def lint_file(path: Path, content_root: Path) -> list[str]:
-    errors: list[str] = []
-    rel = path.relative_to(content_root)
-    fm = parse_frontmatter(path)
 
+def lint_frontmatter(path: str, fm: FrontMatter, lines: dict[str, int]) -> list[Diagnostic]:
     if not fm:
-        errors.append(f"{rel}: no valid frontmatter found")
-        return errors
+        return [diagnostic(path, 1, "no-frontmatter", "no valid frontmatter found")]
+
+    errors: list[Diagnostic] = []
+
+    def error(field: str, rule: str, message: str) -> None:
+        errors.append(diagnostic(path, lines.get(field, 1), rule, message))
 
     # Required fields
-    for field in REQUIRED_FIELDS:
+    for field in sorted(REQUIRED_FIELDS):
         if field not in fm:
-            errors.append(f"{rel}: missing required field '{field}'")
+            error(field, "missing-field", f"missing required field '{field}'")
 
     # Allowed values
     if "type" in fm and fm["type"] not in VALID_TYPES:
-        errors.append(f"{rel}: invalid type '{fm['type']}' (allowed: {VALID_TYPES})")
+        error("type", "invalid-type", f"invalid type '{fm['type']}' (allowed: {sorted(VALID_TYPES)})")
 
     if "segment" in fm and fm["segment"] not in VALID_SEGMENTS:
-        errors.append(f"{rel}: invalid segment '{fm['segment']}' (allowed: {VALID_SEGMENTS})")
+        error("segment", "invalid-segment",
+              f"invalid segment '{fm['segment']}' (allowed: {sorted(VALID_SEGMENTS)})")
 
     if "status" in fm and fm["status"] not in VALID_STATUSES:
-        errors.append(f"{rel}: invalid status '{fm['status']}' (allowed: {VALID_STATUSES})")
+        error("status", "invalid-status", f"invalid status '{fm['status']}' (allowed: {sorted(VALID_STATUSES)})")
 
     if "visibility" in fm and fm["visibility"] not in VALID_VISIBILITIES:
-        errors.append(f"{rel}: invalid visibility '{fm['visibility']}' (allowed: {VALID_VISIBILITIES})")
+        error("visibility", "invalid-visibility",
+              f"invalid visibility '{fm['visibility']}' (allowed: {sorted(VALID_VISIBILITIES)})")
 
     # group visibility requires groups field
     if fm.get("visibility") == "group":
         groups = fm.get("groups")
         if not groups or (isinstance(groups, list) and len(groups) == 0):
-            errors.append(f"{rel}: visibility is 'group' but no groups specified")
+            error("visibility", "missing-groups", "visibility is 'group' but no groups specified")
+
+    return errors
+
+
+def lint_file(content_root: str, rel: str) -> list[Diagnostic]:
+    """Per-file rules for one file, read from disk."""
+    header = read_header_lines(Path(content_root) / rel) or []
+    return lint_frontmatter(rel, parse_lines(header), field_lines(header))
+
 
+def _lint_many(content_root: str, rels: list[str]) -> list[list[Diagnostic]]:
+    return [lint_file(content_root, rel) for rel in rels]
+
+
+def lint_cross_file(content_root: Path, pages: list[Page]) -> list[Diagnostic]:
+    """Rules that need the frontmatter of all pages at once."""
+    dossiers: dict[str, list[Page]] = {}
+    entries: list[Page] = []
+    for page in pages:
+        page_type = page.frontmatter.get("type")
+        if page_type == "dossier" and page.frontmatter.get("dossier_key"):
+            dossiers.setdefault(str(page.frontmatter["dossier_key"]), []).append(page)
+        elif page_type == "timeline-entry" and page.frontmatter.get("dossier"):
+            entries.append(page)
+
+    def located(page: Page, field: str, rule: str, message: str) -> Diagnostic:
+        header = read_header_lines(content_root / page.rel) or []
+        return diagnostic(page.rel.as_posix(), field_lines(header).get(field, 1), rule, message)
+
+    errors: list[Diagnostic] = []
+    for key, owners in sorted(dossiers.items()):
+        if len(owners) > 1:
+            for page in owners:
+                # Same form as the diagnostic's own path once it is reported.
+                others = ", ".join((content_root / p.rel).as_posix() for p in owners if p is not page)
+                errors.append(located(page, "dossier_key", "duplicate-dossier-key",
+                                      f"dossier_key '{key}' is also used by {others}"))
+    for page in entries:
+        key = str(page.frontmatter["dossier"])
+        if key not in dossiers:
+            errors.append(located(page, "dossier", "missing-dossier",
+                                  f"dossier '{key}' does not match the dossier_key of any dossier"))
     return errors
 
 
+def load_cache(path: Path) -> dict[str, list]:
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == RULES_VERSION else {}
+
+
+def save_cache(path: Path, files: dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps({"version": RULES_VERSION, "files": files}, separators=(",", ":")))
+
+
+def sarif(diagnostics: list[Diagnostic]) -> dict:
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "frontmatter-lint",
+                "rules": [{"id": rule, "shortDescription": {"text": text}} for rule, text in RULES.items()],
+            }},
+            "results": [{
+                "ruleId": d["rule"],
+                "level": "error",
+                "message": {"text": d["message"]},
+                "locations": [{"physicalLocation": {
+                    "artifactLocation": {"uri": d["path"]},
+                    "region": {"startLine": d["line"]},
+                }}],
+            } for d in diagnostics],
+        }],
+    }
+
+
 def main() -> int:
-    content_root = Path("site/content")
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", default="site/content")
+    ap.add_argument("--index", default=str(DEFAULT_INDEX_PATH),
+                    help="content metadata index (':memory:' to disable persistence)")
+    ap.add_argument("--cache", default=str(DEFAULT_CACHE), help="per-file results by content hash")
+    ap.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                    help="lint processes (1 lints in-process)")
+    ap.add_argument("--format", choices=["text", "json", "sarif"], default="text")
+    ap.add_argument("--output", metavar="PATH", help="write json/sarif diagnostics here instead of stdout")
+    add_timing_arguments(ap)
+    args = ap.parse_args()
+    with instrument(args, "frontmatter_lint") as timings:
+        return lint(args, timings)
+
+
+def lint(args: argparse.Namespace, timings: Timings) -> int:
+    content_root = Path(args.source)
     if not content_root.is_dir():
         print(f"[FAIL] content root not found: {content_root}", file=sys.stderr)
         return 1
 
-    all_errors: list[str] = []
-    checked = 0
+    with timings.phase("index"):
+        with open_index(content_root, Path(args.index)) as index:
+            pages = index.pages()
+            timings.count(**{f"index_{k}": v for k, v in index.refresh_stats.items()})
+    checked = [page for page in pages if page.rel.name != "_index.md"]
+
+    cache_path = Path(args.cache)
+    cache = load_cache(cache_path)
+    stale = [page.rel.as_posix() for page in checked
+             if cache.get(page.rel.as_posix(), [None])[0] != page.sha256]
+    with timings.phase("lint"):
+        if args.workers > 1 and len(stale) >= PARALLEL_MIN_FILES:
+            size = -(-len(stale) // (args.workers * 4))
+            chunks = [stale[i:i + size] for i in range(0, len(stale), size)]
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                results = [r for rs in pool.map(_lint_many, [str(content_root)] * len(chunks), chunks) for r in rs]
+        else:
+            results = _lint_many(str(content_root), stale)
+    sha = {page.rel.as_posix(): page.sha256 for page in checked}
+    for rel, diagnostics in zip(stale, results):
+        cache[rel] = [sha[rel], diagnostics]
+    if stale or len(cache) != len(sha):
+        save_cache(cache_path, {rel: cache[rel] for rel in sha})
+
+    with timings.phase("cross_file"):
+        diagnostics = [d for page in checked for d in cache[page.rel.as_posix()][1]]
+        diagnostics += lint_cross_file(content_root, pages)
+    diagnostics = [dict(d, path=(content_root / d["path"]).as_posix())
+                   for d in sorted(diagnostics, key=lambda d: (d["path"], d["line"], d["rule"]))]
+    timings.count(files=len(checked), linted=len(stale), errors=len(diagnostics))
 
-    for md in sorted(content_root.rglob("*.md")):
-        if md.name == "_index.md":
-            continue
-        checked += 1
-        all_errors.extend(lint_file(md, content_root))
+    if args.format != "text":
+        if args.format == "sarif":
+            document = sarif(diagnostics)
+        else:
+            document = {"files": len(checked), "errors": len(diagnostics), "diagnostics": diagnostics}
+        text = json.dumps(document, indent=2, ensure_ascii=False) + "\n"
+        if args.output:
+            Path(args.output).write_text(text, encoding="utf-8")
+        else:
+            sys.stdout.write(text)
+        return 1 if diagnostics else 0
 
-    if all_errors:
-        for e in all_errors:
-            print(f"[FAIL] {e}", file=sys.stderr)
-        print(f"\n{len(all_errors)} error(s) in {checked} file(s)", file=sys.stderr)
+    if diagnostics:
+        for d in diagnostics:
+            print(f"[FAIL] {d['path']}:{d['line']}: {d['message']}", file=sys.stderr)
+        print(f"\n{len(diagnostics)} error(s) in {len(checked)} file(s)", file=sys.stderr)
         return 1
 
-    print(f"[OK] {checked} content file(s) passed frontmatter lint")
+    print(f"[OK] {len(checked)} content file(s) passed frontmatter lint ({len(stale)} re-checked)")
     return 0
 
 
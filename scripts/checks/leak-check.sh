@@ -3,8 +3,10 @@ set -euo pipefail
 
 cd "$(dirname "$0")/../.."
 
+# Checks out/public, out/groups/<name> and out/private (whichever exist);
+# extra arguments (e.g. --audiences public) are passed through.
 if [[ "${LEAK_CHECK_STRICT:-0}" == "1" ]]; then
-  python3 scripts/build/leak_check.py --source site/content --public out/public
+  python3 scripts/build/leak_check.py --source site/content --out out "$@"
 else
-  python3 scripts/build/leak_check.py --source site/content --public out/public --fix
+  python3 scripts/build/leak_check.py --source site/content --out out --fix "$@"
 fi
@@ -1,65 +1,247 @@
 #!/usr/bin/env python3
-"""Check for broken internal links in the public HTML output."""
+"""Check for broken internal links in the HTML output of every audience.
+
+Each output tree (out/public, out/groups/<name>, out/private) is listed once
+into a set of files. HTML files are tokenized in parallel and every distinct
+root-relative href is resolved once, against the tree of the audience whose
+URL prefix it carries (/g/<name>/, /private/, otherwise public). Links into
+an audience whose output is not present are not checked.
+
+The previous run is kept in a manifest (see output_manifest.py): per page its
+stat, hash and links, and the broken links found. Only pages whose content
+changed, and pages linking to files that were added or removed, are parsed
+and resolved again; the rest keep their previous verdict. --full checks
+everything.
+"""
 from __future__ import annotations
 
-import re
+import argparse
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+from html.parser import HTMLParser
+import os
 import sys
 from pathlib import Path
+from urllib.parse import unquote
 
-HREF_RE = re.compile(r'href="(/[^"]*)"')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "build"))
+from audiences import DEFAULT_AUDIENCES, Audience, audience_for_url, parse_audiences  # noqa: E402
+from output_manifest import DEFAULT_MANIFEST_DIR, TreeSnapshot, load_manifest, save_manifest, trusted  # noqa: E402
+from timings import Timings, add_arguments as add_timing_arguments, instrument  # noqa: E402
+
+READ_CHUNK = 64 * 1024
+# Below this many HTML files a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 200
+
+
+class HrefParser(HTMLParser):
+    """Collects root-relative href values; fed the document in chunks."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.hrefs: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name == "href" and value and value.startswith("/") and not value.startswith("//"):
+                self.hrefs.append(value)
+
+    handle_startendtag = handle_starttag
+
+
+def extract_hrefs(path: str, known_sha: str | None = None) -> tuple[str, list[str] | None, int]:
+    """Return (sha1, root-relative hrefs, size) of one HTML file.
+
+    hrefs is None when the content still hashes to known_sha.
+    """
+    data = Path(path).read_bytes()
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_sha:
+        return digest, None, len(data)
+    parser = HrefParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for start in range(0, len(data), READ_CHUNK):
+        parser.feed(decoder.decode(data[start:start + READ_CHUNK]))
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return digest, parser.hrefs, len(data)
+
+
+def _extract_many(items: list[tuple[str, str | None]]) -> list[tuple[str, list[str] | None, int]]:
+    return [extract_hrefs(path, sha) for path, sha in items]
+
+
+def resolves(files: set[str], rel: str) -> bool:
+    """Whether a tree-relative URL path names a file or a dir with index.html."""
+    if not rel:
+        return "index.html" in files
+    return rel in files or f"{rel}/index.html" in files
+
+
+def link_target(href: str) -> tuple[Audience, str]:
+    """(audience, tree-relative path) an href points to.
+
+    Fragment and query are dropped and percent-encoding is undone.
+    """
+    target = unquote(href.split("#", 1)[0].split("?", 1)[0])
+    owner = audience_for_url(target)
+    return owner, target[len(owner.url_prefix.rstrip("/")):].strip("/")
+
+
+def target_keys(files: set[str]) -> set[str]:
+    """Tree-relative link targets that files (dis)appearing can affect."""
+    keys = set()
+    for f in files:
+        keys.add(f)
+        if f == "index.html":
+            keys.add("")
+        elif f.endswith("/index.html"):
+            keys.add(f[:-len("/index.html")])
+    return keys
 
 
 def main() -> int:
-    out_dir = Path("out/public")
-    if not out_dir.is_dir():
-        print(f"[FAIL] output directory not found: {out_dir}", file=sys.stderr)
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", default="out", help="output root holding public/, groups/<name>/ and private/")
+    ap.add_argument("--audiences", default=DEFAULT_AUDIENCES,
+                    help="comma separated audiences whose output is checked (missing trees are skipped)")
+    ap.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                    help="parser processes (1 parses in-process)")
+    ap.add_argument("--manifest-dir", default=str(DEFAULT_MANIFEST_DIR),
+                    help="where the previous run is remembered, so only changes are re-examined")
+    ap.add_argument("--full", action="store_true", help="ignore the previous run and check everything")
+    add_timing_arguments(ap)
+    args = ap.parse_args()
+    try:
+        audiences = parse_audiences(args.audiences)
+    except ValueError as e:
+        ap.error(str(e))
+    with instrument(args, "link_check") as timings:
+        return check(args, Path(args.out), audiences, timings)
+
+
+def check(args: argparse.Namespace, out: Path, audiences: list[Audience], timings: Timings) -> int:
+    trees = {a: out / a.out_dir.relative_to("out") for a in audiences}
+    trees = {a: d for a, d in trees.items() if d.is_dir()}
+    if not trees:
+        print(f"[FAIL] no output directory found below {out}", file=sys.stderr)
         return 1
 
-    html_files = sorted(out_dir.rglob("*.html"))
-    if not html_files:
-        print(f"[FAIL] no HTML files found in {out_dir}", file=sys.stderr)
+    manifest_path = Path(args.manifest_dir) / "link_check.json"
+    manifest = None if args.full else load_manifest(manifest_path, out)
+    # Links into a tree that appeared or vanished change verdicts everywhere.
+    if manifest is not None and set(manifest["trees"]) != {a.spec for a in trees}:
+        manifest = None
+    previous = manifest or {"trees": {}, "hrefs": [], "pages": {}, "broken": {}}
+    old_hrefs = previous["hrefs"]
+
+    with timings.phase("scan"):
+        snapshots = {a: TreeSnapshot(d, previous["trees"].get(a.spec)).scan() for a, d in trees.items()}
+        files = {a: snap.files for a, snap in snapshots.items()}
+
+    # (audience, rel) -> [mtime_ns, size, sha1, hrefs]
+    pages: dict[tuple[Audience, str], list] = {}
+    to_read: list[tuple[Audience, str]] = []
+    with timings.phase("stat"):
+        for a, snap in snapshots.items():
+            old_pages = previous["pages"].get(a.spec, {})
+            for rel in sorted(files[a]):
+                if not rel.endswith(".html"):
+                    continue
+                st = os.stat(trees[a] / rel)
+                old = old_pages.get(rel)
+                if old is not None:
+                    old = [old[0], old[1], old[2], [old_hrefs[i] for i in old[3]]]
+                pages[a, rel] = [st.st_mtime_ns, st.st_size] + (old[2:] if old else [None, []])
+                stat_same = old is not None and old[:2] == [st.st_mtime_ns, st.st_size]
+                if not (stat_same and trusted(st.st_mtime_ns, snap.previous.get("scanned_at_ns"))):
+                    to_read.append((a, rel))
+    if not pages:
+        print(f"[FAIL] no HTML files found in {', '.join(str(d) for d in trees.values())}", file=sys.stderr)
         return 1
 
-    broken: list[str] = []
+    changed: set[tuple[Audience, str]] = set()
+    with timings.phase("parse"):
+        items = [(str(trees[a] / rel), pages[a, rel][2]) for a, rel in to_read]
+        if args.workers > 1 and len(items) >= PARALLEL_MIN_FILES:
+            size = -(-len(items) // (args.workers * 4))
+            chunks = [items[i:i + size] for i in range(0, len(items), size)]
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                parsed = [r for rs in pool.map(_extract_many, chunks) for r in rs]
+        else:
+            parsed = _extract_many(items)
+        for key, (digest, hrefs, _) in zip(to_read, parsed):
+            pages[key][2] = digest
+            if hrefs is not None:
+                pages[key][3] = hrefs
+                changed.add(key)
+    timings.count(bytes_read=sum(size for _, _, size in parsed))
+
+    with timings.phase("select"):
+        if manifest is None:
+            recheck = set(pages)
+        else:
+            touched = {(a.spec, key) for a, snap in snapshots.items()
+                       for key in target_keys(files[a] ^ snap.previous_files())}
+            recheck = set(changed)
+            if touched:
+                hit = set()
+                for href in set(old_hrefs).union(*(pages[k][3] for k in changed)):
+                    owner, rel = link_target(href)
+                    if (owner.spec, rel) in touched:
+                        hit.add(href)
+                recheck.update(k for k, page in pages.items() if not hit.isdisjoint(page[3]))
+
+    broken: dict[tuple[Audience, str], list[str]] = {}
+    for (a, rel) in pages:
+        if (a, rel) not in recheck and rel in previous["broken"].get(a.spec, {}):
+            broken[a, rel] = previous["broken"][a.spec][rel]
     checked = 0
-
-    for html_path in html_files:
-        text = html_path.read_text(encoding="utf-8", errors="replace")
-        rel_source = html_path.relative_to(out_dir)
-
-        for match in HREF_RE.finditer(text):
-            href = match.group(1)
-            checked += 1
-
-            # Strip fragment
-            href_clean = href.split("#")[0]
-            if not href_clean or href_clean == "/":
-                continue
-
-            # Resolve to filesystem path
-            target = out_dir / href_clean.lstrip("/")
-
-            if target.is_file():
-                continue
-            if target.is_dir() and (target / "index.html").is_file():
-                continue
-            # Try with trailing slash removed
-            if href_clean.endswith("/"):
-                stripped = out_dir / href_clean.rstrip("/").lstrip("/")
-                if stripped.is_file():
-                    continue
-                if stripped.is_dir() and (stripped / "index.html").is_file():
+    unchecked = 0
+    with timings.phase("resolve"):
+        # Nav, footer and taxonomy links repeat on every page: resolve each once.
+        known: dict[str, bool | None] = {}
+        for key in sorted(recheck, key=lambda k: (k[0].spec, k[1])):
+            for href in pages[key][3]:
+                ok = known.get(href)
+                if href not in known:
+                    owner, rel = link_target(href)
+                    ok = resolves(files[owner], rel) if owner in files else None
+                    known[href] = ok
+                if ok is None:
+                    unchecked += 1
                     continue
-
-            broken.append(f"{rel_source}: broken link {href}")
-
-    if broken:
-        for b in broken:
+                checked += 1
+                if not ok:
+                    broken.setdefault(key, []).append(href)
+    failures = [f"{trees[a] / rel}: broken link {href}"
+                for (a, rel), hrefs in sorted(broken.items(), key=lambda i: (i[0][0].spec, i[0][1]))
+                for href in hrefs]
+    timings.count(files=len(pages), parsed=len(changed), rechecked=len(recheck), links=checked,
+                  unchecked=unchecked, distinct_links=len(known), broken=len(failures))
+
+    with timings.phase("manifest"):
+        table: dict[str, int] = {}
+        stored: dict[str, dict] = {a.spec: {} for a in trees}
+        for (a, rel), (mtime_ns, size, digest, hrefs) in pages.items():
+            stored[a.spec][rel] = [mtime_ns, size, digest, [table.setdefault(h, len(table)) for h in hrefs]]
+        save_manifest(manifest_path, out, {
+            "trees": {a.spec: snap.as_dict() for a, snap in snapshots.items()},
+            "hrefs": list(table),
+            "pages": stored,
+            "broken": {a.spec: {rel: hrefs for (b, rel), hrefs in broken.items() if b == a} for a in trees},
+        })
+
+    if failures:
+        for b in failures:
             print(f"[FAIL] {b}", file=sys.stderr)
-        print(f"\n{len(broken)} broken link(s) in {len(html_files)} file(s)", file=sys.stderr)
+        print(f"\n{len(failures)} broken link(s) in {len(pages)} file(s)", file=sys.stderr)
         return 1
 
-    print(f"[OK] {checked} internal link(s) checked in {len(html_files)} file(s), no broken links")
+    note = f", {unchecked} into audiences without output skipped" if unchecked else ""
+    print(f"[OK] {checked} internal link(s) checked in {len(recheck)} of {len(pages)} changed or affected "
+          f"file(s) ({', '.join(a.spec for a in trees)}), no broken links{note}")
     return 0
 
 
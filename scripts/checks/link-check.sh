@@ -3,4 +3,5 @@ set -euo pipefail
 
 cd "$(dirname "$0")/../.."
 
-python3 scripts/checks/link-check.py
+# Extra arguments (e.g. --audiences public) are passed through.
+python3 scripts/checks/link-check.py "$@"
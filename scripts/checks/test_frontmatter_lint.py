@@ -0,0 +1,134 @@
+import unittest
+import json
+import shutil
+import subprocess
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+FRONTMATTER_LINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontmatter-lint.py")
+
+
+def frontmatter(**fields):
+    meta = {"title": "Titel", "type": "note", "segment": "politik", "status": "tree",
+            "visibility": "public", "date": "2024-05-01"}
+    meta.update(fields)
+    lines = [f"{k}: {v}" for k, v in meta.items() if v is not None]
+    return "---\n" + "\n".join(lines) + "\n---\nText\n"
+
+
+class FrontmatterLintTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.content = self.test_dir / "content"
+        self.cache = self.test_dir / "cache.json"
+        self.timings = self.test_dir / "timings.json"
+        self.write("_index.md", "---\ntitle: Garten\n---\n")
+        self.write("politik/a.md", frontmatter(type="dossier", dossier_key="wahl"))
+        self.write("politik/b.md", frontmatter(type="dossier", dossier_key="wahl"))
+        self.write("politik/c.md", frontmatter(type="timeline-entry", dossier="wahl"))
+        self.write("politik/d.md", frontmatter(type="timeline-entry", dossier="fehlt"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, rel, text):
+        path = self.content / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def run_lint(self, *extra):
+        proc = subprocess.run(
+            [sys.executable, FRONTMATTER_LINT, "--source", str(self.content), "--index", ":memory:",
+             "--cache", str(self.cache), "--workers", "1", "--timings", str(self.timings), *extra],
+            capture_output=True, text=True)
+        return proc.returncode, proc.stdout
+
+    def diagnostics(self):
+        rc, output = self.run_lint("--format", "json")
+        return rc, [(d["path"].replace(self.content.as_posix() + "/", ""), d["line"], d["rule"], d["message"])
+                    for d in json.loads(output)["diagnostics"]]
+
+    def linted(self):
+        return json.loads(self.timings.read_text(encoding="utf-8"))["counters"]["linted"]
+
+
+class TestCrossFileRules(FrontmatterLintTestCase):
+    def expected(self):
+        root = self.content.as_posix()
+        return [
+            ("politik/a.md", 8, "duplicate-dossier-key", f"dossier_key 'wahl' is also used by {root}/politik/b.md"),
+            ("politik/b.md", 8, "duplicate-dossier-key", f"dossier_key 'wahl' is also used by {root}/politik/a.md"),
+            ("politik/d.md", 8, "missing-dossier", "dossier 'fehlt' does not match the dossier_key of any dossier"),
+        ]
+
+    def test_reported_on_the_first_run(self):
+        rc, found = self.diagnostics()
+        self.assertEqual(rc, 1)
+        self.assertEqual(found, self.expected())
+        self.assertEqual(self.linted(), 4)
+
+    def test_reported_when_every_file_is_a_cache_hit(self):
+        self.diagnostics()
+        rc, found = self.diagnostics()
+        self.assertEqual(self.linted(), 0)
+        self.assertEqual(rc, 1)
+        self.assertEqual(found, self.expected())
+
+    def test_other_files_are_named_like_the_diagnostic_path(self):
+        proc = subprocess.run(
+            [sys.executable, FRONTMATTER_LINT, "--source", str(self.content), "--index", ":memory:",
+             "--cache", str(self.cache), "--workers", "1"], capture_output=True, text=True)
+        line = next(line for line in proc.stderr.splitlines() if "politik/a.md:8" in line)
+        self.assertEqual(line, f"[FAIL] {self.content.as_posix()}/politik/a.md:8: dossier_key 'wahl' "
+                               f"is also used by {self.content.as_posix()}/politik/b.md")
+
+
+class TestCache(FrontmatterLintTestCase):
+    def test_changed_content_invalidates_the_cached_result(self):
+        self.write("politik/e.md", frontmatter(status="wild"))
+        self.assertIn(("politik/e.md", 5, "invalid-status",
+                       "invalid status 'wild' (allowed: ['plant', 'seedling', 'tree'])"), self.diagnostics()[1])
+        self.write("politik/e.md", frontmatter())
+        found = self.diagnostics()[1]
+        self.assertEqual(self.linted(), 1)
+        self.assertNotIn("politik/e.md", [d[0] for d in found])
+
+    def test_cache_is_pruned_to_current_files(self):
+        self.run_lint()
+        (self.content / "politik/d.md").unlink()
+        self.run_lint()
+        cache = json.loads(self.cache.read_text(encoding="utf-8"))
+        self.assertEqual(sorted(cache["files"]), ["politik/a.md", "politik/b.md", "politik/c.md"])
+
+
+class TestOutputFormats(FrontmatterLintTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("technik/x.md", "---\ntitle: X\ntype: rezept\nsegment: technik\nstatus: tree\n"
+                                   "visibility: group\ndate: 2024-05-01\n---\n")
+
+    def test_json_line_numbers(self):
+        found = [d for d in self.diagnostics()[1] if d[0] == "technik/x.md"]
+        self.assertEqual([d[:3] for d in found], [
+            ("technik/x.md", 3, "invalid-type"),
+            ("technik/x.md", 6, "missing-groups"),
+        ])
+
+    def test_sarif_line_numbers(self):
+        output = self.test_dir / "lint.sarif"
+        rc, _ = self.run_lint("--format", "sarif", "--output", str(output))
+        self.assertEqual(rc, 1)
+        run = json.loads(output.read_text(encoding="utf-8"))["runs"][0]
+        results = {(r["ruleId"], r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"]):
+                   r["locations"][0]["physicalLocation"]["region"]["startLine"] for r in run["results"]}
+        root = self.content.as_posix()
+        self.assertEqual(results[("invalid-type", f"{root}/technik/x.md")], 3)
+        self.assertEqual(results[("missing-groups", f"{root}/technik/x.md")], 6)
+        self.assertEqual(results[("missing-dossier", f"{root}/politik/d.md")], 8)
+        self.assertIn("duplicate-dossier-key", {rule["id"] for rule in run["tool"]["driver"]["rules"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import importlib.util
+import shutil
+import subprocess
+import tempfile
+import time
+import sys
+import os
+from pathlib import Path
+
+LINK_CHECK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "link-check.py")
+_spec = importlib.util.spec_from_file_location("link_check", LINK_CHECK)
+link_check = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(link_check)
+
+
+class LinkCheckTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.out = self.test_dir / "out"
+        self.manifests = self.test_dir / "manifests"
+        self.age = 100
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def page(self, tree, rel, *hrefs):
+        path = self.out / tree / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        links = "".join(f'<a href="{h}">x</a>' for h in hrefs)
+        path.write_text(f"<html><body>{links}</body></html>", encoding="utf-8")
+        return path
+
+    def run_check(self, *extra, audiences="public,group:friends,private"):
+        proc = subprocess.run(
+            [sys.executable, LINK_CHECK, "--out", str(self.out), "--audiences", audiences,
+             "--manifest-dir", str(self.manifests), "--workers", "1", *extra],
+            capture_output=True, text=True)
+        return proc.returncode, proc.stdout + proc.stderr
+
+    def settle(self):
+        """Backdate the output tree so the next run trusts its listings and stats."""
+        self.age += 10
+        stamp = time.time_ns() - self.age * 10**9
+        for dirpath, _, filenames in os.walk(self.out):
+            for name in filenames:
+                os.utime(os.path.join(dirpath, name), ns=(stamp, stamp))
+            os.utime(dirpath, ns=(stamp, stamp))
+
+    def broken(self, output):
+        return sorted(line[len("[FAIL] "):].replace(str(self.out) + "/", "")
+                      for line in output.splitlines() if ": broken link " in line)
+
+
+class TestHrefs(unittest.TestCase):
+    def test_parser_collects_root_relative_hrefs_only(self):
+        parser = link_check.HrefParser()
+        parser.feed('<a href="/a/">a</a><link href=/style.css><a href="//cdn.example/x">'
+                    '<a href="b/">b</a><a href="https://example.org/">e</a><img src="/bild.jpg">')
+        parser.close()
+        self.assertEqual(parser.hrefs, ["/a/", "/style.css"])
+
+    def test_link_target_uses_the_audience_prefix(self):
+        self.assertEqual(link_check.link_target("/g/friends/reisen/x/#teil"),
+                         (link_check.Audience("group", "friends"), "reisen/x"))
+        self.assertEqual(link_check.link_target("/private/?seite=2"), (link_check.Audience("private"), ""))
+        self.assertEqual(link_check.link_target("/technik/b%20c/"), (link_check.Audience("public"), "technik/b c"))
+
+    def test_chunked_parsing_of_large_files(self):
+        path = Path(tempfile.mkdtemp()) / "index.html"
+        try:
+            # Multi-byte characters across the chunk boundary.
+            filler = "ä" * link_check.READ_CHUNK
+            path.write_text(f'<p>{filler}</p><a href="/weit/hinten/">x</a>', encoding="utf-8")
+            _, hrefs, size = link_check.extract_hrefs(str(path))
+            self.assertEqual(hrefs, ["/weit/hinten/"])
+            self.assertGreater(size, link_check.READ_CHUNK)
+        finally:
+            shutil.rmtree(path.parent)
+
+
+class TestAudienceTrees(LinkCheckTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page("public", "index.html")
+        self.page("public", "technik/b/index.html")
+        self.page("private", "index.html")
+        self.page("private", "geheim/index.html")
+        self.page("groups/friends", "index.html")
+        self.page("groups/friends", "reisen/index.html")
+
+    def test_broken_link_in_group_tree_is_found_under_its_prefix(self):
+        self.page("groups/friends", "reisen/x/index.html", "/g/friends/reisen/", "/g/friends/reisen/fehlt/")
+        rc, output = self.run_check()
+        self.assertEqual(rc, 1)
+        self.assertEqual(self.broken(output),
+                         ["groups/friends/reisen/x/index.html: broken link /g/friends/reisen/fehlt/"])
+
+    def test_links_resolve_against_the_tree_of_their_prefix(self):
+        # technik/b exists in public only, geheim in private only.
+        self.page("groups/friends", "reisen/y/index.html", "/technik/b/", "/g/friends/technik/b/")
+        self.page("public", "technik/c/index.html", "/private/geheim/", "/geheim/")
+        rc, output = self.run_check()
+        self.assertEqual(self.broken(output), [
+            "groups/friends/reisen/y/index.html: broken link /g/friends/technik/b/",
+            "public/technik/c/index.html: broken link /geheim/",
+        ])
+
+    def test_links_into_audiences_without_output_are_not_checked(self):
+        self.page("public", "technik/d/index.html", "/private/gibtsnicht/")
+        rc, output = self.run_check(audiences="public")
+        self.assertEqual(rc, 0, output)
+        self.assertIn("1 into audiences without output skipped", output)
+
+    def test_fragment_and_query_are_ignored(self):
+        self.page("public", "technik/e/index.html",
+                  "/technik/b/#teil", "/technik/b/?x=1", "/technik/b#oben", "/?seite=2", "/technik/fehlt/#teil")
+        rc, output = self.run_check()
+        self.assertEqual(self.broken(output), ["public/technik/e/index.html: broken link /technik/fehlt/#teil"])
+
+    def test_memo_does_not_leak_verdicts_between_pages(self):
+        # The same hrefs from several pages and trees: every page gets its own findings.
+        self.page("public", "technik/f/index.html", "/technik/b/", "/fehlt/")
+        self.page("public", "technik/g/index.html", "/technik/b/", "/fehlt/")
+        self.page("groups/friends", "reisen/z/index.html", "/technik/b/", "/g/friends/technik/b/")
+        self.page("private", "p/index.html", "/technik/b/")
+        rc, output = self.run_check()
+        self.assertEqual(self.broken(output), [
+            "groups/friends/reisen/z/index.html: broken link /g/friends/technik/b/",
+            "public/technik/f/index.html: broken link /fehlt/",
+            "public/technik/g/index.html: broken link /fehlt/",
+        ])
+
+    def test_process_pool_gives_the_same_result(self):
+        for i in range(link_check.PARALLEL_MIN_FILES):
+            self.page("public", f"viele/{i}/index.html", "/technik/b/", f"/viele/{i + 1}/")
+        proc = subprocess.run(
+            [sys.executable, LINK_CHECK, "--out", str(self.out), "--manifest-dir", str(self.manifests),
+             "--workers", "2", "--full"], capture_output=True, text=True)
+        self.assertEqual(self.broken(proc.stdout + proc.stderr),
+                         [f"public/viele/{link_check.PARALLEL_MIN_FILES - 1}/index.html: broken link "
+                          f"/viele/{link_check.PARALLEL_MIN_FILES}/"])
+
+
+class TestIncrementalRuns(LinkCheckTestCase):
+    """link-check.py across runs without --full, with the output tree aged so the manifest is trusted."""
+
+    def setUp(self):
+        super().setUp()
+        self.page("public", "index.html", "/technik/")
+        self.page("public", "technik/index.html", "/")
+        self.page("public", "technik/a/index.html", "/technik/b/")
+        self.page("public", "technik/b/index.html", "/technik/")
+        self.page("public", "reisen/c/index.html", "/technik/")
+        self.settle()
+
+    def test_unchanged_tree_is_not_checked_again(self):
+        self.assertEqual(self.run_check(audiences="public")[0], 0)
+        rc, output = self.run_check(audiences="public")
+        self.assertEqual(rc, 0, output)
+        self.assertIn("in 0 of 5 changed or affected file(s)", output)
+
+    def test_deleted_target_is_reported_on_the_next_run(self):
+        self.assertEqual(self.run_check(audiences="public")[0], 0)
+        shutil.rmtree(self.out / "public/technik/b")
+        rc, output = self.run_check(audiences="public")
+        self.assertEqual(rc, 1)
+        self.assertEqual(self.broken(output), ["public/technik/a/index.html: broken link /technik/b/"])
+        # The finding is kept while nothing changes.
+        self.settle()
+        self.assertEqual(self.broken(self.run_check(audiences="public")[1]),
+                         ["public/technik/a/index.html: broken link /technik/b/"])
+
+    def test_added_target_rechecks_unchanged_linking_pages(self):
+        self.page("public", "reisen/d/index.html", "/reisen/neu/")
+        self.settle()
+        self.assertEqual(self.broken(self.run_check(audiences="public")[1]),
+                         ["public/reisen/d/index.html: broken link /reisen/neu/"])
+        self.page("public", "reisen/neu/index.html")
+        rc, output = self.run_check(audiences="public")
+        self.assertEqual(rc, 0, output)
+        # reisen/d itself is unchanged; it is re-checked because its target appeared.
+        self.assertIn("in 2 of 7 changed or affected file(s)", output)
+
+
+if __name__ == "__main__":
+    unittest.main()